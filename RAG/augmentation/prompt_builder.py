@@ -1,10 +1,185 @@
-def build_prompt(query, docs):
-    context = "\n\n".join([
-        f"[{d['type']} | page {d['page']}]\n{d['content']}"
-        for d in docs
-    ])
+import os
+import time
 
-    return f"""
+from RAG.tokens import estimate_tokens
+from RAG.tracing import record, record_size
+
+# Bump whenever the prompt text changes so cached answers built from the old prompt are not reused.
+PROMPT_TEMPLATE_VERSION = 2
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+TABLE_MAX_TOKENS = int(os.getenv("TABLE_MAX_TOKENS", "600"))
+# A block is cut to fit the remaining budget only if at least this much is left; otherwise it is skipped.
+MIN_BLOCK_TOKENS = 64
+
+# Chunks from chunker.split_text share up to CHUNK_OVERLAP characters; shorter matches are coincidence.
+MAX_OVERLAP_CHARS = 200
+MIN_OVERLAP_CHARS = 20
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of ``head`` that is a prefix of ``tail``."""
+    if len(tail) < MIN_OVERLAP_CHARS:
+        return 0
+
+    probe = tail[:MIN_OVERLAP_CHARS]
+    start = max(0, len(head) - MAX_OVERLAP_CHARS)
+    pos = head.find(probe, start)
+    while pos != -1:
+        if tail.startswith(head[pos:]):
+            return len(head) - pos
+        pos = head.find(probe, pos + 1)
+    return 0
+
+
+def _join(first: str, second: str):
+    """Join two chunks if one contains the other or they overlap; ``None`` if unrelated."""
+    if second in first:
+        return first, len(second)
+    if first in second:
+        return second, len(first)
+
+    size = _overlap(first, second)
+    if size:
+        return first + second[size:], size
+
+    size = _overlap(second, first)
+    if size:
+        return second + first[size:], size
+
+    return None
+
+
+def _merge_pieces(pieces):
+    """Stitch the chunks of one page back together. Returns ``(text, duplicated chars dropped)``."""
+    merged = []
+    dropped = 0
+
+    for content in pieces:
+        joined = True
+        while joined:
+            joined = False
+            for position, other in enumerate(merged):
+                result = _join(other, content)
+                if result is not None:
+                    content, size = result
+                    dropped += size
+                    del merged[position]
+                    joined = True
+                    break
+        merged.append(content)
+
+    return "\n".join(merged), dropped
+
+
+def _truncate_table(content: str, max_tokens: int):
+    """Keep the markdown header and as many rows as fit in ``max_tokens``."""
+    if estimate_tokens(content) <= max_tokens:
+        return content, False
+
+    lines = content.splitlines()
+    header, rows = lines[:2], lines[2:]
+    kept = list(header)
+    used = estimate_tokens("\n".join(header))
+
+    for row in rows:
+        cost = estimate_tokens(row) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(row)
+        used += cost
+
+    omitted = len(lines) - len(kept)
+    kept.append(f"... ({omitted} more rows)")
+    return "\n".join(kept), True
+
+
+def _truncate_text(content: str, max_tokens: int):
+    # Cut by characters, then trim until the estimate fits; ends on a word boundary when possible.
+    cut = content[: max_tokens * 4]
+    while cut and estimate_tokens(cut + " ...") > max_tokens:
+        cut = cut[: int(len(cut) * 0.9)]
+    space = cut.rfind(" ")
+    if space > len(cut) // 2:
+        cut = cut[:space]
+    return cut + " ..."
+
+
+def _blocks(docs, stats):
+    """Merge retrieved chunks into one block per (source, page, type), in first-hit order."""
+    blocks = {}
+
+    for doc in docs:
+        doc_type = doc.get("type", "text")
+        key = (doc.get("source"), doc.get("page"), doc_type)
+        content = doc.get("content", "") or ""
+
+        if doc_type == "table":
+            content, truncated = _truncate_table(content, TABLE_MAX_TOKENS)
+            stats["tables_truncated"] += truncated
+
+        block = blocks.setdefault(key, {"type": doc_type, "page": doc.get("page"), "pieces": []})
+        block["pieces"].append(content)
+
+    for block in blocks.values():
+        stats["merged"] += len(block["pieces"]) - 1
+        block["content"], dropped = _merge_pieces(block.pop("pieces"))
+        stats["duplicate_chars_removed"] += dropped
+
+    return list(blocks.values())
+
+
+def pack_context(docs, budget: int = CONTEXT_TOKEN_BUDGET):
+    """Fit retrieved ``docs`` into about ``budget`` tokens of prompt context.
+
+    Chunks from the same page are merged and their overlaps dropped, large
+    tables keep only the rows that fit ``TABLE_MAX_TOKENS``, and blocks are
+    added in retrieval order until the budget is spent. Returns
+    ``(context, stats)``; ``stats["tokens"]`` is the estimated context size.
+    """
+    stats = {
+        "budget": budget,
+        "tokens": 0,
+        "chunks": len(docs),
+        "blocks": 0,
+        "merged": 0,
+        "duplicate_chars_removed": 0,
+        "tables_truncated": 0,
+        "blocks_truncated": 0,
+        "blocks_dropped": 0,
+    }
+    parts = []
+    used = 0
+
+    for block in _blocks(docs, stats):
+        header = f"[{block['type']} | page {block['page']}]\n"
+        separator = 2 if parts else 0
+        cost = separator + estimate_tokens(header) + estimate_tokens(block["content"])
+        content = block["content"]
+
+        if used + cost > budget:
+            remaining = budget - used - separator - estimate_tokens(header)
+            if remaining < MIN_BLOCK_TOKENS:
+                stats["blocks_dropped"] += 1
+                continue
+            content = _truncate_text(content, remaining)
+            cost = separator + estimate_tokens(header) + estimate_tokens(content)
+            stats["blocks_truncated"] += 1
+
+        parts.append(header + content)
+        used += cost
+
+    stats["blocks"] = len(parts)
+    stats["tokens"] = used
+    return "\n\n".join(parts), stats
+
+
+def build_prompt_with_stats(query, docs, budget: int = CONTEXT_TOKEN_BUDGET):
+    """Like ``build_prompt`` but returns ``(prompt, stats)`` from ``pack_context``."""
+    started = time.perf_counter()
+    context, stats = pack_context(docs, budget)
+
+    prompt = f"""
     You are a multimodal document analyst.
 
     Use text, tables and image descriptions to answer.
@@ -17,3 +192,11 @@ def build_prompt(query, docs):
 
     Answer with page references.
     """
+    stats["prompt_tokens"] = estimate_tokens(prompt)
+    record("build_prompt", time.perf_counter() - started)
+    record_size("prompt_chars", len(prompt))
+    return prompt, stats
+
+
+def build_prompt(query, docs, budget: int = CONTEXT_TOKEN_BUDGET):
+    return build_prompt_with_stats(query, docs, budget)[0]
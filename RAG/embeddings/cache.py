@@ -0,0 +1,86 @@
+import hashlib
+import os
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from RAG.sqlite_cache import SharedCache, SQLiteCache
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", PROJECT_ROOT / "vectorstore" / "cache" / "embeddings.sqlite"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "500000"))
+CACHE_ENABLED = os.getenv("EMBED_CACHE", "1").lower() not in {"0", "false", "no", "off"}
+# float16 halves the cache; vectors come back within ~1e-3 relative error of what the model returned.
+CACHE_DTYPES = ("float32", "float16")
+DEFAULT_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float32")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def content_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteCache):
+    """Disk-backed embedding vectors keyed by (model, normalized content hash), evicted LRU.
+
+    New vectors are stored as ``dtype``; each row records its own, so changing it
+    keeps existing entries readable.
+    """
+
+    TABLE = "embeddings"
+    COLUMNS = {
+        "model": "TEXT NOT NULL",
+        "key": "TEXT NOT NULL",
+        "vector": "BLOB NOT NULL",
+        "dtype": "TEXT NOT NULL DEFAULT 'float32'",
+    }
+    KEY = ("model", "key")
+    # Hits are on the query path, so their last_used updates are written in batches.
+    TOUCH_BATCH = 1024
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES, dtype: str = DEFAULT_DTYPE):
+        if dtype not in CACHE_DTYPES:
+            raise ValueError(f"Unknown cache dtype '{dtype}'. Choose one of: {', '.join(CACHE_DTYPES)}.")
+
+        super().__init__(path, max_entries)
+        self.dtype = dtype
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "dtype" not in columns:
+            # Caches written before per-row dtypes hold float32 vectors only.
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+            self._conn.commit()
+
+    def get_many(self, model: str, texts):
+        """Return one cached vector (list of floats) or None per text."""
+        keys = [content_key(text) for text in texts]
+        found = self._get_many((model,), keys, ("vector", "dtype"))
+
+        results = []
+        for key in keys:
+            entry = found.get(key)
+            if entry is None:
+                results.append(None)
+            else:
+                blob, dtype = entry
+                results.append(np.frombuffer(blob, dtype=dtype).astype("float32").tolist())
+
+        return results
+
+    def put_many(self, model: str, texts, vectors):
+        self._put_many(
+            (model, content_key(text), np.asarray(vector, dtype=self.dtype).tobytes(), self.dtype)
+            for text, vector in zip(texts, vectors)
+            if vector
+        )
+
+
+_shared = SharedCache(EmbeddingCache, CACHE_ENABLED)
+
+
+def get_cache():
+    """Return the shared on-disk cache, or None when disabled with EMBED_CACHE=0."""
+    return _shared.get()
@@ -1,22 +1,21 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import httpx
 import requests
 
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
-URL = f"{OLLAMA_BASE_URL}/api/embeddings"
-DEFAULT_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+from RAG.embeddings.cache import get_cache
+from RAG.ollama_client import apost_json, post_json, with_keep_alive
 
+DEFAULT_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+DEFAULT_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
 
-def embed(text: str, model: str = DEFAULT_MODEL):
-    payload = {
-        "model": model,
-        "prompt": text or "",
-    }
+_batch_endpoint_available = True
 
-    response = requests.post(URL, json=payload, timeout=60)
-    response.raise_for_status()
-    data = response.json()
 
+def _parse_legacy(data, model: str):
     embedding = data.get("embedding")
     if not embedding and data.get("embeddings"):
         embedding = data["embeddings"][0]
@@ -26,3 +25,143 @@ def embed(text: str, model: str = DEFAULT_MODEL):
 
     return embedding
 
+
+def _parse_batch(data, texts, model: str):
+    embeddings = data.get("embeddings") or []
+    if len(embeddings) != len(texts) or not all(embeddings):
+        raise RuntimeError(f"Empty embedding returned by Ollama for model '{model}'.")
+    return embeddings
+
+
+def _batch_payload(texts, model: str):
+    return with_keep_alive({"model": model, "input": [text or "" for text in texts]})
+
+
+def _legacy_payload(text: str, model: str):
+    return with_keep_alive({"model": model, "prompt": text or ""})
+
+
+def _embed_legacy(text: str, model: str):
+    data = post_json("/api/embeddings", _legacy_payload(text, model), timeout=60)
+    return _parse_legacy(data, model)
+
+
+def _embed_batch(texts, model: str):
+    global _batch_endpoint_available
+
+    if _batch_endpoint_available:
+        try:
+            data = post_json("/api/embed", _batch_payload(texts, model), timeout=120)
+        except requests.HTTPError as exc:
+            # Ollama releases before /api/embed only expose the single-prompt endpoint.
+            if exc.response is None or exc.response.status_code != 404:
+                raise
+            _batch_endpoint_available = False
+        else:
+            return _parse_batch(data, texts, model)
+
+    return [_embed_legacy(text, model) for text in texts]
+
+
+async def _aembed_batch(texts, model: str):
+    global _batch_endpoint_available
+
+    if _batch_endpoint_available:
+        try:
+            data = await apost_json("/api/embed", _batch_payload(texts, model), timeout=120)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code != 404:
+                raise
+            _batch_endpoint_available = False
+        else:
+            return _parse_batch(data, texts, model)
+
+    results = await asyncio.gather(
+        *(apost_json("/api/embeddings", _legacy_payload(text, model), timeout=60) for text in texts)
+    )
+    return [_parse_legacy(data, model) for data in results]
+
+
+def embed(text: str, model: str = DEFAULT_MODEL, use_cache: bool = True):
+    return embed_many([text], model=model, use_cache=use_cache)[0]
+
+
+def _embed_uncached(texts, model: str, batch_size: int, concurrency: int):
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+    if concurrency == 1 or len(batches) == 1:
+        results = [_embed_batch(batch, model) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as pool:
+            results = list(pool.map(lambda batch: _embed_batch(batch, model), batches))
+
+    return [vector for batch in results for vector in batch]
+
+
+def embed_many(
+    texts,
+    model: str = DEFAULT_MODEL,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    use_cache: bool = True,
+):
+    """Embed texts in batches of ``batch_size`` with up to ``concurrency`` requests in flight.
+
+    Vectors already in the embedding cache are served from disk; only the
+    misses are sent to Ollama. Returns one vector per input text, in input order.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+    if concurrency <= 0:
+        raise ValueError("concurrency must be positive.")
+
+    texts = list(texts)
+    if not texts:
+        return []
+
+    cache = get_cache() if use_cache else None
+    if cache is None:
+        return _embed_uncached(texts, model, batch_size, concurrency)
+
+    vectors = cache.get_many(model, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+
+    if missing:
+        fresh = dict(zip(missing, _embed_uncached(missing, model, batch_size, concurrency)))
+        cache.put_many(model, missing, [fresh[text] for text in missing])
+        vectors = [fresh[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+    return vectors
+
+
+async def aembed(text: str, model: str = DEFAULT_MODEL, use_cache: bool = True):
+    return (await aembed_many([text], model=model, use_cache=use_cache))[0]
+
+
+async def aembed_many(
+    texts,
+    model: str = DEFAULT_MODEL,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_cache: bool = True,
+):
+    """Async ``embed_many``; batches run concurrently, bounded by ``OLLAMA_CONCURRENCY``."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+
+    texts = list(texts)
+    if not texts:
+        return []
+
+    cache = get_cache() if use_cache else None
+    vectors = await asyncio.to_thread(cache.get_many, model, texts) if cache else [None] * len(texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+
+    if missing:
+        batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+        results = await asyncio.gather(*(_aembed_batch(batch, model) for batch in batches))
+        fresh = dict(zip(missing, [vector for batch in results for vector in batch]))
+        if cache:
+            await asyncio.to_thread(cache.put_many, model, missing, [fresh[text] for text in missing])
+        vectors = [fresh[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+    return vectors
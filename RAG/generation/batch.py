@@ -0,0 +1,120 @@
+import asyncio
+import os
+
+from RAG.augmentation.prompt_builder import PROMPT_TEMPLATE_VERSION, build_prompt
+from RAG.generation.llm import DEFAULT_MODEL, agenerate
+from RAG.retrieval import query_cache
+from RAG.retrieval.retriever import aretrieve_many_with_ids
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Questions embedded and searched together; later groups are retrieved while earlier ones generate.
+BATCH_SEARCH_SIZE = int(os.getenv("BATCH_SEARCH_SIZE", "256"))
+
+
+def _error(position: int, question, detail: str):
+    return {"type": "error", "index": position, "question": question, "detail": detail}
+
+
+async def _answer(position: int, question: str, top_k: int, doc_ids, docs, model: str):
+    key = query_cache.answer_key(question, top_k, doc_ids, model, PROMPT_TEMPLATE_VERSION)
+    answer = query_cache.answers.get(key)
+    if answer is None:
+        answer = await agenerate(build_prompt(question, docs), model=model)
+        query_cache.answers.put(key, answer)
+    return {"type": "result", "index": position, "question": question, "answer": answer, "sources": docs}
+
+
+async def _retrieve_group(questions, start: int, top_k: int, mode, rerank, filters, collections):
+    """Retrieve one group; returns ``(errors, [(position, question, doc_ids, docs)])``."""
+    errors = []
+    valid = []
+    for position, question in enumerate(questions, start=start):
+        if isinstance(question, str) and question.strip():
+            valid.append((position, question))
+        else:
+            errors.append(_error(position, question, "Query cannot be empty."))
+
+    retrieved = await aretrieve_many_with_ids(
+        [question for _, question in valid], k=top_k, mode=mode, rerank=rerank, filters=filters, collections=collections
+    )
+    return errors, [(position, question, *hits) for (position, question), hits in zip(valid, retrieved)]
+
+
+async def aanswer_many(
+    questions,
+    top_k: int = 5,
+    mode=None,
+    rerank=None,
+    filters=None,
+    collections=None,
+    concurrency: int = BATCH_CONCURRENCY,
+    search_size: int = BATCH_SEARCH_SIZE,
+    model: str = DEFAULT_MODEL,
+):
+    """Answer ``questions``; returns an async iterator of results in completion order.
+
+    Questions are retrieved ``search_size`` at a time with batched embeddings
+    and one FAISS search per group, and up to ``concurrency`` answers are
+    generated at once. Each result is ``{"type": "result", "index",
+    "question", "answer", "sources"}``, or ``{"type": "error", "index",
+    "question", "detail"}`` for a question that failed. The first group is
+    retrieved before this returns, so a missing index or a bad ``mode``
+    raises here rather than mid-stream. ``filters`` and ``collections`` (see
+    ``retrieve``) apply to every question.
+    """
+    if concurrency <= 0:
+        raise ValueError("concurrency must be positive.")
+    if search_size <= 0:
+        raise ValueError("search_size must be positive.")
+
+    questions = list(questions)
+    first = await _retrieve_group(questions[:search_size], 0, top_k, mode, rerank, filters, collections)
+    return _answers(questions, first, top_k, mode, rerank, filters, collections, concurrency, search_size, model)
+
+
+async def _answers(
+    questions, first, top_k: int, mode, rerank, filters, collections, concurrency: int, search_size: int, model: str
+):
+    results = asyncio.Queue()
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def generate(position, question, doc_ids, docs):
+        try:
+            await results.put(await _answer(position, question, top_k, doc_ids, docs, model))
+        except Exception as exc:
+            await results.put(_error(position, question, str(exc)))
+        finally:
+            slots.release()
+
+    async def produce():
+        for start in range(0, len(questions), search_size):
+            group = questions[start:start + search_size]
+            try:
+                if start == 0:
+                    errors, retrieved = first
+                else:
+                    errors, retrieved = await _retrieve_group(group, start, top_k, mode, rerank, filters, collections)
+            except Exception as exc:
+                for position, question in enumerate(group, start=start):
+                    await results.put(_error(position, question, str(exc)))
+                continue
+
+            for error in errors:
+                await results.put(error)
+            for position, question, doc_ids, docs in retrieved:
+                # Waiting for a free slot here keeps retrieval at most one group ahead of generation.
+                await slots.acquire()
+                task = asyncio.create_task(generate(position, question, doc_ids, docs))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+    producer = asyncio.create_task(produce())
+    try:
+        for _ in range(len(questions)):
+            yield await results.get()
+        await producer
+    finally:
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
@@ -1,28 +1,89 @@
 import os
+import time
 
-import requests
+from RAG.ollama_client import apost_json, apost_stream, post_json, post_stream, with_keep_alive
+from RAG.tracing import record, record_size
 
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
-URL = f"{OLLAMA_BASE_URL}/api/generate"
 DEFAULT_MODEL = os.getenv("GEN_MODEL", "llama3")
 
 
-def generate(prompt: str, model: str = DEFAULT_MODEL) -> str:
-    response = requests.post(
-        URL,
-        json={
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-        },
-        timeout=180,
-    )
-    response.raise_for_status()
-
-    data = response.json()
+def _payload(prompt: str, model: str, stream: bool):
+    return with_keep_alive({
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+    })
+
+
+def _record_usage(data, started: float):
+    # Ollama reports token counts in the final (or only) response object.
+    record("generate", time.perf_counter() - started)
+    record_size("prompt_tokens", data.get("prompt_eval_count"))
+    record_size("generated_tokens", data.get("eval_count"))
+
+
+def _answer(data, model: str) -> str:
     answer = data.get("response", "").strip()
 
     if not answer:
         raise RuntimeError(f"Empty response returned by Ollama for model '{model}'.")
 
     return answer
+
+
+def _token(data, model: str) -> str:
+    if data.get("error"):
+        raise RuntimeError(f"Ollama generation failed for model '{model}': {data['error']}")
+    return data.get("response", "")
+
+
+def generate(prompt: str, model: str = DEFAULT_MODEL) -> str:
+    started = time.perf_counter()
+    data = post_json("/api/generate", _payload(prompt, model, stream=False), timeout=180)
+    _record_usage(data, started)
+    return _answer(data, model)
+
+
+async def agenerate(prompt: str, model: str = DEFAULT_MODEL) -> str:
+    started = time.perf_counter()
+    data = await apost_json("/api/generate", _payload(prompt, model, stream=False), timeout=180)
+    _record_usage(data, started)
+    return _answer(data, model)
+
+
+def generate_stream(prompt: str, model: str = DEFAULT_MODEL):
+    """Yield answer text fragments as Ollama produces them."""
+    produced = False
+    started = time.perf_counter()
+
+    for data in post_stream("/api/generate", _payload(prompt, model, stream=True), timeout=180):
+        token = _token(data, model)
+        if token:
+            produced = True
+            yield token
+
+        if data.get("done"):
+            _record_usage(data, started)
+            break
+
+    if not produced:
+        raise RuntimeError(f"Empty response returned by Ollama for model '{model}'.")
+
+
+async def agenerate_stream(prompt: str, model: str = DEFAULT_MODEL):
+    """Async ``generate_stream``."""
+    produced = False
+    started = time.perf_counter()
+
+    async for data in apost_stream("/api/generate", _payload(prompt, model, stream=True), timeout=180):
+        token = _token(data, model)
+        if token:
+            produced = True
+            yield token
+
+        if data.get("done"):
+            _record_usage(data, started)
+            break
+
+    if not produced:
+        raise RuntimeError(f"Empty response returned by Ollama for model '{model}'.")
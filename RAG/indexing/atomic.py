@@ -0,0 +1,22 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write(path, write):
+    """Write via a temp file in the same directory and rename it over ``path``.
+
+    Readers see either the previous file or the complete new one, never a partial write.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
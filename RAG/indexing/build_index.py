@@ -1,48 +1,395 @@
+import hashlib
+import json
 import os
 import pickle
+from contextlib import suppress
 from pathlib import Path
 
 import faiss
 import numpy as np
 
-from RAG.embeddings.ollama_embed import embed
+from RAG.embeddings.ollama_embed import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, DEFAULT_MODEL, embed_many
+from RAG.indexing.atomic import atomic_write
+from RAG.indexing.doc_store import DOCSTORE_DIR, DocStore, DocStoreWriter, doc_store_exists
+from RAG.indexing.index_types import (
+    DEFAULT_INDEX_TYPE,
+    index_config,
+    make_index,
+    scheme,
+    supports_remove,
+    train_sample_size,
+)
+from RAG.indexing.lexical import LEXICAL_DIR, LexicalWriter
+from RAG.indexing.versions import discard, new_version_dir, publish, version_dir
+from RAG.tracing import INGEST_STAGE_SECONDS, span
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_SAVE_PATH = PROJECT_ROOT / "vectorstore" / "faiss_index"
 
+INDEX_FILE = "index.bin"
+# Pickled docs written before the columnar document store; still read, never written.
+LEGACY_META_FILE = "meta.pkl"
+MANIFEST_FILE = "manifest.json"
+# 2: chunk ids include the source path, so renamed or duplicated files no longer share ids.
+MANIFEST_VERSION = 2
 
-def build_index(docs, save_path=DEFAULT_SAVE_PATH):
-    if not docs:
-        raise ValueError("No documents found for indexing.")
 
-    save_dir = Path(save_path)
-    os.makedirs(save_dir, exist_ok=True)
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    vectors = []
-    indexed_docs = []
 
+def chunk_id(source: str, file_hash: str, position: int) -> int:
+    """Stable 63-bit FAISS id for the ``position``-th chunk of a file version at ``source``."""
+    digest = hashlib.blake2b(f"{source}\0{file_hash}:{position}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def _source_hash(source, docs) -> str:
+    if source and Path(source).is_file():
+        return file_digest(source)
+
+    digest = hashlib.sha256()
     for doc in docs:
-        content = doc.get("content", "").strip()
-        if not content:
-            continue
+        digest.update(doc.get("content", "").encode("utf-8"))
+    return digest.hexdigest()
 
-        vector = embed(content)
+
+def _group_by_source(docs):
+    grouped = {}
+    for doc in docs:
+        grouped.setdefault(doc.get("source") or "", []).append(doc)
+    return grouped
+
+
+def embed_source(
+    source, file_hash, docs, batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY
+):
+    """Embed one file's docs; returns (chunk ids, float32 matrix, id -> doc) for the non-empty ones."""
+    candidates = [
+        (chunk_id(source, file_hash, position), doc)
+        for position, doc in enumerate(docs)
+        if doc.get("content", "").strip()
+    ]
+    embeddings = embed_many(
+        [doc["content"].strip() for _, doc in candidates],
+        batch_size=batch_size,
+        concurrency=concurrency,
+    )
+
+    ids = []
+    vectors = []
+    indexed = {}
+
+    for (doc_id, doc), vector in zip(candidates, embeddings):
         if not vector:
             continue
 
+        ids.append(doc_id)
         vectors.append(vector)
-        indexed_docs.append(doc)
+        indexed[doc_id] = doc
+
+    if not ids:
+        # A file without text, such as a scanned PDF: nothing to add, but its source is still recorded.
+        return ids, np.empty((0, 0), dtype="float32"), indexed
+    return ids, np.array(vectors, dtype="float32"), indexed
+
+
+def load_manifest(save_path=DEFAULT_SAVE_PATH):
+    """Manifest of the current version under ``save_path``, or None when missing or outdated."""
+    manifest_path = version_dir(save_path) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+
+def plan_update(pdf_files, save_path=DEFAULT_SAVE_PATH, index_type=None, index_params=None):
+    """Diff ``pdf_files`` against the manifest.
+
+    Returns ``(changed, removed)`` where ``changed`` maps new or modified paths
+    to their current hash and ``removed`` lists indexed paths no longer present.
+    Returns None when there is no compatible index to update incrementally,
+    including when ``index_type``, or a storage, metric or reduction given in
+    ``index_params``, differs from the one already built.
+    """
+    manifest = load_manifest(save_path)
+    if manifest is None or manifest.get("model") != DEFAULT_MODEL or not (version_dir(save_path) / INDEX_FILE).exists():
+        return None
+
+    built = manifest.get("index", {})
+    if index_type is not None and index_type != built.get("type", "flat"):
+        return None
+    for name in ("storage", "metric", "reduce"):
+        if (index_params or {}).get(name) not in (None, scheme(built, name)):
+            return None
+
+    indexed = manifest["files"]
+    changed = {}
+
+    for pdf_path in pdf_files:
+        current_hash = file_digest(pdf_path)
+        entry = indexed.get(pdf_path)
+        if entry is None or entry["hash"] != current_hash:
+            changed[pdf_path] = current_hash
+
+    current = set(pdf_files)
+    removed = [source for source in indexed if source not in current]
+
+    return changed, removed
+
+
+def _save(target_dir: Path, index, writers, manifest):
+    # write_index streams into the file instead of serializing a second copy in memory.
+    atomic_write(target_dir / INDEX_FILE, lambda f: faiss.write_index(index, faiss.PyCallbackIOWriter(f.write)))
+    for writer in writers:
+        writer.close()
+    atomic_write(
+        target_dir / MANIFEST_FILE,
+        lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")),
+    )
+
+
+def _existing_docs(save_dir: Path):
+    """Yield ``(id, doc)`` for every chunk already stored, one at a time."""
+    if doc_store_exists(save_dir / DOCSTORE_DIR):
+        yield from DocStore(save_dir / DOCSTORE_DIR).items()
+        return
+
+    with (save_dir / LEGACY_META_FILE).open("rb") as f:
+        yield from pickle.load(f).items()
+
 
-    if not vectors:
-        raise ValueError("No embeddings were generated. Check Ollama embedding setup.")
+def _empty_manifest(config):
+    return {"version": MANIFEST_VERSION, "model": DEFAULT_MODEL, "dim": None, "index": config, "files": {}}
 
-    dim = len(vectors[0])
-    index = faiss.IndexFlatL2(dim)
-    index.add(np.array(vectors, dtype="float32"))
 
-    faiss.write_index(index, str(save_dir / "index.bin"))
+def _remove_ids(index, config, stale_ids):
+    if supports_remove(config):
+        index.remove_ids(np.array(stale_ids, dtype="int64"))
+        return index
+
+    # HNSW graphs cannot drop nodes; rebuild from the stored vectors of the survivors.
+    stale = set(stale_ids)
+    kept_ids = np.array([int(i) for i in faiss.vector_to_array(index.id_map) if int(i) not in stale], dtype="int64")
+    if not len(kept_ids):
+        return None
+
+    kept_vectors = index.reconstruct_batch(kept_ids)
+    # A projection or int8 ranges are learned again from what is left.
+    rebuilt = make_index(index.d, config, kept_vectors[: train_sample_size(config)])
+    rebuilt.add_with_ids(kept_vectors, kept_ids)
+    return rebuilt
+
+
+def stream_update(
+    files,
+    removed=(),
+    save_path=DEFAULT_SAVE_PATH,
+    rebuild: bool = False,
+    index_type: str = DEFAULT_INDEX_TYPE,
+    index_params=None,
+):
+    """Apply per-file changes to an existing index, one file at a time.
+
+    ``files`` is an iterable of ``(source, file hash, embedded)`` where
+    ``embedded`` is what ``embed_source`` returns; each file replaces any
+    chunks its source had before, and is added to the index and written to the
+    document store and lexical index as soon as it arrives, so memory does not
+    grow with the number of files. ``removed`` lists source paths whose chunks
+    should be dropped. Chunks of every other file are left untouched. With
+    ``rebuild`` the existing index is ignored and replaced by ``files`` alone,
+    using ``index_type`` and ``index_params`` (see
+    ``index_types.DEFAULT_PARAMS``); otherwise the index keeps the type
+    recorded in its manifest. Returns the number of indexed chunks.
+
+    The result is written to a new version directory next to the current one
+    (see ``versions``) and published only once complete; readers keep using
+    the previous version until then.
+    """
+    save_dir = Path(save_path)
+    os.makedirs(save_dir, exist_ok=True)
+    source_dir = version_dir(save_dir)
+
+    manifest = None if rebuild else load_manifest(source_dir)
+    if manifest is not None and (source_dir / INDEX_FILE).exists():
+        index = faiss.read_index(str(source_dir / INDEX_FILE))
+        config = manifest.setdefault("index", index_config("flat"))
+    else:
+        manifest = None
+        index = None
+        config = index_config(index_type, index_params)
+
+    existing = manifest is not None
+    manifest = manifest or _empty_manifest(config)
+
+    # Ids of replaced or removed sources: skipped when carrying over stored docs.
+    replaced_ids = set()
+    # Those still in the FAISS index: removed before any of them is added again, else at the end.
+    stale_ids = set()
+    for source in removed:
+        entry = manifest["files"].pop(source, None)
+        if entry:
+            replaced_ids.update(entry["ids"])
+            stale_ids.update(entry["ids"])
+
+    target_dir = new_version_dir(save_dir)
+    writers = (DocStoreWriter(target_dir / DOCSTORE_DIR), LexicalWriter(target_dir / LEXICAL_DIR))
+    doc_writer, lexical_writer = writers
+    # Vectors held back until there are enough to train an IVF index on. The buffer is
+    # allocated once at full size; pages the OS never touches cost no memory.
+    train_ids = []
+    train_vectors = None
+    train_target = train_sample_size(config)
+
+    def add(ids, vectors):
+        nonlocal index
+        with span("index", INGEST_STAGE_SECONDS):
+            if index is not None and not stale_ids.isdisjoint(ids):
+                # Removing afterwards would take the new vectors with the old ones.
+                index = _remove_ids(index, config, list(stale_ids))
+                stale_ids.clear()
+            if index is None:
+                # IVF variants are trained once, on the first vectors they see.
+                index = make_index(vectors.shape[1], config, vectors[:train_target])
+                manifest["dim"] = index.d
+            elif vectors.shape[1] != index.d:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {index.d}. "
+                    "Rebuild the index from scratch."
+                )
+            index.add_with_ids(vectors, np.array(ids, dtype="int64"))
+
+    try:
+        for source, file_hash, (ids, vectors, indexed) in files:
+            entry = manifest["files"].pop(source, None)
+            if entry:
+                replaced_ids.update(entry["ids"])
+                stale_ids.update(entry["ids"])
+            manifest["files"][source] = {"hash": file_hash, "ids": ids}
+
+            for doc_id in ids:
+                doc = indexed[doc_id]
+                doc_writer.add(doc_id, doc)
+                lexical_writer.add(doc_id, doc.get("content", ""))
+
+            if not ids:
+                continue
+            if index is not None or len(train_ids) + len(ids) > train_target:
+                if train_ids:
+                    add(train_ids, train_vectors[: len(train_ids)])
+                    train_ids, train_vectors = [], None
+                add(ids, vectors)
+                continue
+
+            if train_vectors is None:
+                train_vectors = np.empty((train_target, vectors.shape[1]), dtype="float32")
+            train_vectors[len(train_ids) : len(train_ids) + len(ids)] = vectors
+            train_ids.extend(ids)
+
+        if train_ids:
+            add(train_ids, train_vectors[: len(train_ids)])
+            train_ids, train_vectors = [], None
+
+        if stale_ids and index is not None:
+            index = _remove_ids(index, config, list(stale_ids))
+
+        if existing:
+            for doc_id, doc in _existing_docs(source_dir):
+                if doc_id not in replaced_ids:
+                    doc_writer.add(doc_id, doc)
+                    lexical_writer.add(doc_id, doc.get("content", ""))
+
+        if index is None or index.ntotal == 0:
+            raise ValueError("No embeddings were generated. Check Ollama embedding setup.")
+    except BaseException:
+        try:
+            for writer in writers:
+                # A failing abort must not hide the error that got us here.
+                with suppress(Exception):
+                    writer.abort()
+        finally:
+            discard(target_dir)
+        raise
+
+    try:
+        with span("publish", INGEST_STAGE_SECONDS):
+            _save(target_dir, index, writers, manifest)
+    except BaseException:
+        discard(target_dir)
+        raise
+    publish(save_dir, target_dir)
+
+    return index.ntotal
+
+
+def _embedded_files(changed, embedded, batch_size: int, concurrency: int):
+    for source, (file_hash, source_docs) in changed.items():
+        result = embedded.get(source)
+        if result is None:
+            result = embed_source(source, file_hash, source_docs, batch_size, concurrency)
+        yield source, file_hash, result
+
+
+def update_index(
+    changed,
+    removed=(),
+    save_path=DEFAULT_SAVE_PATH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rebuild: bool = False,
+    index_type: str = DEFAULT_INDEX_TYPE,
+    index_params=None,
+    embedded=None,
+):
+    """``stream_update`` for files already chunked in memory.
+
+    ``changed`` maps source path -> (file hash, docs) for new or modified
+    files; each is embedded just before it is added unless ``embedded`` maps
+    the source to an ``embed_source`` result computed ahead of time.
+    """
+    return stream_update(
+        _embedded_files(changed, embedded or {}, batch_size, concurrency),
+        removed,
+        save_path=save_path,
+        rebuild=rebuild,
+        index_type=index_type,
+        index_params=index_params,
+    )
+
+
+def build_index(
+    docs,
+    save_path=DEFAULT_SAVE_PATH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    index_type: str = DEFAULT_INDEX_TYPE,
+    index_params=None,
+):
+    if not docs:
+        raise ValueError("No documents found for indexing.")
+
+    save_dir = Path(save_path)
+    os.makedirs(save_dir, exist_ok=True)
 
-    with (save_dir / "meta.pkl").open("wb") as f:
-        pickle.dump(indexed_docs, f)
+    changed = {
+        source: (_source_hash(source, source_docs), source_docs)
+        for source, source_docs in _group_by_source(docs).items()
+    }
 
-    return len(indexed_docs)
+    return update_index(
+        changed,
+        save_path=save_dir,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        rebuild=True,
+        index_type=index_type,
+        index_params=index_params,
+    )
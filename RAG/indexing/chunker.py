@@ -1,6 +1,20 @@
+import os
+import re
+
+from RAG.tokens import estimate_from_counts, token_counts
+
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
 
+CHUNK_MODES = ("fixed", "layout")
+# "fixed" cuts CHUNK_SIZE-character windows; "layout" packs PyMuPDF text blocks up to CHUNK_MAX_TOKENS.
+DEFAULT_CHUNK_MODE = os.getenv("CHUNK_MODE", "fixed")
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+
+# A sentence ends at . ! or ? followed by whitespace and something that can start a sentence.
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+HYPHENATED_BREAK = re.compile(r"(?<=[a-z])-\n(?=[a-z])")
+
 
 def split_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
     if chunk_size <= 0:
@@ -48,3 +62,113 @@ def chunk_text(pages, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_O
             )
 
     return chunks
+
+
+def _paragraph(text: str) -> str:
+    """A PyMuPDF block as one line of text: hyphenated line breaks rejoined, whitespace collapsed."""
+    if "-\n" in text:
+        text = HYPHENATED_BREAK.sub("", text)
+    return " ".join(text.split())
+
+
+def _word_windows(sentence: str, max_tokens: int):
+    """Cut a sentence longer than ``max_tokens`` at word boundaries; yields ``(text, token_counts)``."""
+    window = []
+    words = chars = 0
+    for word in sentence.split(" "):
+        word_words, word_chars = token_counts(word)
+        if window and estimate_from_counts(words + word_words, chars + 1 + word_chars) > max_tokens:
+            yield " ".join(window), (words, chars)
+            window, words, chars = [], 0, 0
+        chars += word_chars + (1 if window else 0)
+        words += word_words
+        window.append(word)
+    if window:
+        yield " ".join(window), (words, chars)
+
+
+def _pieces(paragraph: str, max_tokens: int):
+    """``(text, token_counts)`` pieces of a paragraph, each within ``max_tokens``; whole sentences where possible."""
+    counts = token_counts(paragraph)
+    if estimate_from_counts(*counts) <= max_tokens:
+        yield paragraph, counts
+        return
+
+    for sentence in SENTENCE_END.split(paragraph):
+        counts = token_counts(sentence)
+        if estimate_from_counts(*counts) <= max_tokens:
+            yield sentence, counts
+        else:
+            yield from _word_windows(sentence, max_tokens)
+
+
+def split_blocks(blocks, max_tokens: int = CHUNK_MAX_TOKENS):
+    """Pack ``(text, bbox)`` blocks into chunks of at most ``max_tokens``.
+
+    Paragraphs are kept whole and joined with their neighbours while they fit;
+    a paragraph that is too long on its own is split between sentences, and a
+    sentence that is too long between words. Returns ``(text, bboxes)`` pairs,
+    where ``bboxes`` are the boxes of the blocks a chunk draws from.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive.")
+
+    chunks = []
+    parts = []
+    boxes = []
+    # token_counts of the chunk so far; the separator between two pieces adds one character.
+    words = chars = 0
+
+    def flush():
+        nonlocal parts, boxes, words, chars
+        if parts:
+            chunks.append(("\n".join(parts), boxes))
+        parts, boxes, words, chars = [], [], 0, 0
+
+    for text, bbox in blocks:
+        paragraph = _paragraph(text)
+        if not paragraph:
+            continue
+
+        box = [round(float(value), 1) for value in bbox]
+        for piece, (piece_words, piece_chars) in _pieces(paragraph, max_tokens):
+            if parts and estimate_from_counts(words + piece_words, chars + 1 + piece_chars) > max_tokens:
+                flush()
+            chars += piece_chars + (1 if parts else 0)
+            words += piece_words
+            # Consecutive sentences of one split paragraph continue the same line.
+            if boxes and boxes[-1] == box:
+                parts[-1] += " " + piece
+            else:
+                parts.append(piece)
+                boxes.append(box)
+
+    flush()
+    return chunks
+
+
+def chunk_layout(pages, max_tokens: int = CHUNK_MAX_TOKENS):
+    """Chunks from the text blocks ``load_pdf(..., blocks=True)`` returns; chunks never span pages."""
+    chunks = []
+
+    for page in pages:
+        for text, bboxes in split_blocks(page.get("blocks", ()), max_tokens=max_tokens):
+            chunks.append(
+                {
+                    "content": text,
+                    "page": page.get("page", 0),
+                    "type": "text",
+                    "source": page.get("source"),
+                    "bboxes": bboxes,
+                }
+            )
+
+    return chunks
+
+
+def chunk_pages(pages, mode: str = DEFAULT_CHUNK_MODE):
+    if mode == "fixed":
+        return chunk_text(pages)
+    if mode == "layout":
+        return chunk_layout(pages)
+    raise ValueError(f"Unknown chunk mode '{mode}'. Choose one of: {', '.join(CHUNK_MODES)}.")
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from RAG.indexing.atomic import atomic_write
+from RAG.indexing.versions import current_version
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# The collection queries use when none is named; it lives where the single index always has.
+DEFAULT_COLLECTION = "default"
+DEFAULT_COLLECTION_DIR = PROJECT_ROOT / "vectorstore" / "faiss_index"
+COLLECTIONS_DIR = PROJECT_ROOT / "vectorstore" / "collections"
+# PDFs of a named collection are read from this folder under data/raw.
+RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
+# Records the shard count at the collection root; shards that hold no PDF have no folder to count.
+COLLECTION_FILE = "collection.json"
+
+_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+_SHARD_NAME = re.compile(r"^shard_(\d+)$")
+
+
+def collection_name(name) -> str:
+    """``name`` if it can name a collection directory, else ValueError."""
+    if not isinstance(name, str) or not _NAME.match(name):
+        raise ValueError(
+            f"Invalid collection name {name!r}: use up to 64 letters, digits, '_', '-' or '.', "
+            "starting with a letter or digit."
+        )
+    return name
+
+
+def collection_names(collections):
+    """Validate a collection name or list of them; None means the default collection."""
+    if collections is None:
+        return (DEFAULT_COLLECTION,)
+    names = [collections] if isinstance(collections, str) else list(collections)
+    if not names:
+        raise ValueError("Name at least one collection.")
+    return tuple(dict.fromkeys(collection_name(name) for name in names))
+
+
+def collection_dir(name: str, default_dir=DEFAULT_COLLECTION_DIR) -> Path:
+    return Path(default_dir) if name == DEFAULT_COLLECTION else COLLECTIONS_DIR / collection_name(name)
+
+
+def collection_raw_dir(name: str) -> Path:
+    return RAW_DATA_DIR if name == DEFAULT_COLLECTION else RAW_DATA_DIR / collection_name(name)
+
+
+def list_pdfs(raw_dir):
+    """PDF paths directly inside ``raw_dir``, sorted, as strings the way manifests key them."""
+    return sorted(str(path) for path in Path(raw_dir).glob("*.pdf"))
+
+
+def shard_dir(root, shard: int) -> Path:
+    return Path(root) / f"shard_{shard:02d}"
+
+
+def _numbered_shards(root: Path):
+    if not root.is_dir():
+        return []
+    numbered = []
+    for path in root.iterdir():
+        match = _SHARD_NAME.match(path.name)
+        if match and path.is_dir():
+            numbered.append((int(match.group(1)), path))
+    return sorted(numbered)
+
+
+def shard_dirs(root):
+    """Index roots of a collection's shards: its ``shard_NN`` folders, or the collection folder itself."""
+    root = Path(root)
+    return [path for _, path in _numbered_shards(root)] or [root]
+
+
+def save_shard_count(root, shards: int):
+    atomic_write(Path(root) / COLLECTION_FILE, lambda f: f.write(json.dumps({"shards": shards}).encode("utf-8")))
+
+
+def shard_count(root) -> int:
+    """Shards the collection at ``root`` is split into; 0 when nothing was built there yet."""
+    root = Path(root)
+    try:
+        return int(json.loads((root / COLLECTION_FILE).read_text(encoding="utf-8"))["shards"])
+    except FileNotFoundError:
+        pass
+    # Built before the count was recorded: infer it from what is on disk.
+    numbered = _numbered_shards(root)
+    if numbered:
+        return len(numbered)
+    # An unsharded collection: a published version, or the files of an index from before versioning.
+    return 1 if current_version(root) is not None or (root / "index.bin").exists() else 0
+
+
+def shard_of(source, shards: int) -> int:
+    """Shard a source file belongs to; by file name, so moving the data folder keeps the assignment."""
+    if shards <= 1:
+        return 0
+    digest = hashlib.blake2b(Path(source).name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+
+def list_collections(default_dir=DEFAULT_COLLECTION_DIR):
+    """Names of the collections that have been built, the default one first."""
+    names = [DEFAULT_COLLECTION] if shard_count(default_dir) else []
+    if COLLECTIONS_DIR.is_dir():
+        names.extend(
+            path.name
+            for path in sorted(COLLECTIONS_DIR.iterdir())
+            if path.is_dir() and _NAME.match(path.name) and path.name != DEFAULT_COLLECTION and shard_count(path)
+        )
+    return names
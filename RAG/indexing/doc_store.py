@@ -0,0 +1,234 @@
+import json
+import mmap
+import tempfile
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from RAG.indexing.atomic import atomic_write
+
+DOCSTORE_DIR = "docstore"
+
+# Keys stored as dedicated columns; everything else goes into the per-row JSON "extra" blob.
+_COLUMN_KEYS = ("content", "page", "type", "source")
+_NO_PAGE = -1
+
+
+class DocStoreWriter:
+    """Build a document store one doc at a time.
+
+    Text and extra JSON are spilled to temporary files as docs arrive, so only
+    the fixed-width columns stay in memory. ``close`` sorts rows by id and
+    writes the layout described in ``write_doc_store``.
+    """
+
+    def __init__(self, path):
+        self.store_dir = Path(path)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.types = {}
+        self.sources = {}
+
+        self._ids = array("q")
+        self._pages = array("i")
+        self._type_codes = array("H")
+        self._source_codes = array("i")
+        self._content = tempfile.TemporaryFile(dir=self.store_dir)
+        self._content_spans = array("q")
+        self._extra = tempfile.TemporaryFile(dir=self.store_dir)
+        self._extra_spans = array("q")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, doc_id, doc):
+        content = (doc.get("content") or "").encode("utf-8")
+        self._content_spans.extend((self._content.tell(), len(content)))
+        self._content.write(content)
+
+        extra = {key: value for key, value in doc.items() if key not in _COLUMN_KEYS}
+        page = doc.get("page")
+        if isinstance(page, (int, np.integer)) and page >= 0:
+            self._pages.append(int(page))
+        else:
+            self._pages.append(_NO_PAGE)
+            if page is not None:
+                extra["page"] = page
+
+        encoded_extra = json.dumps(extra, default=str).encode("utf-8") if extra else b""
+        self._extra_spans.extend((self._extra.tell(), len(encoded_extra)))
+        self._extra.write(encoded_extra)
+
+        self._ids.append(int(doc_id))
+        self._type_codes.append(self.types.setdefault(doc.get("type") or "", len(self.types)))
+        self._source_codes.append(self.sources.setdefault(doc.get("source") or "", len(self.sources)))
+
+    def _write_sorted_blob(self, name, spool, spans, order):
+        spans = np.frombuffer(spans, dtype="int64").reshape(-1, 2)[order]
+        spool.flush()
+
+        def copy(f):
+            for start, length in spans:
+                spool.seek(start)
+                f.write(spool.read(length))
+
+        atomic_write(self.store_dir / name, copy)
+
+        offsets = np.zeros(len(spans) + 1, dtype="int64")
+        np.cumsum(spans[:, 1], out=offsets[1:])
+        return offsets
+
+    def close(self):
+        try:
+            ids = np.frombuffer(self._ids, dtype="int64")
+            order = np.argsort(ids, kind="stable")
+
+            # Row arrays first and vocab.json last, mirroring how the index is saved.
+            content_offsets = self._write_sorted_blob("content.bin", self._content, self._content_spans, order)
+            extra_offsets = self._write_sorted_blob("extra.bin", self._extra, self._extra_spans, order)
+            for name, column in (
+                ("ids", ids[order]),
+                ("content_offsets", content_offsets),
+                ("extra_offsets", extra_offsets),
+                ("page", np.frombuffer(self._pages, dtype="int32")[order]),
+                ("type", np.frombuffer(self._type_codes, dtype="uint16")[order]),
+                ("source", np.frombuffer(self._source_codes, dtype="int32")[order]),
+            ):
+                atomic_write(self.store_dir / f"{name}.npy", lambda f, column=column: np.save(f, column))
+            atomic_write(
+                self.store_dir / "vocab.json",
+                lambda f: f.write(
+                    json.dumps({"types": list(self.types), "sources": list(self.sources)}).encode("utf-8")
+                ),
+            )
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Drop the spilled text without touching the store on disk."""
+        self._content.close()
+        self._extra.close()
+
+
+def write_doc_store(path, docs):
+    """Write ``docs`` (FAISS id -> doc dict) as an offset-indexed columnar store under ``path``.
+
+    Layout: ``content.bin``/``extra.bin`` hold UTF-8 text and per-row JSON back to
+    back, ``*_offsets.npy`` index into them, and ``ids``/``page``/``type``/``source``
+    are fixed-width arrays with ``vocab.json`` mapping type/source codes to strings.
+    """
+    writer = DocStoreWriter(path)
+    for doc_id, doc in docs.items():
+        writer.add(doc_id, doc)
+    writer.close()
+
+
+def doc_store_exists(path) -> bool:
+    return (Path(path) / "vocab.json").exists()
+
+
+def _map_blob(path: Path):
+    if path.stat().st_size == 0:
+        return b""
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DocStore:
+    """Read-only view of a store written by ``write_doc_store``.
+
+    Columns and text blobs are memory-mapped, so opening is cheap, only the
+    rows that are actually fetched get paged in, and processes opening the same
+    store share the OS page cache.
+    """
+
+    def __init__(self, path):
+        store_dir = Path(path)
+        vocab = json.loads((store_dir / "vocab.json").read_text(encoding="utf-8"))
+        self.types = vocab["types"]
+        self.sources = vocab["sources"]
+
+        self.ids = np.load(store_dir / "ids.npy", mmap_mode="r")
+        self.content_offsets = np.load(store_dir / "content_offsets.npy", mmap_mode="r")
+        self.extra_offsets = np.load(store_dir / "extra_offsets.npy", mmap_mode="r")
+        self.pages = np.load(store_dir / "page.npy", mmap_mode="r")
+        self.type_codes = np.load(store_dir / "type.npy", mmap_mode="r")
+        self.source_codes = np.load(store_dir / "source.npy", mmap_mode="r")
+        self._content = _map_blob(store_dir / "content.bin")
+        self._extra = _map_blob(store_dir / "extra.bin")
+
+        if len(self.content_offsets) != len(self.ids) + 1:
+            raise RuntimeError(f"Document store at {store_dir} is inconsistent; rebuild the index.")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def prefetch(self):
+        """Page the id and metadata columns in now rather than on the first queries; text stays on demand."""
+        columns = (self.ids, self.content_offsets, self.extra_offsets, self.pages, self.type_codes, self.source_codes)
+        for column in columns:
+            # Reading every element faults its pages in.
+            column.max(initial=0)
+
+    def rows_for(self, doc_ids):
+        """Row numbers for ``doc_ids``, -1 where an id is not in the store."""
+        doc_ids = np.asarray(doc_ids, dtype="int64")
+        if not len(self.ids):
+            return np.full(len(doc_ids), -1, dtype="int64")
+
+        rows = np.minimum(np.searchsorted(self.ids, doc_ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == doc_ids, rows, -1)
+
+    def row(self, row: int):
+        start, end = self.content_offsets[row], self.content_offsets[row + 1]
+        doc = {
+            "content": self._content[start:end].decode("utf-8"),
+            "page": int(self.pages[row]) if self.pages[row] != _NO_PAGE else None,
+            "type": self.types[self.type_codes[row]],
+            "source": self.sources[self.source_codes[row]],
+        }
+
+        start, end = self.extra_offsets[row], self.extra_offsets[row + 1]
+        if end > start:
+            doc.update(json.loads(self._extra[start:end]))
+
+        return doc
+
+    def get(self, doc_id):
+        (row,) = self.rows_for([doc_id])
+        return self.row(int(row)) if row >= 0 else None
+
+    def get_many(self, doc_ids):
+        return [self.row(int(row)) if row >= 0 else None for row in self.rows_for(doc_ids)]
+
+    def select(self, sources=(), types=(), page_min=None, page_max=None):
+        """Sorted ids of the rows matching every given condition.
+
+        ``sources`` match the stored source path or its file name, ``types`` the
+        chunk type; the page range is inclusive and excludes rows without a page.
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if sources:
+            wanted = set(sources)
+            codes = [
+                code for code, source in enumerate(self.sources) if source in wanted or Path(source).name in wanted
+            ]
+            mask &= np.isin(self.source_codes, codes)
+        if types:
+            wanted = set(types)
+            codes = [code for code, doc_type in enumerate(self.types) if doc_type in wanted]
+            mask &= np.isin(self.type_codes, codes)
+        if page_min is not None or page_max is not None:
+            mask &= self.pages != _NO_PAGE
+            if page_min is not None:
+                mask &= self.pages >= page_min
+            if page_max is not None:
+                mask &= self.pages <= page_max
+        return np.asarray(self.ids[mask])
+
+    def items(self):
+        for row, doc_id in enumerate(self.ids):
+            yield int(doc_id), self.row(row)
+
+    def to_dict(self):
+        return dict(self.items())
@@ -0,0 +1,241 @@
+import os
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+# How flat, ivf_flat and hnsw store each dimension: 4 bytes, or scalar-quantized to 2 (fp16) or 1 (int8).
+STORAGE_TYPES = ("float32", "fp16", "int8")
+# cosine L2-normalizes vectors and queries inside the index and ranks by inner product.
+METRICS = ("l2", "cosine")
+# Learned projection to ``reduce_dim`` dimensions applied before storage.
+REDUCTIONS = ("none", "pca", "opq")
+
+DEFAULT_PARAMS = {
+    "nlist": 1024,
+    "nprobe": 16,
+    "pq_m": 64,
+    "pq_bits": 8,
+    "m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "storage": os.getenv("INDEX_STORAGE", "float32"),
+    "metric": os.getenv("INDEX_METRIC", "cosine"),
+    "reduce": "none",
+    "reduce_dim": 256,
+}
+# What indexes built before these options were recorded in the manifest use.
+_LEGACY_SCHEME = {"storage": "float32", "metric": "l2", "reduce": "none"}
+
+_SCALAR_QUANTIZERS = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+# Vectors to learn a PCA/OPQ projection or int8 value ranges from.
+_PROJECTION_TRAIN_SAMPLE = 20000
+# OPQ trains a 256-centroid product quantizer internally.
+_OPQ_MIN_TRAIN = 256
+# FAISS's OPQ defaults (50 iterations over up to 65k vectors) take the better part of an hour at 768 dims.
+_OPQ_ITERATIONS = 10
+_OPQ_TRAIN_POINTS = 10000
+
+# FAISS warns below ~39 training points per IVF centroid.
+_MIN_POINTS_PER_CENTROID = 39
+# Upper bound on vectors buffered to train IVF variants during a streaming build.
+TRAIN_SAMPLE_MAX = int(os.getenv("INDEX_TRAIN_SAMPLE", "50000"))
+
+
+def index_config(index_type: str = DEFAULT_INDEX_TYPE, params=None):
+    """Return the full config dict recorded in the manifest for ``index_type``."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose one of: {', '.join(INDEX_TYPES)}.")
+
+    unknown = set(params or {}) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown index parameters: {', '.join(sorted(unknown))}.")
+
+    config = {"type": index_type, **DEFAULT_PARAMS, **(params or {})}
+    for name, choices in (("storage", STORAGE_TYPES), ("metric", METRICS), ("reduce", REDUCTIONS)):
+        if config[name] not in choices:
+            raise ValueError(f"Unknown {name} '{config[name]}'. Choose one of: {', '.join(choices)}.")
+    if config["reduce_dim"] < 1:
+        raise ValueError("reduce_dim must be positive.")
+    if index_type == "ivf_pq":
+        # Product quantization replaces scalar storage.
+        config["storage"] = "pq"
+    return config
+
+
+def scheme(config, name: str):
+    """``storage``, ``metric`` or ``reduce`` of ``config``, for manifests written before they were recorded."""
+    return config.get(name, _LEGACY_SCHEME[name])
+
+
+def _unwrap(index):
+    """The index doing the search, inside ``IndexIDMap`` and ``IndexPreTransform`` wrappers."""
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def _pq_subquantizers(dim: int, requested: int) -> int:
+    m = max(1, min(requested, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+
+def train_sample_size(config) -> int:
+    """Vectors to collect before creating the index: enough to train IVF, a projection or int8 ranges."""
+    needed = 0
+    if config["type"] in ("ivf_flat", "ivf_pq"):
+        needed = config["nlist"] * _MIN_POINTS_PER_CENTROID
+    if scheme(config, "reduce") != "none" or scheme(config, "storage") == "int8":
+        needed = max(needed, _PROJECTION_TRAIN_SAMPLE)
+    return min(TRAIN_SAMPLE_MAX, needed)
+
+
+def _transforms(dim: int, config, count: int):
+    """Vector transforms applied before storage, and the dimension they leave."""
+    transforms = []
+    if scheme(config, "metric") == "cosine":
+        transforms.append(faiss.NormalizationTransform(dim, 2.0))
+
+    reduce = scheme(config, "reduce")
+    if reduce == "none":
+        return transforms, dim
+
+    out_dim = config["reduce_dim"] = max(1, min(config["reduce_dim"], dim))
+    if count < (out_dim if reduce == "pca" else _OPQ_MIN_TRAIN):
+        # Too few vectors to learn the projection from; store them unreduced.
+        config["reduce"] = "none"
+        return transforms, dim
+
+    if reduce == "pca":
+        transforms.append(faiss.PCAMatrix(dim, out_dim))
+    else:
+        config["pq_m"] = _pq_subquantizers(out_dim, config["pq_m"])
+        opq = faiss.OPQMatrix(dim, config["pq_m"], out_dim)
+        opq.niter = _OPQ_ITERATIONS
+        opq.max_train_points = _OPQ_TRAIN_POINTS
+        transforms.append(opq)
+    return transforms, out_dim
+
+
+def make_index(dim: int, config, train_vectors):
+    """Create an empty, trained ``IndexIDMap2`` for ``config``.
+
+    IVF parameters and the projection are clamped to what ``train_vectors``
+    can support, and the values actually used are written back into ``config``.
+    Normalization and projection live inside the index (``IndexPreTransform``),
+    so callers add and search raw embeddings.
+    """
+    index_type = config["type"]
+    count = len(train_vectors)
+    metric = faiss.METRIC_INNER_PRODUCT if scheme(config, "metric") == "cosine" else faiss.METRIC_L2
+    quantizer_type = _SCALAR_QUANTIZERS.get(scheme(config, "storage"))
+    transforms, dim = _transforms(dim, config, count)
+
+    if index_type == "flat":
+        if quantizer_type is None:
+            base = faiss.IndexFlat(dim, metric)
+        else:
+            base = faiss.IndexScalarQuantizer(dim, quantizer_type, metric)
+    elif index_type == "hnsw":
+        if quantizer_type is None:
+            base = faiss.IndexHNSWFlat(dim, config["m"], metric)
+        else:
+            base = faiss.IndexHNSWSQ(dim, quantizer_type, config["m"], metric)
+        base.hnsw.efConstruction = config["ef_construction"]
+    else:
+        config["nlist"] = max(1, min(config["nlist"], count // _MIN_POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlat(dim, metric)
+
+        if index_type == "ivf_pq":
+            config["pq_m"] = _pq_subquantizers(dim, config["pq_m"])
+            codebook_bits = (count // _MIN_POINTS_PER_CENTROID).bit_length() - 1
+            config["pq_bits"] = max(1, min(config["pq_bits"], codebook_bits))
+            base = faiss.IndexIVFPQ(quantizer, dim, config["nlist"], config["pq_m"], config["pq_bits"], metric)
+        elif quantizer_type is None:
+            base = faiss.IndexIVFFlat(quantizer, dim, config["nlist"], metric)
+        else:
+            base = faiss.IndexIVFScalarQuantizer(quantizer, dim, config["nlist"], quantizer_type, metric)
+
+    if transforms:
+        base = faiss.IndexPreTransform(base)
+        for transform in reversed(transforms):
+            base.prepend_transform(transform)
+
+    if not base.is_trained:
+        base.train(np.ascontiguousarray(train_vectors, dtype="float32"))
+
+    index = faiss.IndexIDMap2(base)
+    apply_search_params(index, config)
+    return index
+
+
+def apply_search_params(index, config):
+    """Set query-time knobs (nprobe, efSearch) that are not stored in index.bin."""
+    if not config:
+        return index
+
+    base = _unwrap(index)
+
+    if config["type"] in ("ivf_flat", "ivf_pq"):
+        base.nprobe = config["nprobe"]
+    elif config["type"] == "hnsw":
+        base.hnsw.efSearch = config["ef_search"]
+
+    return index
+
+
+def search_parameters(index, selector):
+    """Per-query FAISS parameters restricting a search to ``selector``, keeping the index's nprobe/efSearch.
+
+    Vectors the selector rejects are skipped before their distance is
+    computed, so a narrow filter makes the search cheaper, not more expensive.
+    """
+    base = _unwrap(index)
+
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def enable_reconstruct(index, config):
+    """Let ``index.reconstruct`` look vectors up by id; IVF variants need a direct map for that."""
+    if config and config["type"] in ("ivf_flat", "ivf_pq"):
+        _unwrap(index).make_direct_map()
+    return index
+
+
+def exact_index(index, ids):
+    """A flat copy of the vectors of ``ids`` in ``index`` that scores queries exactly as ``index`` does.
+
+    Vectors are copied as stored, already normalized and projected, and the
+    copy runs queries through the same transforms before comparing them.
+    """
+    ids = np.asarray(ids, dtype="int64")
+    stored = faiss.downcast_index(index.index)
+    id_map = faiss.vector_to_array(index.id_map)
+    positions = np.flatnonzero(np.isin(id_map, ids))
+
+    base = faiss.downcast_index(stored.index) if isinstance(stored, faiss.IndexPreTransform) else stored
+    exact = faiss.IndexIDMap2(faiss.IndexFlat(base.d, base.metric_type))
+    exact.add_with_ids(base.reconstruct_batch(positions), id_map[positions])
+    if isinstance(stored, faiss.IndexPreTransform):
+        exact = faiss.IndexPreTransform(exact)
+        for position in reversed(range(stored.chain.size())):
+            exact.prepend_transform(stored.chain.at(position))
+    return exact
+
+
+def is_exhaustive(index) -> bool:
+    """Whether ``index`` compares the query with every stored vector (flat, plain or scalar-quantized)."""
+    return isinstance(_unwrap(index), faiss.IndexFlatCodes)
+
+
+def supports_remove(config) -> bool:
+    return config["type"] != "hnsw"
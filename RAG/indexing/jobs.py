@@ -0,0 +1,365 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from RAG.indexing.collection import DEFAULT_COLLECTION, collection_name, collection_raw_dir, list_pdfs
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_JOBS_PATH = Path(os.getenv("INGEST_JOBS_PATH", PROJECT_ROOT / "vectorstore" / "jobs.sqlite"))
+# Jobs run at once per process; jobs of one collection never overlap, whichever process runs them.
+JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))
+# How often idle workers look for jobs queued by other processes.
+POLL_SECONDS = float(os.getenv("INGEST_JOB_POLL_SECONDS", "2"))
+# A running job writes its progress to the queue at most this often.
+PROGRESS_SECONDS = float(os.getenv("INGEST_PROGRESS_SECONDS", "0.5"))
+
+# Stages a file is still moving through; every other stage is final for the job.
+ACTIVE_STAGES = ("queued", "parse", "caption", "embed")
+
+_default_store = None
+_default_store_lock = threading.Lock()
+_workers = []
+_workers_lock = threading.Lock()
+# One release per submission; every worker waits on it, and no worker can take another's wakeup back.
+_wake = threading.Semaphore(0)
+
+
+def _file_set_key(pdf_files) -> str:
+    """Fingerprint of the PDFs a job would ingest: names, sizes and modification times."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in pdf_files:
+        stat = os.stat(path)
+        digest.update(f"{Path(path).name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobProgress:
+    """Per-file stage and per-stage busy time of one running job; pass it as ``progress`` to ``ingest_all``."""
+
+    def __init__(self, pdf_files, flush=None):
+        self.files = {path: {"stage": "queued"} for path in pdf_files}
+        self.busy = {}
+        self.tasks = {}
+        self.chunks = 0
+        self.started = time.time()
+        self._flush = flush
+        self._flushed = 0.0
+
+    def __call__(self, path, stage, seconds=None, error=None, **details):
+        entry = self.files.setdefault(path, {"stage": "queued"})
+        if stage == "captioned":
+            entry["captioned"] = entry.get("captioned", 0) + 1
+        else:
+            entry["stage"] = stage
+            entry.update(details)
+        if error is not None:
+            entry.setdefault("errors", []).append(error)
+        if stage == "embedded":
+            self.chunks += details.get("chunks", 0)
+        for name, busy in (seconds or {}).items():
+            self.busy[name] = self.busy.get(name, 0.0) + busy
+            self.tasks[name] = self.tasks.get(name, 0) + 1
+
+        if self._flush is not None and time.perf_counter() - self._flushed >= PROGRESS_SECONDS:
+            self._flushed = time.perf_counter()
+            self._flush(self.snapshot())
+
+    def published(self):
+        """The new version is live: every embedded file is now in the index."""
+        for entry in self.files.values():
+            if entry["stage"] == "embedded":
+                entry["stage"] = "indexed"
+
+    def snapshot(self):
+        counts = {}
+        for entry in self.files.values():
+            counts[entry["stage"]] = counts.get(entry["stage"], 0) + 1
+        processed = counts.get("embedded", 0) + counts.get("indexed", 0)
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "files": self.files,
+            "counts": counts,
+            "stages": {
+                name: {"tasks": self.tasks[name], "busy_seconds": round(self.busy[name], 3)} for name in self.busy
+            },
+            "chunks": self.chunks,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(processed / elapsed, 3),
+            "chunks_per_second": round(self.chunks / elapsed, 3),
+        }
+
+
+class JobStore:
+    """Ingestion jobs in SQLite, shared by every process that uses the same file.
+
+    A job ingests one collection's PDF folder, read when the job starts.
+    Submitting the same files again while their job is queued or running
+    returns that job instead of adding another one.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Autocommit, so claiming a job can hold the write lock from its read to its update.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                options TEXT NOT NULL,
+                file_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                submissions INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                worker TEXT,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def submit(self, collection: str = DEFAULT_COLLECTION, full: bool = False, shards=None):
+        """Queue an ingest of ``collection``'s PDFs; returns ``(job, coalesced)``.
+
+        A queued job with the same options takes over the new file set, since
+        it has not read any file yet; a running one is returned only if the
+        files are unchanged since it was submitted.
+        """
+        collection = collection_name(collection)
+        if shards is not None and shards < 1:
+            raise ValueError("shards must be at least 1.")
+        raw_dir = collection_raw_dir(collection)
+        pdf_files = list_pdfs(raw_dir)
+        if not pdf_files:
+            raise ValueError(f"No PDF files found in {raw_dir}")
+
+        options = json.dumps({"full": bool(full), "shards": shards}, sort_keys=True)
+        file_key = _file_set_key(pdf_files)
+        progress = json.dumps(JobProgress(pdf_files).snapshot())
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE collection = ? AND options = ? AND "
+                "((status = 'running' AND file_key = ?) OR status = 'queued') "
+                "ORDER BY status = 'running' DESC, created_at LIMIT 1",
+                (collection, options, file_key),
+            ).fetchone()
+            if row is not None:
+                job_id = row["id"]
+                conn.execute("UPDATE jobs SET submissions = submissions + 1 WHERE id = ?", (job_id,))
+                conn.execute(
+                    "UPDATE jobs SET file_key = ?, progress = ? WHERE id = ? AND status = 'queued'",
+                    (file_key, progress, job_id),
+                )
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, collection, options, file_key, status, submissions, created_at, progress) "
+                    "VALUES (?, ?, ?, ?, 'queued', 1, ?, ?)",
+                    (job_id, collection, options, file_key, time.time(), progress),
+                )
+
+        _wake.release()
+        return self.get(job_id), row is not None
+
+    def claim(self, worker: str):
+        """Mark the oldest queued job whose collection is idle as running by ``worker``; None if there is none."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND collection NOT IN "
+                "(SELECT collection FROM jobs WHERE status = 'running') ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker = ? WHERE id = ?",
+                (time.time(), worker, row["id"]),
+            )
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: str, progress):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+
+    def finish(self, job_id: str, status: str, progress, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, progress = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(progress), json.dumps(result), error, job_id),
+            )
+
+    def requeue_orphans(self):
+        """Queue again the running jobs of processes on this host that died mid-job; returns how many."""
+        host = socket.gethostname()
+        with self._transaction() as conn:
+            orphans = [
+                row["id"]
+                for row in conn.execute("SELECT id, worker FROM jobs WHERE status = 'running'").fetchall()
+                if (row["worker"] or "").split(":")[0] == host and not _pid_alive(int(row["worker"].split(":")[1]))
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, worker = NULL WHERE id = ?",
+                [(job_id,) for job_id in orphans],
+            )
+        return len(orphans)
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def recent(self, limit: int = 20):
+        """The latest jobs, newest first, without their per-file progress."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        jobs = [_job(row) for row in rows]
+        for job in jobs:
+            job["progress"].pop("files")
+        return jobs
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _job(row):
+    return {
+        "id": row["id"],
+        "collection": row["collection"],
+        "status": row["status"],
+        "options": json.loads(row["options"]),
+        "submissions": row["submissions"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "progress": json.loads(row["progress"]),
+        "result": json.loads(row["result"]) if row["result"] is not None else None,
+        "error": row["error"],
+    }
+
+
+def get_job_store():
+    global _default_store
+
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = JobStore()
+    return _default_store
+
+
+def run_job(store: JobStore, job):
+    """Ingest ``job``'s collection, then load the published version in this process."""
+    # Parsing, table and caption dependencies load only when a job runs.
+    from RAG.retrieval.retriever import index_status, load_index
+    from scripts.ingest import ingest_all
+
+    job_id = job["id"]
+    collection = job["collection"]
+    # The folder as it is now: files may have come or gone while the job was queued.
+    pdf_files = list_pdfs(collection_raw_dir(collection))
+    progress = JobProgress(pdf_files, lambda snapshot: store.update_progress(job_id, snapshot))
+    try:
+        chunks = ingest_all(
+            collection=collection,
+            incremental=not job["options"]["full"],
+            shards=job["options"]["shards"],
+            progress=progress,
+        )
+    except Exception as exc:
+        print(f"[WARN] Ingestion job {job_id} failed: {exc}")
+        store.finish(job_id, "failed", progress.snapshot(), error=str(exc))
+        return
+
+    progress.published()
+    versions = None
+    try:
+        # Other processes pick the new version up on their next reload check.
+        load_index(force_reload=True, collection=collection)
+        versions = [shard["current_version"] for shard in index_status(collection)["shards"]]
+    except Exception as exc:
+        print(f"[WARN] Ingestion job {job_id}: loading the new version failed: {exc}")
+    store.finish(job_id, "done", progress.snapshot(), result={"chunks": chunks, "versions": versions})
+
+
+def _work(store: JobStore):
+    worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    while True:
+        try:
+            job = store.claim(worker)
+        except sqlite3.Error as exc:
+            print(f"[WARN] Ingestion queue unavailable: {exc}")
+            job = None
+        if job is None:
+            _wake.acquire(timeout=POLL_SECONDS)
+            continue
+        try:
+            run_job(store, job)
+        except Exception as exc:
+            print(f"[WARN] Ingestion job {job['id']} failed: {exc}")
+            store.finish(job["id"], "failed", job["progress"], error=str(exc))
+
+
+def start_workers(workers: int = JOB_WORKERS):
+    """Start this process's job workers once; jobs left running by a dead process are queued again."""
+    with _workers_lock:
+        if _workers or workers < 1:
+            return
+        store = get_job_store()
+        requeued = store.requeue_orphans()
+        if requeued:
+            print(f"[WARN] Requeued {requeued} ingestion job(s) of a process that stopped.")
+        for number in range(workers):
+            thread = threading.Thread(target=_work, args=(store,), name=f"ingest-{number}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+
+def submit_job(collection: str = DEFAULT_COLLECTION, full: bool = False, shards=None):
+    return get_job_store().submit(collection, full, shards)
+
+
+def job_status(job_id: str):
+    return get_job_store().get(job_id)
+
+
+def recent_jobs(limit: int = 20):
+    return get_job_store().recent(limit)
@@ -0,0 +1,227 @@
+import json
+import re
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from RAG.indexing.atomic import atomic_write
+
+LEXICAL_DIR = "lexical"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+# Keeps identifiers such as "AB-1234", "v2.1" or "10/2024" whole; their parts are indexed too.
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+PART_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(PART_PATTERN.findall(token))
+    return tokens
+
+
+class LexicalWriter:
+    """Build BM25 postings one doc at a time; only compact integer arrays are kept in memory."""
+
+    def __init__(self, path):
+        self.index_dir = Path(path)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.vocab = {}
+        self._ids = array("q")
+        self._lengths = array("i")
+        self._term_ids = array("i")
+        self._rows = array("i")
+        self._tfs = array("f")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, doc_id, content: str):
+        row = len(self._ids)
+        counts = {}
+        tokens = tokenize(content)
+        for token in tokens:
+            term_id = self.vocab.setdefault(token, len(self.vocab))
+            counts[term_id] = counts.get(term_id, 0) + 1
+
+        self._ids.append(int(doc_id))
+        self._lengths.append(len(tokens))
+        self._term_ids.extend(counts)
+        self._tfs.extend(counts.values())
+        self._rows.extend([row] * len(counts))
+
+    def close(self):
+        """Save the postings CSR-style.
+
+        ``offsets[t]:offsets[t + 1]`` slices ``postings_rows``/``postings_tf``
+        for term ``t``; rows index ``ids.npy``.
+        """
+        term_ids = np.frombuffer(self._term_ids, dtype="int32")
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(self.vocab) + 1, dtype="int64")
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=offsets[1:])
+
+        for name, values in (
+            ("ids", np.frombuffer(self._ids, dtype="int64")),
+            ("lengths", np.frombuffer(self._lengths, dtype="int32")),
+            ("offsets", offsets),
+            ("postings_rows", np.frombuffer(self._rows, dtype="int32")[order]),
+            ("postings_tf", np.frombuffer(self._tfs, dtype="float32")[order]),
+        ):
+            atomic_write(self.index_dir / f"{name}.npy", lambda f, values=values: np.save(f, values))
+        atomic_write(self.index_dir / "vocab.json", lambda f: f.write(json.dumps(list(self.vocab)).encode("utf-8")))
+
+    def abort(self):
+        """Drop the buffered postings without writing anything."""
+        self.vocab = {}
+        for name in ("_ids", "_lengths", "_term_ids", "_rows", "_tfs"):
+            setattr(self, name, array(getattr(self, name).typecode))
+
+
+def write_lexical_index(path, docs):
+    """Build BM25 postings for ``docs`` (FAISS id -> doc dict) and save them under ``path``."""
+    writer = LexicalWriter(path)
+    for doc_id, doc in docs.items():
+        writer.add(doc_id, doc.get("content", ""))
+    writer.close()
+
+
+def lexical_index_exists(path) -> bool:
+    return (Path(path) / "vocab.json").exists()
+
+
+class LexicalIndex:
+    """Memory-mapped BM25 index written by ``write_lexical_index``."""
+
+    def __init__(self, path):
+        index_dir = Path(path)
+        terms = json.loads((index_dir / "vocab.json").read_text(encoding="utf-8"))
+        self.vocab = {term: term_id for term_id, term in enumerate(terms)}
+        self.ids = np.load(index_dir / "ids.npy", mmap_mode="r")
+        self.lengths = np.load(index_dir / "lengths.npy")
+        self.offsets = np.load(index_dir / "offsets.npy", mmap_mode="r")
+        self.postings_rows = np.load(index_dir / "postings_rows.npy", mmap_mode="r")
+        self.postings_tf = np.load(index_dir / "postings_tf.npy", mmap_mode="r")
+        self.avg_length = float(self.lengths.mean()) if len(self.lengths) else 0.0
+        self._norm = self._length_norm(self.avg_length)
+        # Length norm for the last corpus searched with; shards searched together share one.
+        self._corpus_norm = (self.avg_length, self._norm)
+
+    def _length_norm(self, avg_length: float):
+        return BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / max(avg_length, 1e-9))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def document_frequencies(self, terms):
+        """Chunks containing each of ``terms``; unknown terms are left out."""
+        found = {}
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is not None:
+                found[term] = int(self.offsets[term_id + 1] - self.offsets[term_id])
+        return found
+
+    def idf(self, terms):
+        """BM25 idf of each of ``terms`` found in the corpus; unknown terms are left out."""
+        total = len(self.ids)
+        return {term: bm25_idf(df, total) for term, df in self.document_frequencies(terms).items()}
+
+    def row_mask(self, doc_ids):
+        """Boolean mask over rows whose chunk id is in the sorted array ``doc_ids``."""
+        doc_ids = np.asarray(doc_ids, dtype="int64")
+        if not len(doc_ids):
+            return np.zeros(len(self.ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(doc_ids, self.ids), len(doc_ids) - 1)
+        return doc_ids[positions] == self.ids
+
+    def search(self, query: str, k: int, allowed=None, corpus=None):
+        """Return ``(chunk ids, scores)`` of the ``k`` best BM25 matches, best first.
+
+        ``allowed`` (see ``row_mask``) limits the search to those rows; postings
+        of other rows are skipped rather than scored. ``corpus`` (a
+        ``CorpusStats``) scores with the statistics of several indexes searched
+        together instead of this one's, so their scores can be compared.
+        """
+        term_ids = {token: self.vocab[token] for token in set(tokenize(query)) if token in self.vocab}
+        if not term_ids or not len(self.ids):
+            return np.empty(0, dtype="int64"), np.empty(0, dtype="float32")
+
+        scores = np.zeros(len(self.ids), dtype="float32")
+        total = len(self.ids) if corpus is None else corpus.total
+        norm = self._norm
+        if corpus is not None:
+            avg_length, norm = self._corpus_norm
+            if avg_length != corpus.avg_length:
+                norm = self._length_norm(corpus.avg_length)
+                self._corpus_norm = (corpus.avg_length, norm)
+
+        for term, term_id in term_ids.items():
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.postings_rows[start:end]
+            tf = self.postings_tf[start:end]
+            df = len(rows) if corpus is None else corpus.document_frequencies[term]
+            idf = bm25_idf(df, total)
+            if allowed is not None:
+                keep = allowed[rows]
+                rows, tf = rows[keep], tf[keep]
+            scores[rows] += idf * tf * (BM25_K1 + 1) / (tf + norm[rows])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return np.asarray(self.ids[candidates]), scores[candidates]
+
+
+def bm25_idf(df: int, total: int) -> float:
+    return float(np.log(1 + (total - df + 0.5) / (df + 0.5)))
+
+
+class CorpusStats:
+    """BM25 statistics of several lexical indexes taken together, for the terms of one query.
+
+    Each shard of a collection scores with these rather than its own, so a
+    chunk gets the same score as it would in one unsharded index.
+    """
+
+    def __init__(self, lexicals, query: str):
+        terms = set(tokenize(query))
+        self.total = sum(len(lexical) for lexical in lexicals)
+        self.avg_length = sum(lexical.avg_length * len(lexical) for lexical in lexicals) / max(self.total, 1)
+        self.document_frequencies = {}
+        for lexical in lexicals:
+            for term, df in lexical.document_frequencies(terms).items():
+                self.document_frequencies[term] = self.document_frequencies.get(term, 0) + df
+
+    def idf(self, terms):
+        """Like ``LexicalIndex.idf``, for terms of the query these statistics were taken for."""
+        return {
+            term: bm25_idf(self.document_frequencies[term], self.total)
+            for term in terms
+            if term in self.document_frequencies
+        }
+
+
+def fused_scores(rankings, k: int, rrf_k: int = RRF_K):
+    """``reciprocal_rank_fusion`` with the fused scores: ``(ids, scores)``, best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (rrf_k + rank)
+
+    ids = sorted(fused, key=fused.get, reverse=True)[:k]
+    return ids, [fused[doc_id] for doc_id in ids]
+
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = RRF_K):
+    """Fuse ranked id lists; each id scores sum(1 / (rrf_k + rank)) over the lists it appears in."""
+    return fused_scores(rankings, k, rrf_k)[0]
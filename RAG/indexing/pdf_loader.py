@@ -1,18 +1,26 @@
 import fitz
 
+TEXT_BLOCK = 0
 
-def load_pdf(path: str):
+
+def load_pdf(path: str, blocks: bool = False):
+    """One dict per page with its ``text``.
+
+    With ``blocks`` each page also carries ``blocks``: ``(text, bbox)`` for
+    every text block in reading order, and ``text`` is built from them.
+    """
     pages = []
 
     with fitz.open(path) as doc:
         for i, page in enumerate(doc):
-            pages.append(
-                {
-                    "page": i,
-                    "text": page.get_text(),
-                    "source": path,
-                }
-            )
+            entry = {"page": i, "source": path}
+            if blocks:
+                entry["blocks"] = [
+                    (block[4], block[:4]) for block in page.get_text("blocks") if block[6] == TEXT_BLOCK
+                ]
+                entry["text"] = "\n".join(text for text, _ in entry["blocks"])
+            else:
+                entry["text"] = page.get_text()
+            pages.append(entry)
 
     return pages
-
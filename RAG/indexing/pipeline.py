@@ -0,0 +1,284 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from RAG.indexing.build_index import embed_source, file_digest
+from RAG.indexing.chunker import DEFAULT_CHUNK_MODE, chunk_pages
+from RAG.indexing.image_extractor import extract_images
+from RAG.indexing.pdf_loader import load_pdf
+from RAG.indexing.table_extractor import TABLE_WORKERS, extract_tables_with_stats
+from RAG.multimodel.caption_pipeline import Captioner
+from RAG.multimodel.table_parser import table_to_text
+from RAG.tracing import INGEST_SIZES, INGEST_STAGE_SECONDS, record, record_size
+
+DEFAULT_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_CAPTION_WORKERS = int(os.getenv("INGEST_CAPTION_WORKERS", "2"))
+DEFAULT_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "2"))
+# Files parsed but not yet handed to the index; bounds ingestion memory.
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", str(2 * DEFAULT_PARSE_WORKERS)))
+
+STAGES = ("hash", "text", "tables", "images", "caption", "embed")
+
+
+def parse_pdf(pdf_path: str, table_workers: int = TABLE_WORKERS):
+    """CPU-bound part of ingesting one PDF: hash, text chunks, tables and image files.
+
+    Runs in a worker process, so it only returns plain, picklable data.
+    ``table_workers`` processes run camelot; the pipeline passes 1, since its
+    parse pool already spreads files over the CPUs.
+    """
+    timings = {}
+    warnings = []
+
+    started = time.perf_counter()
+    file_hash = file_digest(pdf_path)
+    timings["hash"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    text_docs = chunk_pages(load_pdf(pdf_path, blocks=DEFAULT_CHUNK_MODE == "layout"), DEFAULT_CHUNK_MODE)
+    timings["text"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table_docs = []
+    table_pages = None
+    try:
+        tables, table_pages = extract_tables_with_stats(pdf_path, file_hash, workers=table_workers)
+        for table in tables:
+            table_docs.append(
+                {
+                    "content": table_to_text(table["table"]),
+                    "type": "table",
+                    "page": table["page"],
+                    "source": table.get("source", pdf_path),
+                }
+            )
+    except Exception as exc:
+        warnings.append(f"Table extraction failed: {exc}")
+    timings["tables"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    images = []
+    try:
+        images = extract_images(pdf_path)
+    except Exception as exc:
+        warnings.append(f"Image extraction failed: {exc}")
+    timings["images"] = time.perf_counter() - started
+
+    return {
+        "path": pdf_path,
+        "hash": file_hash,
+        "text_docs": text_docs,
+        "table_docs": table_docs,
+        "images": images,
+        "table_pages": table_pages,
+        "timings": timings,
+        "warnings": warnings,
+    }
+
+
+def table_pages_summary(stats) -> str:
+    return (
+        f"camelot ran on {stats['parsed']} of {stats['pages']} pages "
+        f"({stats['candidates']} passed the screen, {stats['cached']} cached)"
+    )
+
+
+def image_doc(image, caption: str, pdf_path: str):
+    return {
+        "content": caption,
+        "type": "image",
+        "page": image["page"],
+        "source": image.get("source", pdf_path),
+        "image_path": image["image_path"],
+    }
+
+
+def _no_progress(path, stage, **details):
+    pass
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class StageTimer:
+    """Per-stage task counts and busy seconds, summed across workers."""
+
+    def __init__(self):
+        self.tasks = dict.fromkeys(STAGES, 0)
+        self.busy = dict.fromkeys(STAGES, 0.0)
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        self.tasks[stage] += 1
+        self.busy[stage] += seconds
+        record(stage, seconds, INGEST_STAGE_SECONDS)
+
+    def report(self, files: int):
+        wall = time.perf_counter() - self.started
+        print(f"\n{'stage':<10}{'tasks':>8}{'busy s':>10}{'avg ms':>10}")
+        for stage in STAGES:
+            tasks = self.tasks[stage]
+            avg_ms = self.busy[stage] / tasks * 1000 if tasks else 0.0
+            print(f"{stage:<10}{tasks:>8}{self.busy[stage]:>10.2f}{avg_ms:>10.1f}")
+        rate = files / wall if wall else 0.0
+        print(f"{'wall':<10}{files:>8}{wall:>10.2f}  ({rate:.2f} PDFs/s)")
+
+
+def iter_pipeline(
+    pdf_files,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
+    caption_workers: int = DEFAULT_CAPTION_WORKERS,
+    embed_workers: int = DEFAULT_EMBED_WORKERS,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    progress=None,
+):
+    """Ingest ``pdf_files`` with parsing, captioning and embedding overlapped.
+
+    Parsing runs on a process pool; captioning and embedding run on thread
+    pools. A file moves to the next stage as soon as its previous stage is
+    done, so throughput approaches that of the slowest stage. Images go
+    through one ``Captioner`` shared by all files, so an image repeated
+    across PDFs is captioned once; skipped images get no chunk.
+
+    Yields ``(path, file hash, embedded)`` per file as soon as it is embedded,
+    the shape ``stream_update`` consumes. At most ``max_in_flight`` files are
+    between parsing and being yielded, which bounds memory however many files
+    there are. Files that fail to parse or embed are reported and left out.
+
+    ``progress``, if given, is called as ``progress(path, stage, **details)``
+    each time a file moves: to ``parse``, ``caption`` (with its chunk, table
+    and image counts), ``embed``, ``embedded`` (with its chunk count) or
+    ``failed`` (with the ``error``), and once per ``captioned`` image. Events
+    that finish work carry the busy ``seconds`` per stage.
+    """
+    progress = progress or _no_progress
+    timer = StageTimer()
+    table_pages = {"pages": 0, "candidates": 0, "cached": 0, "parsed": 0}
+    captioner = Captioner()
+    queue = iter(pdf_files)
+    files = {}
+    pending = {}
+    in_flight = 0
+
+    def submit_parse(pool):
+        nonlocal in_flight
+        for pdf_path in queue:
+            pending[pool.submit(parse_pdf, pdf_path, 1)] = ("parse", pdf_path, None)
+            progress(pdf_path, "parse")
+            in_flight += 1
+            if in_flight >= max_in_flight:
+                return
+
+    def finish(pool, pdf_path):
+        nonlocal in_flight
+        files.pop(pdf_path, None)
+        in_flight -= 1
+        submit_parse(pool)
+
+    def submit_embed(pool, pdf_path):
+        state = files[pdf_path]
+        parsed = state["parsed"]
+        docs = parsed["text_docs"] + parsed["table_docs"]
+        docs += [doc for doc in state["image_docs"] if doc is not None]
+        future = pool.submit(_timed, embed_source, pdf_path, parsed["hash"], docs)
+        pending[future] = ("embed", pdf_path, None)
+        progress(pdf_path, "embed")
+
+    # Spawned, not forked: ingestion jobs run this from a worker thread of the API or UI process,
+    # and a fork of a threaded process can inherit locks held by its other threads.
+    with ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as parse_pool, ThreadPoolExecutor(
+        max_workers=caption_workers
+    ) as caption_pool, ThreadPoolExecutor(max_workers=embed_workers) as embed_pool:
+        submit_parse(parse_pool)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, pdf_path, position = pending.pop(future)
+
+                if stage == "parse":
+                    try:
+                        parsed = future.result()
+                    except Exception as exc:
+                        print(f"  [WARN] {pdf_path}: parsing failed: {exc}")
+                        progress(pdf_path, "failed", error=f"parsing failed: {exc}")
+                        finish(parse_pool, pdf_path)
+                        continue
+
+                    for name, seconds in parsed["timings"].items():
+                        timer.add(name, seconds)
+                    for warning in parsed["warnings"]:
+                        print(f"  [WARN] {pdf_path}: {warning}")
+                    record_size("text_chunks", len(parsed["text_docs"]), INGEST_SIZES)
+                    record_size("tables", len(parsed["table_docs"]), INGEST_SIZES)
+                    record_size("images", len(parsed["images"]), INGEST_SIZES)
+                    print(
+                        f"  [OK] {pdf_path}: {len(parsed['text_docs'])} text chunks, "
+                        f"{len(parsed['table_docs'])} tables, {len(parsed['images'])} images"
+                    )
+                    if parsed["table_pages"] is not None:
+                        record_size("table_parsed_pages", parsed["table_pages"]["parsed"], INGEST_SIZES)
+                        for name, count in parsed["table_pages"].items():
+                            table_pages[name] += count
+
+                    images = parsed["images"]
+                    progress(
+                        pdf_path,
+                        "caption",
+                        text_chunks=len(parsed["text_docs"]),
+                        tables=len(parsed["table_docs"]),
+                        images=len(images),
+                        seconds=parsed["timings"],
+                    )
+                    files[pdf_path] = {
+                        "parsed": parsed,
+                        "image_docs": [None] * len(images),
+                        "captions_left": len(images),
+                    }
+                    for index, image in enumerate(images):
+                        caption_future = caption_pool.submit(_timed, captioner.caption, image["image_path"])
+                        pending[caption_future] = ("caption", pdf_path, index)
+                    if not images:
+                        submit_embed(embed_pool, pdf_path)
+
+                elif stage == "caption":
+                    state = files[pdf_path]
+                    image = state["parsed"]["images"][position]
+                    try:
+                        caption, seconds = future.result()
+                        timer.add("caption", seconds)
+                        progress(pdf_path, "captioned", seconds={"caption": seconds})
+                        if caption is not None:
+                            state["image_docs"][position] = image_doc(image, caption, pdf_path)
+                    except Exception as exc:
+                        print(f"  [WARN] {pdf_path}: captioning {image['image_path']} failed: {exc}")
+                        progress(pdf_path, "captioned", error=f"captioning {image['image_path']} failed: {exc}")
+
+                    state["captions_left"] -= 1
+                    if state["captions_left"] == 0:
+                        submit_embed(embed_pool, pdf_path)
+
+                else:
+                    file_hash = files[pdf_path]["parsed"]["hash"]
+                    finish(parse_pool, pdf_path)
+                    try:
+                        result, seconds = future.result()
+                    except Exception as exc:
+                        print(f"  [WARN] {pdf_path}: embedding failed: {exc}")
+                        progress(pdf_path, "failed", error=f"embedding failed: {exc}")
+                        continue
+
+                    timer.add("embed", seconds)
+                    progress(pdf_path, "embedded", chunks=len(result[0]), seconds={"embed": seconds})
+                    yield pdf_path, file_hash, result
+
+    timer.report(len(pdf_files))
+    print(f"Tables: {table_pages_summary(table_pages)}.")
+    print(captioner.report())
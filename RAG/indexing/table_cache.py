@@ -0,0 +1,52 @@
+import json
+import os
+from pathlib import Path
+
+from RAG.sqlite_cache import SharedCache, SQLiteCache
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_PATH = Path(os.getenv("TABLE_CACHE_PATH", PROJECT_ROOT / "vectorstore" / "cache" / "tables.sqlite"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("TABLE_CACHE_MAX_ENTRIES", "200000"))
+CACHE_ENABLED = os.getenv("TABLE_CACHE", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def _encode(tables) -> str:
+    return json.dumps([{"columns": list(df.columns), "rows": df.values.tolist()} for df in tables], default=str)
+
+
+def _decode(blob: str):
+    # pandas is only needed once cached tables are actually read.
+    import pandas as pd
+
+    return [pd.DataFrame(table["rows"], columns=table["columns"]) for table in json.loads(blob)]
+
+
+class TableCache(SQLiteCache):
+    """Disk-backed tables extracted from one PDF page, keyed by (file hash, page), evicted LRU.
+
+    Pages that held no table are stored too (as an empty list), so they are
+    not parsed again either.
+    """
+
+    TABLE = "tables"
+    COLUMNS = {"file_hash": "TEXT NOT NULL", "page": "INTEGER NOT NULL", "tables": "TEXT NOT NULL"}
+    KEY = ("file_hash", "page")
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path, max_entries)
+
+    def get_many(self, file_hash: str, pages):
+        """Return ``{page: [DataFrame, ...]}`` for the ``pages`` that are cached."""
+        found = self._get_many((file_hash,), pages, ("tables",))
+        return {page: _decode(blob) for page, (blob,) in found.items()}
+
+    def put_many(self, file_hash: str, tables_by_page):
+        self._put_many((file_hash, int(page), _encode(tables)) for page, tables in tables_by_page.items())
+
+
+_shared = SharedCache(TableCache, CACHE_ENABLED)
+
+
+def get_table_cache():
+    """Return the shared on-disk table cache, or None when disabled with TABLE_CACHE=0."""
+    return _shared.get()
@@ -1,26 +1,128 @@
-def extract_tables(pdf_path: str):
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import fitz
+
+from RAG.indexing.table_cache import get_table_cache
+
+# Screen pages with PyMuPDF and run camelot only where a ruled table may be.
+TABLE_SCREEN = os.getenv("TABLE_SCREEN", "1").lower() not in {"0", "false", "no", "off"}
+# Processes camelot is spread over for one PDF parsed on its own; the ingestion pipeline runs it in one.
+TABLE_WORKERS = int(os.getenv("TABLE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Horizontal and vertical rulings a page needs before find_tables looks at it.
+MIN_RULINGS = 2
+# Shorter segments are glyph decorations, not table borders.
+_MIN_RULING_LENGTH = 10
+# Thinner rectangles are drawn lines.
+_MAX_LINE_WIDTH = 2
+
+
+def _camelot():
     try:
         import camelot
     except ImportError as exc:
         raise RuntimeError(
             "camelot-py is not installed. Install dependencies from requirements.txt."
         ) from exc
+    return camelot
+
+
+def _rulings(page):
+    """Count the horizontal and vertical line segments drawn on ``page``."""
+    horizontal = vertical = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l":
+                width, height = abs(item[2].x - item[1].x), abs(item[2].y - item[1].y)
+            elif item[0] == "re":
+                width, height = item[1].width, item[1].height
+                if width > _MAX_LINE_WIDTH and height > _MAX_LINE_WIDTH:
+                    # A box: two rulings each way.
+                    horizontal += 2 * (width >= _MIN_RULING_LENGTH)
+                    vertical += 2 * (height >= _MIN_RULING_LENGTH)
+                    continue
+            else:
+                continue
+
+            if height <= _MAX_LINE_WIDTH and width >= _MIN_RULING_LENGTH:
+                horizontal += 1
+            elif width <= _MAX_LINE_WIDTH and height >= _MIN_RULING_LENGTH:
+                vertical += 1
+    return horizontal, vertical
+
+
+def screen_pages(pdf_path: str):
+    """0-based pages that may hold a ruled table; returns ``(candidates, page count)``.
+
+    camelot's default lattice flavor finds tables from their ruling lines, so
+    pages without rulings both ways are skipped outright, and the rest only
+    when PyMuPDF's line-based ``find_tables`` finds no table either.
+    """
+    candidates = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            horizontal, vertical = _rulings(page)
+            if horizontal < MIN_RULINGS or vertical < MIN_RULINGS:
+                continue
+            if page.find_tables(strategy="lines").tables:
+                candidates.append(page.number)
+        return candidates, doc.page_count
+
+
+def _page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def _camelot_pages(pdf_path: str, pages):
+    """Run camelot on ``pages`` (0-based); returns ``{page: [DataFrame, ...]}`` including empty pages."""
+    found = {page: [] for page in pages}
+    for table in _camelot().read_pdf(pdf_path, pages=",".join(str(page + 1) for page in pages)):
+        found[int(table.page) - 1].append(table.df)
+    return found
+
+
+def _parse_pages(pdf_path: str, pages, workers: int):
+    groups = [pages[start::workers] for start in range(min(workers, len(pages)))]
+    if len(groups) <= 1:
+        return _camelot_pages(pdf_path, pages)
+
+    found = {}
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        for result in pool.map(_camelot_pages, repeat(pdf_path), groups):
+            found.update(result)
+    return found
+
+
+def extract_tables_with_stats(pdf_path: str, file_hash=None, workers: int = TABLE_WORKERS, screen: bool = TABLE_SCREEN):
+    """``extract_tables`` plus page counts: ``{"pages", "candidates", "cached", "parsed"}``.
 
-    tables = camelot.read_pdf(pdf_path, pages="all")
-    results = []
+    Only candidate pages (see ``screen_pages``) are handed to camelot, split
+    across ``workers`` processes. With a ``file_hash`` each page's tables are
+    cached, so re-ingesting the same file parses nothing again.
+    """
+    _camelot()
+    if screen:
+        pages, page_count = screen_pages(pdf_path)
+    else:
+        page_count = _page_count(pdf_path)
+        pages = list(range(page_count))
 
-    for table in tables:
-        page = table.page
-        if isinstance(page, str) and page.isdigit():
-            page = int(page) - 1
+    cache = get_table_cache() if file_hash else None
+    found = cache.get_many(file_hash, pages) if cache is not None else {}
+    missing = [page for page in pages if page not in found]
+    if missing:
+        parsed = _parse_pages(pdf_path, missing, max(1, workers))
+        if cache is not None:
+            cache.put_many(file_hash, parsed)
+        found.update(parsed)
 
-        results.append(
-            {
-                "page": page,
-                "table": table.df,
-                "source": pdf_path,
-            }
-        )
+    tables = [{"page": page, "table": df, "source": pdf_path} for page in sorted(found) for df in found[page]]
+    stats = {"pages": page_count, "candidates": len(pages), "cached": len(pages) - len(missing), "parsed": len(missing)}
+    return tables, stats
 
-    return results
 
+def extract_tables(pdf_path: str, file_hash=None):
+    """Tables in ``pdf_path`` as ``{"page" (0-based), "table" (DataFrame), "source"}``."""
+    return extract_tables_with_stats(pdf_path, file_hash)[0]
@@ -0,0 +1,99 @@
+import os
+import re
+import shutil
+from pathlib import Path
+
+from RAG.indexing.atomic import atomic_write
+
+# Names the published version, e.g. "v12". Replaced atomically, so readers never see a half-written index.
+CURRENT_FILE = "CURRENT"
+# Published versions kept on disk, including the current one; older ones are deleted on publish.
+KEEP_VERSIONS = max(1, int(os.getenv("INDEX_KEEP_VERSIONS", "3")))
+
+_VERSION_NAME = re.compile(r"^v(\d+)$")
+# Files of an index written before versioning, directly under the index directory.
+_LEGACY_ENTRIES = ("index.bin", "meta.pkl", "manifest.json", "docstore", "lexical")
+
+
+def current_version(root):
+    """Name of the published version under ``root``, or None when nothing has been published."""
+    try:
+        name = (Path(root) / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def version_dir(root, version=None) -> Path:
+    """Directory holding ``version`` (default: the current one).
+
+    Indexes built before versioning live in ``root`` itself and are read from there.
+    """
+    version = version or current_version(root)
+    return Path(root) / version if version else Path(root)
+
+
+def _versions(root):
+    numbered = []
+    for path in Path(root).iterdir():
+        match = _VERSION_NAME.match(path.name)
+        if match and path.is_dir():
+            numbered.append((int(match.group(1)), path))
+    return sorted(numbered)
+
+
+def new_version_dir(root) -> Path:
+    """Create and return an empty directory for the next version."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    versions = _versions(root)
+    number = versions[-1][0] + 1 if versions else 1
+    while True:
+        path = root / f"v{number}"
+        try:
+            path.mkdir()
+            return path
+        except FileExistsError:
+            # Another writer took this number.
+            number += 1
+
+
+def publish(root, path):
+    """Point ``CURRENT`` at the version in ``path``, then prune versions older than the kept ones."""
+    root = Path(root)
+    atomic_write(root / CURRENT_FILE, lambda f: f.write(Path(path).name.encode("utf-8")))
+
+    # Only versions older than the published one are pruned; newer ones may still be being written.
+    # Processes that have an older version loaded keep reading it: their open files and maps outlive the unlink.
+    published = int(_VERSION_NAME.match(Path(path).name).group(1))
+    older = [old for number, old in _versions(root) if number < published]
+    for old in older[: max(0, len(older) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(old, ignore_errors=True)
+
+    _remove_legacy(root)
+
+
+def remove_versions(root):
+    """Delete ``CURRENT`` and every version under ``root``, once its index has moved elsewhere (into shards)."""
+    root = Path(root)
+    if not root.is_dir():
+        return
+    # Unpublish first, so no reader picks up a version while it is being deleted.
+    (root / CURRENT_FILE).unlink(missing_ok=True)
+    for _, path in _versions(root):
+        shutil.rmtree(path, ignore_errors=True)
+    _remove_legacy(root)
+
+
+def _remove_legacy(root: Path):
+    for name in _LEGACY_ENTRIES:
+        legacy = root / name
+        if legacy.is_dir():
+            shutil.rmtree(legacy, ignore_errors=True)
+        elif legacy.exists():
+            legacy.unlink()
+
+
+def discard(path):
+    """Delete an unpublished version after a failed build."""
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from RAG.sqlite_cache import SharedCache, SQLiteCache
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_PATH = Path(os.getenv("CAPTION_CACHE_PATH", PROJECT_ROOT / "vectorstore" / "cache" / "captions.sqlite"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("CAPTION_CACHE_MAX_ENTRIES", "100000"))
+CACHE_ENABLED = os.getenv("CAPTION_CACHE", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def _signed(phash: int) -> int:
+    # SQLite integers are signed 64-bit.
+    return int(np.array(phash, dtype="uint64").view("int64"))
+
+
+class CaptionCache(SQLiteCache):
+    """Disk-backed captions keyed by (model, prompt, image content hash), evicted LRU.
+
+    Perceptual hashes are stored alongside so a re-encoded or resized copy of
+    an image already captioned can be matched with ``find_similar``.
+    """
+
+    TABLE = "captions"
+    COLUMNS = {
+        "model": "TEXT NOT NULL",
+        "prompt": "TEXT NOT NULL",
+        "key": "TEXT NOT NULL",
+        "phash": "INTEGER",
+        "caption": "TEXT NOT NULL",
+    }
+    KEY = ("model", "prompt", "key")
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path, max_entries)
+        self._phashes = {}
+
+    def get(self, model: str, prompt: str, key: str):
+        found = self._get_many((model, prompt), [key], ("caption",))
+        return found[key][0] if found else None
+
+    def _load_phashes(self, model: str, prompt: str):
+        loaded = self._phashes.get((model, prompt))
+        if loaded is None:
+            rows = self._conn.execute(
+                "SELECT key, phash FROM captions WHERE model = ? AND prompt = ? AND phash IS NOT NULL",
+                (model, prompt),
+            ).fetchall()
+            keys = [key for key, _ in rows]
+            hashes = np.array([phash for _, phash in rows], dtype="int64").view("uint64")
+            loaded = self._phashes[(model, prompt)] = (keys, hashes)
+        return loaded
+
+    def find_similar(self, model: str, prompt: str, phash: int, max_distance: int):
+        """Return the caption of a stored image within ``max_distance`` bits of ``phash``, if any."""
+        with self._lock:
+            keys, hashes = self._load_phashes(model, prompt)
+            if not keys:
+                return None
+
+            distances = np.bitwise_count(hashes ^ np.uint64(phash))
+            best = int(np.argmin(distances))
+            if distances[best] > max_distance:
+                return None
+            key = keys[best]
+
+        return self.get(model, prompt, key)
+
+    def put(self, model: str, prompt: str, key: str, caption: str, phash=None):
+        added = self._put_many([(model, prompt, key, None if phash is None else _signed(phash), caption)])
+        with self._lock:
+            loaded = self._phashes.get((model, prompt))
+            if loaded is None:
+                return
+            if not added:
+                # The stored perceptual hash may have changed.
+                self._phashes.pop((model, prompt))
+            elif phash is not None:
+                keys, hashes = loaded
+                self._phashes[(model, prompt)] = (keys + [key], np.append(hashes, np.uint64(phash)))
+
+    def _evict(self) -> int:
+        deleted = super()._evict()
+        if deleted:
+            # Loaded again from what is left on the next find_similar.
+            self._phashes.clear()
+        return deleted
+
+
+_shared = SharedCache(CaptionCache, CACHE_ENABLED)
+
+
+def get_caption_cache():
+    """Return the shared on-disk caption cache, or None when disabled with CAPTION_CACHE=0."""
+    return _shared.get()
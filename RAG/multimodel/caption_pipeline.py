@@ -0,0 +1,187 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+from RAG.multimodel.caption_cache import get_caption_cache
+from RAG.multimodel.image_captioner import DEFAULT_MODEL, DEFAULT_PROMPT, caption_image_bytes
+
+# Images with a side below this many pixels (icons, bullets, rules) are not captioned.
+CAPTION_MIN_SIDE = int(os.getenv("CAPTION_MIN_SIDE", "48"))
+# Grayscale histogram entropy in bits; blank fills and flat backgrounds score close to 0.
+CAPTION_MIN_ENTROPY = float(os.getenv("CAPTION_MIN_ENTROPY", "1.0"))
+# Larger images are scaled down to this longest side and re-encoded as JPEG before upload.
+CAPTION_MAX_SIDE = int(os.getenv("CAPTION_MAX_SIDE", "1024"))
+# Perceptual hashes within this many bits of each other are treated as the same image.
+CAPTION_PHASH_DISTANCE = int(os.getenv("CAPTION_PHASH_DISTANCE", "4"))
+
+COUNTERS = ("images", "skipped", "duplicates", "cached", "captioned", "failed")
+
+
+def _rgb(pixmap):
+    if pixmap.alpha:
+        pixmap = fitz.Pixmap(pixmap, 0)
+    if pixmap.colorspace is None or pixmap.colorspace.n != 3:
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    return pixmap
+
+
+def _gray_array(pixmap, width: int, height: int):
+    small = fitz.Pixmap(fitz.csGRAY, fitz.Pixmap(pixmap, width, height, None))
+    return np.frombuffer(small.samples, dtype="uint8").reshape(small.height, small.stride)[:, : small.width]
+
+
+def _dhash(pixmap) -> int:
+    """64-bit difference hash: is each pixel of a 9x8 grayscale thumbnail brighter than its right neighbour."""
+    pixels = _gray_array(pixmap, 9, 8).astype("int16")
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _entropy(pixmap) -> float:
+    scale = min(1.0, 256 / max(pixmap.width, pixmap.height))
+    pixels = _gray_array(pixmap, max(1, int(pixmap.width * scale)), max(1, int(pixmap.height * scale)))
+    counts = np.bincount(pixels.ravel(), minlength=256)
+    probabilities = counts[counts > 0] / pixels.size
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def inspect_image(data: bytes):
+    """Hash and measure an image. ``skip`` holds a reason when it is not worth captioning.
+
+    Images PyMuPDF cannot decode are still captioned from their original bytes.
+    """
+    info = {"key": hashlib.sha256(data).hexdigest(), "phash": None, "pixmap": None, "skip": None}
+
+    try:
+        pixmap = _rgb(fitz.Pixmap(data))
+    except Exception:
+        return info
+
+    info["pixmap"] = pixmap
+    if min(pixmap.width, pixmap.height) < CAPTION_MIN_SIDE:
+        info["skip"] = f"smaller than {CAPTION_MIN_SIDE}px"
+        return info
+    if _entropy(pixmap) < CAPTION_MIN_ENTROPY:
+        info["skip"] = "low entropy"
+        return info
+
+    info["phash"] = _dhash(pixmap)
+    return info
+
+
+def prepare_image(data: bytes, pixmap, max_side: int = CAPTION_MAX_SIDE) -> bytes:
+    """Bytes to send to the vision model: downscaled to ``max_side`` when larger."""
+    if pixmap is None or max(pixmap.width, pixmap.height) <= max_side:
+        return data
+
+    scale = max_side / max(pixmap.width, pixmap.height)
+    resized = fitz.Pixmap(pixmap, max(1, int(pixmap.width * scale)), max(1, int(pixmap.height * scale)), None)
+    return resized.tobytes("jpeg", jpg_quality=85)
+
+
+class Captioner:
+    """Caption images once each: skip tiny or blank ones, reuse captions of duplicates.
+
+    Duplicates are found by content hash and by perceptual hash, across every
+    PDF this captioner sees and, through the caption cache, across previous
+    ingests. ``caption`` is thread-safe and returns ``None`` for skipped
+    images; concurrent calls for the same image wait for one model request.
+    """
+
+    def __init__(self, cache=None, model: str = DEFAULT_MODEL, prompt: str = DEFAULT_PROMPT):
+        self.cache = cache if cache is not None else get_caption_cache()
+        self.model = model
+        self.prompt = prompt
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._phashes = []
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _claim(self, info):
+        """Return ``(future, is_duplicate)``; the first caller of an image owns its future."""
+        with self._lock:
+            future = self._seen.get(info["key"])
+            if future is None and info["phash"] is not None:
+                for phash, other in self._phashes:
+                    if (phash ^ info["phash"]).bit_count() <= CAPTION_PHASH_DISTANCE:
+                        future = other
+                        break
+            if future is not None:
+                return future, True
+
+            future = Future()
+            self._seen[info["key"]] = future
+            if info["phash"] is not None:
+                self._phashes.append((info["phash"], future))
+            return future, False
+
+    def _cached(self, info):
+        if self.cache is None:
+            return None
+
+        caption = self.cache.get(self.model, self.prompt, info["key"])
+        if caption is None and info["phash"] is not None:
+            caption = self.cache.find_similar(self.model, self.prompt, info["phash"], CAPTION_PHASH_DISTANCE)
+        return caption
+
+    def caption(self, path: str):
+        image_path = Path(path)
+        if not image_path.exists():
+            raise FileNotFoundError(f"Image not found: {image_path}")
+
+        self._count("images")
+        data = image_path.read_bytes()
+        info = inspect_image(data)
+        if info["skip"]:
+            self._count("skipped")
+            return None
+
+        future, duplicate = self._claim(info)
+        if duplicate:
+            self._count("duplicates")
+            return future.result()
+
+        try:
+            caption = self._cached(info)
+            if caption is not None:
+                self._count("cached")
+            else:
+                caption = caption_image_bytes(prepare_image(data, info["pixmap"]), model=self.model, prompt=self.prompt)
+                if self.cache is not None and caption:
+                    self.cache.put(self.model, self.prompt, info["key"], caption, info["phash"])
+                self._count("captioned")
+        except Exception as exc:
+            self._count("failed")
+            future.set_exception(exc)
+            raise
+
+        future.set_result(caption)
+        return caption
+
+    def caption_many(self, paths, workers: int):
+        """Caption ``paths`` on at most ``workers`` threads; failures come back as exceptions."""
+
+        def run(path):
+            try:
+                return self.caption(path)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return list(pool.map(run, paths))
+
+    def report(self):
+        counts = self.counts
+        return (
+            f"Images: {counts['images']} seen, {counts['skipped']} skipped, {counts['duplicates']} duplicates, "
+            f"{counts['cached']} cached, {counts['captioned']} captioned, {counts['failed']} failed."
+        )
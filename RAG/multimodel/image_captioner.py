@@ -2,10 +2,8 @@ import base64
 import os
 from pathlib import Path
 
-import requests
+from RAG.ollama_client import post_json
 
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
-OLLAMA_URL = f"{OLLAMA_BASE_URL}/api/generate"
 DEFAULT_MODEL = os.getenv("VISION_MODEL", "llava")
 DEFAULT_PROMPT = "Describe the chart or diagram in detail."
 
@@ -15,11 +13,15 @@ def caption_image(path: str, model: str = DEFAULT_MODEL, prompt: str = DEFAULT_P
     if not image_path.exists():
         raise FileNotFoundError(f"Image not found: {image_path}")
 
-    encoded_image = base64.b64encode(image_path.read_bytes()).decode("utf-8")
+    return caption_image_bytes(image_path.read_bytes(), model=model, prompt=prompt)
 
-    response = requests.post(
-        OLLAMA_URL,
-        json={
+
+def caption_image_bytes(image: bytes, model: str = DEFAULT_MODEL, prompt: str = DEFAULT_PROMPT) -> str:
+    encoded_image = base64.b64encode(image).decode("utf-8")
+
+    data = post_json(
+        "/api/generate",
+        {
             "model": model,
             "prompt": prompt,
             "images": [encoded_image],
@@ -27,8 +29,5 @@ def caption_image(path: str, model: str = DEFAULT_MODEL, prompt: str = DEFAULT_P
         },
         timeout=180,
     )
-    response.raise_for_status()
 
-    data = response.json()
     return data.get("response", "").strip()
-
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+BACKOFF_SECONDS = float(os.getenv("OLLAMA_BACKOFF_SECONDS", "0.5"))
+# Upper bound on requests the async path keeps in flight toward Ollama per process.
+ASYNC_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "8"))
+# How long Ollama keeps a model loaded after each request: a duration ("30m") or seconds, -1 for ever.
+# Unset leaves Ollama's own default (5 minutes).
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+# httpx clients and asyncio semaphores belong to one event loop; keep one pair per loop.
+_async_state = weakref.WeakKeyDictionary()
+
+
+def with_keep_alive(payload: dict) -> dict:
+    """Add ``keep_alive`` to a request payload when OLLAMA_KEEP_ALIVE is set."""
+    if KEEP_ALIVE:
+        # Plain numbers are seconds; Ollama only parses strings with a unit.
+        payload["keep_alive"] = int(KEEP_ALIVE) if KEEP_ALIVE.lstrip("-").isdigit() else KEEP_ALIVE
+    return payload
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session used for all Ollama calls."""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+
+    return _session
+
+
+def post_json(path: str, payload: dict, timeout: float = 60, retries: int = MAX_RETRIES):
+    """POST to an Ollama endpoint, retrying transient failures with exponential backoff."""
+    url = f"{OLLAMA_BASE_URL}{path}"
+    attempt = 0
+
+    while True:
+        try:
+            response = get_session().post(url, json=payload, timeout=timeout)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                response.raise_for_status()
+                return response.json()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+
+        delay = BACKOFF_SECONDS * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, delay / 2))
+        attempt += 1
+
+
+def post_stream(path: str, payload: dict, timeout: float = 180):
+    """POST to a streaming Ollama endpoint and yield each NDJSON object as it arrives.
+
+    Only connecting is retried; once output has started a failure is raised to the caller.
+    """
+    url = f"{OLLAMA_BASE_URL}{path}"
+    attempt = 0
+
+    while True:
+        try:
+            response = get_session().post(url, json=payload, timeout=timeout, stream=True)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= MAX_RETRIES:
+                response.raise_for_status()
+                break
+            response.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= MAX_RETRIES:
+                raise
+
+        delay = BACKOFF_SECONDS * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, delay / 2))
+        attempt += 1
+
+    with response:
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def _get_async_state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+
+    if state is None:
+        limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        state = (httpx.AsyncClient(limits=limits), asyncio.Semaphore(ASYNC_CONCURRENCY))
+        _async_state[loop] = state
+
+    return state
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop."""
+    return _get_async_state()[0]
+
+
+async def aclose_async_client():
+    state = _async_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].aclose()
+
+
+async def _abackoff(attempt: int):
+    delay = BACKOFF_SECONDS * (2 ** attempt)
+    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+
+async def apost_json(path: str, payload: dict, timeout: float = 60, retries: int = MAX_RETRIES):
+    """Async ``post_json``; at most ``ASYNC_CONCURRENCY`` requests run at once."""
+    client, semaphore = _get_async_state()
+    url = f"{OLLAMA_BASE_URL}{path}"
+    attempt = 0
+
+    while True:
+        try:
+            async with semaphore:
+                response = await client.post(url, json=payload, timeout=timeout)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                response.raise_for_status()
+                return response.json()
+        except httpx.TransportError:
+            if attempt >= retries:
+                raise
+
+        await _abackoff(attempt)
+        attempt += 1
+
+
+async def apost_stream(path: str, payload: dict, timeout: float = 180):
+    """Async ``post_stream``; the concurrency slot is held until the stream ends."""
+    client, semaphore = _get_async_state()
+    url = f"{OLLAMA_BASE_URL}{path}"
+    attempt = 0
+    started = False
+
+    async with semaphore:
+        while True:
+            try:
+                async with client.stream("POST", url, json=payload, timeout=timeout) as response:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= MAX_RETRIES:
+                        if response.is_error:
+                            await response.aread()
+                        response.raise_for_status()
+                        started = True
+                        async for line in response.aiter_lines():
+                            if line:
+                                yield json.loads(line)
+                        return
+            except httpx.TransportError:
+                if started or attempt >= MAX_RETRIES:
+                    raise
+
+            await _abackoff(attempt)
+            attempt += 1
@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import os
+
+from RAG.tracing import add_to_trace, record_size, start_trace
+
+# Concurrent queries wait up to this long for others to share one embedding request and one search.
+BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "2"))
+# A batch goes out as soon as it holds this many queries; 1 turns batching off.
+BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+
+
+class MicroBatcher:
+    """Run concurrent calls that share a key as one batch.
+
+    The first call for a key opens a batch; calls with the same key join it
+    for up to ``window_ms``, or until it holds ``max_size`` items. Then
+    ``run(key, items)``, a coroutine returning one result per item, runs once
+    and each caller gets its own result, or the batch's exception.
+
+    The batch runs outside any caller's trace, so its stage timings are
+    observed once per batch and copied into every caller's trace, along with
+    the batch size.
+    """
+
+    def __init__(self, name: str, run, window_ms: float = BATCH_WINDOW_MS, max_size: int = BATCH_MAX_SIZE):
+        self.name = name
+        self.run = run
+        self.window_ms = window_ms
+        self.max_size = max_size
+        self.batches = 0
+        self.items = 0
+        self._pending = {}
+        self._tasks = set()
+
+    async def submit(self, key, item):
+        if self.max_size <= 1:
+            return (await self.run(key, [item]))[0]
+
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        batch = self._pending.get(slot)
+        if batch is None:
+            timer = loop.call_later(self.window_ms / 1000, self._flush, slot)
+            batch = self._pending[slot] = {"items": [], "futures": [], "timer": timer}
+        future = loop.create_future()
+        batch["items"].append(item)
+        batch["futures"].append(future)
+        if len(batch["items"]) >= self.max_size:
+            self._flush(slot)
+
+        result, timings_ms = await future
+        add_to_trace(timings_ms, {f"{self.name}_batch": len(batch["items"])})
+        return result
+
+    def _flush(self, slot):
+        batch = self._pending.pop(slot, None)
+        if batch is None:
+            return
+        batch["timer"].cancel()
+        loop, key = slot
+        # An empty context: the batch must not record into the trace of whichever caller opened it.
+        task = contextvars.Context().run(loop.create_task, self._run(key, batch["items"], batch["futures"]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, items, futures):
+        trace = start_trace()
+        self.batches += 1
+        self.items += len(items)
+        record_size(f"{self.name}_batch", len(items))
+        try:
+            results = await self.run(key, items)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result((result, trace["timings_ms"]))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "window_ms": self.window_ms,
+            "max_size": self.max_size,
+        }
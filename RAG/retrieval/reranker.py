@@ -0,0 +1,116 @@
+import os
+import re
+
+import numpy as np
+
+from RAG.indexing.lexical import PART_PATTERN, tokenize
+
+# First-stage candidates re-scored per query when reranking.
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "100"))
+# Share of the relevance score that comes from query-term overlap; the rest is embedding similarity.
+RERANK_LEXICAL_WEIGHT = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.3"))
+# MMR trade-off: 1.0 ranks by relevance alone, lower values penalize chunks similar to ones already picked.
+RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "0.7"))
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def term_overlap(query: str, contents, idf=None):
+    """Share of the query's terms, weighted by ``idf`` when given, that each content contains."""
+    terms = set(tokenize(query))
+    weights = idf(terms) if idf is not None else dict.fromkeys(terms, 1.0)
+    total = sum(weights.values())
+    if not total:
+        return np.zeros(len(contents), dtype="float32")
+
+    # One scan per content for just the query terms, instead of tokenizing every candidate.
+    alternatives = "|".join(re.escape(term) for term in sorted(weights, key=len, reverse=True))
+    pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+    scores = np.empty(len(contents), dtype="float32")
+    for position, content in enumerate(contents):
+        found = set(pattern.findall(content.lower()))
+        # A matched identifier such as "ab-12" also counts for its parts.
+        for term in [term for term in found if not term.isalnum()]:
+            found.update(PART_PATTERN.findall(term))
+        scores[position] = sum(weights.get(term, 0.0) for term in found) / total
+    return scores
+
+
+def mmr(relevance, unit_vectors, k: int, diversity_lambda: float = RERANK_MMR_LAMBDA):
+    """Maximal marginal relevance: pick ``k`` positions, trading relevance against redundancy."""
+    count = len(relevance)
+    k = min(k, count)
+    if k == 0:
+        return []
+    if diversity_lambda >= 1.0:
+        return [int(i) for i in np.argsort(-relevance, kind="stable")[:k]]
+
+    similarity = unit_vectors @ unit_vectors.T
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything selected so far.
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = diversity_lambda * relevance - (1 - diversity_lambda) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+def rerank(
+    index,
+    query_vector,
+    query: str,
+    candidate_ids,
+    candidate_docs,
+    k: int,
+    idf=None,
+    lexical_weight: float = RERANK_LEXICAL_WEIGHT,
+    diversity_lambda: float = RERANK_MMR_LAMBDA,
+):
+    """Order first-stage candidates for the prompt; returns the positions of the ``k`` kept, best first.
+
+    Relevance is cosine similarity between the query and each candidate's
+    stored vector (read back from the FAISS index, no model call), blended
+    with ``term_overlap``. MMR then picks ``k`` of them so near-duplicate
+    chunks do not crowd out other evidence.
+    """
+    if not candidate_ids:
+        return []
+
+    vectors = index.reconstruct_batch(np.asarray(candidate_ids, dtype="int64"))
+    return rerank_vectors(vectors, query_vector, query, candidate_docs, k, idf, lexical_weight, diversity_lambda)
+
+
+def rerank_vectors(
+    vectors,
+    query_vector,
+    query: str,
+    candidate_docs,
+    k: int,
+    idf=None,
+    lexical_weight: float = RERANK_LEXICAL_WEIGHT,
+    diversity_lambda: float = RERANK_MMR_LAMBDA,
+):
+    """``rerank`` given the candidates' stored vectors, e.g. gathered from several shards."""
+    if not len(vectors):
+        return []
+
+    vectors = _unit(np.asarray(vectors, dtype="float32"))
+    query_unit = _unit(np.asarray(query_vector, dtype="float32").reshape(-1))
+    relevance = vectors @ query_unit
+
+    if lexical_weight:
+        overlap = term_overlap(query, [doc.get("content", "") for doc in candidate_docs], idf)
+        relevance = (1 - lexical_weight) * relevance + lexical_weight * overlap
+
+    return mmr(relevance, vectors, k, diversity_lambda)
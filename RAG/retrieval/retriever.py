@@ -1,58 +1,764 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import asyncio
+import heapq
+import json
+import os
 import pickle
+import threading
+import time
 
 import faiss
 import numpy as np
 
-from RAG.embeddings.ollama_embed import embed
+from RAG.embeddings.ollama_embed import DEFAULT_MODEL as EMBED_MODEL, aembed_many, embed, embed_many
+from RAG.indexing.collection import (
+    DEFAULT_COLLECTION,
+    collection_dir,
+    collection_name,
+    collection_names,
+    list_collections,
+    shard_count,
+    shard_dirs,
+)
+from RAG.indexing.doc_store import DOCSTORE_DIR, DocStore, doc_store_exists
+from RAG.indexing.index_types import (
+    apply_search_params,
+    enable_reconstruct,
+    exact_index,
+    is_exhaustive,
+    search_parameters,
+)
+from RAG.indexing.lexical import LEXICAL_DIR, CorpusStats, LexicalIndex, fused_scores, lexical_index_exists
+from RAG.indexing.versions import current_version, version_dir
+from RAG.retrieval import query_cache
+from RAG.retrieval.batcher import MicroBatcher
+from RAG.retrieval.reranker import RERANK_CANDIDATES, rerank_vectors
+from RAG.tracing import add_to_trace, record_size, span
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 INDEX_DIR = PROJECT_ROOT / "vectorstore" / "faiss_index"
-INDEX_PATH = INDEX_DIR / "index.bin"
-META_PATH = INDEX_DIR / "meta.pkl"
+INDEX_FILE = "index.bin"
+META_FILE = "meta.pkl"
+MANIFEST_FILE = "manifest.json"
 
-_index = None
-_docs = None
+LOAD_ATTEMPTS = 3
+# How often a request may look at the CURRENT pointer for a newly published version; 0 checks every request.
+RELOAD_CHECK_SECONDS = float(os.getenv("INDEX_RELOAD_CHECK_SECONDS", "2"))
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+DEFAULT_RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+# Hybrid mode fuses this many candidates per retriever (at least k) before cutting to k.
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+# Rerank by default: fetch RERANK_CANDIDATES, keep the best k (see reranker.rerank).
+DEFAULT_RERANK = os.getenv("RERANK", "0").lower() in {"1", "true", "yes", "on"}
+
+FILTER_KEYS = ("source", "type", "page_min", "page_max")
+# Distinct filters whose matching chunks are kept per loaded version.
+FILTER_CACHE_SIZE = int(os.getenv("FILTER_CACHE_SIZE", "64"))
+# With IVF/HNSW indexes, filters matching at most this many chunks are searched exactly over their own vectors.
+FILTER_EXACT_MAX = int(os.getenv("FILTER_EXACT_MAX", "4096"))
+# Threads searching the shards of a query at once; FAISS and numpy release the GIL while they work.
+SEARCH_THREADS = int(os.getenv("SEARCH_THREADS", str(min(8, os.cpu_count() or 1))))
+
+# Loaded shards by index root, and the shards of each collection folder with when to list it again.
+_shards = {}
+_collections = {}
+_registry_lock = threading.Lock()
+_search_pool = None
+_search_pool_lock = threading.Lock()
 
 
 class IndexNotReadyError(RuntimeError):
     pass
 
 
-def index_exists() -> bool:
-    return INDEX_PATH.exists() and META_PATH.exists()
+class LoadedIndex:
+    """One index version: FAISS index, chunks and lexical index read from the same directory."""
+
+    def __init__(self, version, path: Path, index, docs, lexical, load_seconds: float, config=None):
+        self.version = version
+        self.path = path
+        self.index = index
+        self.docs = docs
+        self.lexical = lexical
+        self.load_seconds = load_seconds
+        # Index type and scheme from the manifest (see index_types.index_config).
+        self.config = config
+        self.loaded_at = time.time()
+        self.selections = query_cache.LRUCache(FILTER_CACHE_SIZE)
+
+
+class Selection:
+    """Chunks matching one filter, in the form each retriever searches them.
+
+    ``selector`` restricts a FAISS search to ``ids``; ``exact`` is a small flat
+    index of just those vectors, used instead when the main index is
+    approximate and the filter is narrow; ``lexical_rows`` masks BM25 rows.
+    """
+
+    def __init__(self, ids, selector, exact, lexical_rows):
+        self.ids = ids
+        self.selector = selector
+        self.exact = exact
+        self.lexical_rows = lexical_rows
+
+
+def _files_exist(index_dir: Path) -> bool:
+    return (index_dir / INDEX_FILE).exists() and (
+        doc_store_exists(index_dir / DOCSTORE_DIR) or (index_dir / META_FILE).exists()
+    )
+
+
+def _load_docs(index_dir: Path):
+    if doc_store_exists(index_dir / DOCSTORE_DIR):
+        return DocStore(index_dir / DOCSTORE_DIR)
+
+    # Indexes built before the document store kept all chunks in a pickle.
+    with (index_dir / META_FILE).open("rb") as f:
+        return pickle.load(f)
+
+
+def _load_version(root: Path):
+    version = current_version(root)
+    index_dir = version_dir(root, version)
+    if not _files_exist(index_dir):
+        raise IndexNotReadyError(f"Index files are missing. Run ingestion first to create an index under {root}.")
+
+    started = time.perf_counter()
+    # Published versions never change. Indexes written before versioning were replaced
+    # file by file; if we land between the renames the sizes disagree, so read them again.
+    for attempt in range(LOAD_ATTEMPTS):
+        index = faiss.read_index(str(index_dir / INDEX_FILE))
+        docs = _load_docs(index_dir)
+
+        if version or index.ntotal == len(docs):
+            break
+        time.sleep(0.1 * (attempt + 1))
 
+    config = None
+    manifest_path = index_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        config = json.loads(manifest_path.read_text(encoding="utf-8")).get("index")
+        apply_search_params(index, config)
+        # The reranker reads candidate vectors back by id.
+        enable_reconstruct(index, config)
 
-def load_index(force_reload: bool = False):
-    global _index, _docs
+    lexical_path = index_dir / LEXICAL_DIR
+    lexical = LexicalIndex(lexical_path) if lexical_index_exists(lexical_path) else None
+    return LoadedIndex(version, index_dir, index, docs, lexical, time.perf_counter() - started, config)
 
-    if not force_reload and _index is not None and _docs is not None:
-        return _index, _docs
 
-    if not index_exists():
+class Shard:
+    """The published versions of one index root: loads the current one and picks up new ones."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        # Replaced as a whole, so a query that took a reference keeps a consistent view.
+        self.loaded = None
+        self.last_error = None
+        self._load_lock = threading.Lock()
+        self._reload_start_lock = threading.Lock()
+        self._reload_thread = None
+        self._next_check = 0.0
+
+    def exists(self) -> bool:
+        return _files_exist(version_dir(self.root))
+
+    def _swap(self, loaded: LoadedIndex):
+        self.loaded = loaded
+        # Cached answers were produced from the previous index's chunks.
+        query_cache.answers.clear()
+
+    def reload(self):
+        """Read the current version again right away, in this thread."""
+        with self._load_lock:
+            self._swap(_load_version(self.root))
+        return self.loaded
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+            self.last_error = None
+        except Exception as exc:
+            # Keep serving the version already loaded; the next check tries again.
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            print(f"[WARN] Index reload of {self.root} failed: {self.last_error}")
+
+    def _check_for_new_version(self, loaded: LoadedIndex):
+        """Start loading a newly published version in the background; cheap when nothing changed."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + RELOAD_CHECK_SECONDS
+
+        if current_version(self.root) == loaded.version:
+            return
+        with self._reload_start_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return
+            self._reload_thread = threading.Thread(
+                target=self._reload_in_background, name="index-reload", daemon=True
+            )
+            self._reload_thread.start()
+
+    def current(self) -> LoadedIndex:
+        """The loaded version, loading it on first use and picking up newly published versions."""
+        loaded = self.loaded
+        if loaded is not None:
+            self._check_for_new_version(loaded)
+            return loaded
+
+        with self._load_lock:
+            if self.loaded is None:
+                self._swap(_load_version(self.root))
+            return self.loaded
+
+    def status(self):
+        """What this process has loaded and what is published on disk."""
+        loaded = self.loaded
+        status = {
+            "path": str(self.root),
+            "current_version": current_version(self.root),
+            "loaded_version": None,
+            "loaded_at": None,
+            "load_seconds": None,
+            "chunks": None,
+            "lexical": None,
+            "index": None,
+            "reloading": self._reload_thread is not None and self._reload_thread.is_alive(),
+            "last_error": self.last_error,
+        }
+        if loaded is not None:
+            status.update(
+                loaded_version=loaded.version,
+                loaded_at=loaded.loaded_at,
+                load_seconds=round(loaded.load_seconds, 4),
+                chunks=loaded.index.ntotal,
+                lexical=loaded.lexical is not None,
+                index=loaded.config,
+            )
+        return status
+
+
+def _collection_shards(name: str):
+    """The ``Shard``s of collection ``name``; the folder is listed again every RELOAD_CHECK_SECONDS."""
+    root = collection_dir(name, INDEX_DIR)
+    now = time.monotonic()
+    cached = _collections.get(root)
+    if cached is not None and now < cached[0]:
+        return cached[1]
+
+    with _registry_lock:
+        paths = shard_dirs(root) if shard_count(root) else []
+        if cached is not None:
+            # Shards folded into others by a reshard are no longer searched; free what they held.
+            for shard in cached[1]:
+                if shard.root not in paths:
+                    _shards.pop(shard.root, None)
+        shards = [_shards.setdefault(path, Shard(path)) for path in paths]
+        _collections[root] = (now + RELOAD_CHECK_SECONDS, shards)
+    return shards
+
+
+def _loaded_shards(name: str):
+    shards = _collection_shards(name)
+    if not shards:
+        if name == DEFAULT_COLLECTION:
+            raise IndexNotReadyError(
+                f"Index files are missing. Run ingestion first to create an index under {INDEX_DIR}."
+            )
         raise IndexNotReadyError(
-            "Index files are missing. Run ingestion first to create "
-            "vectorstore/faiss_index/index.bin and vectorstore/faiss_index/meta.pkl."
+            f"Collection '{name}' has no index. Run `scripts/ingest.py --collection {name}` first."
         )
+    return [shard.current() for shard in shards]
+
+
+def _ready_shards(collections=None):
+    """Loaded, non-empty shards of ``collections`` (a name or list of them; default: the default collection)."""
+    loaded = [
+        shard
+        for name in collection_names(collections)
+        for shard in _loaded_shards(name)
+        if shard.index.ntotal and shard.docs
+    ]
+    if not loaded:
+        raise IndexNotReadyError("Index is empty. Ingest PDFs and rebuild the index.")
+    return loaded
+
+
+def index_exists(collection: str = DEFAULT_COLLECTION) -> bool:
+    return any(shard.exists() for shard in _collection_shards(collection_name(collection)))
+
+
+def load_shards(force_reload: bool = False, collection: str = DEFAULT_COLLECTION):
+    """Return ``(faiss index, docs)`` of each shard of ``collection``'s current version.
+
+    ``force_reload`` reads the current versions again right away, in this thread.
+    """
+    if force_reload:
+        _collections.pop(collection_dir(collection_name(collection), INDEX_DIR), None)
+        for shard in _collection_shards(collection):
+            shard.reload()
+
+    return [(loaded.index, loaded.docs) for loaded in _loaded_shards(collection_name(collection))]
+
+
+def load_index(force_reload: bool = False, collection: str = DEFAULT_COLLECTION):
+    """Return ``(faiss index, docs)`` of ``collection``'s current version, as before sharding.
+
+    A sharded collection has no single index: it returns ``load_shards``' list of pairs instead.
+    """
+    shards = load_shards(force_reload, collection)
+    return shards[0] if len(shards) == 1 else shards
+
+
+def preload_index(collections=None):
+    """Load every shard ahead of the first query and page their document metadata in.
+
+    ``collections`` defaults to every collection built; returns the loaded
+    version of each shard by collection.
+    """
+    names = list_collections(INDEX_DIR) if collections is None else collection_names(collections)
+    if not names:
+        raise IndexNotReadyError("No index has been built yet. Run ingestion first.")
+
+    versions = {}
+    for name in names:
+        versions[name] = []
+        for loaded in _loaded_shards(name):
+            if isinstance(loaded.docs, DocStore):
+                loaded.docs.prefetch()
+            versions[name].append(loaded.version)
+    return versions
+
+
+def index_status(collection: str = DEFAULT_COLLECTION):
+    """What this process has loaded and what is published on disk, per shard of ``collection``."""
+    shards = [shard.status() for shard in _collection_shards(collection_name(collection))]
+    loaded = [status["chunks"] for status in shards if status["chunks"] is not None]
+    return {"collection": collection, "chunks": sum(loaded) if loaded else None, "shards": shards}
+
+
+def collections_status():
+    """Every collection built, with its shard count and the chunks loaded in this process."""
+    found = []
+    for name in list_collections(INDEX_DIR):
+        shards = _collection_shards(name)
+        loaded = [shard.loaded.index.ntotal for shard in shards if shard.loaded is not None]
+        found.append({"name": name, "shards": len(shards), "chunks": sum(loaded) if loaded else None})
+    return found
+
+
+def _lookup_many(docs, doc_ids):
+    if isinstance(docs, DocStore):
+        return docs.get_many(doc_ids)
+
+    # Legacy pickles: a dict keyed by FAISS id, or a positional list before that.
+    if isinstance(docs, dict):
+        return [docs.get(int(doc_id)) for doc_id in doc_ids]
+    return [docs[doc_id] if 0 <= doc_id < len(docs) else None for doc_id in doc_ids]
+
+
+def _resolve_mode(mode, shards):
+    mode = mode or DEFAULT_RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Choose one of: {', '.join(RETRIEVAL_MODES)}.")
+
+    # Indexes built before the lexical index existed can only be searched densely.
+    if mode != "dense" and any(loaded.lexical is None for loaded in shards):
+        return "dense"
+    return mode
+
+
+def _filter_names(name: str, value):
+    values = [value] if isinstance(value, str) else list(value)
+    if not all(isinstance(item, str) and item for item in values):
+        raise ValueError(f"Filter '{name}' must be a non-empty string or a list of them.")
+    return tuple(sorted(set(values)))
+
+
+def _filter_key(filters):
+    """Validate ``filters`` and return them in hashable form, or None when nothing is filtered."""
+    if not filters:
+        return None
+
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}. Use: {', '.join(FILTER_KEYS)}.")
+
+    sources = _filter_names("source", filters["source"]) if filters.get("source") is not None else ()
+    types = _filter_names("type", filters["type"]) if filters.get("type") is not None else ()
+    page_min, page_max = filters.get("page_min"), filters.get("page_max")
+    for name, value in (("page_min", page_min), ("page_max", page_max)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+            raise ValueError(f"Filter '{name}' must be a non-negative integer.")
+    if page_min is not None and page_max is not None and page_min > page_max:
+        raise ValueError("Filter 'page_min' cannot be greater than 'page_max'.")
+
+    key = (sources, types, page_min, page_max)
+    return None if key == ((), (), None, None) else key
+
+
+def _selection(loaded: LoadedIndex, filter_key):
+    """The ``Selection`` for ``filter_key``, built on first use and cached with the loaded version."""
+    if filter_key is None:
+        return None
 
-    _index = faiss.read_index(str(INDEX_PATH))
-    with META_PATH.open("rb") as f:
-        _docs = pickle.load(f)
+    selection = loaded.selections.get(filter_key)
+    if selection is None:
+        if not isinstance(loaded.docs, DocStore):
+            raise ValueError("Filters need an index with a document store. Rebuild it with `scripts/ingest.py --full`.")
 
-    return _index, _docs
+        ids = loaded.docs.select(*filter_key)
+        selector = faiss.IDSelectorBatch(ids) if len(ids) else None
+        exact = None
+        if 0 < len(ids) <= FILTER_EXACT_MAX and not is_exhaustive(loaded.index):
+            # IVF/HNSW can miss a narrow filter's chunks entirely (unprobed lists, graph detours);
+            # scanning a few thousand vectors is exact and cheaper than that search.
+            exact = exact_index(loaded.index, ids)
+        lexical_rows = loaded.lexical.row_mask(ids) if loaded.lexical is not None else None
+        selection = Selection(ids, selector, exact, lexical_rows)
+        loaded.selections.put(filter_key, selection)
+    return selection
 
 
-def retrieve(query: str, k: int = 5):
+def _dense_hits(index, vectors, k: int, selection=None):
+    """One FAISS search for all query ``vectors``; returns ``(ids, scores)`` per query, best first."""
+    query_matrix = np.asarray(vectors, dtype="float32").reshape(len(vectors), -1)
+    params = None
+    if selection is not None and selection.exact is not None:
+        index = selection.exact
+    elif selection is not None:
+        # Built per search: IndexIDMap swaps the selector on the parameters while searching.
+        params = search_parameters(index, selection.selector)
+    distances, indices = index.search(query_matrix, k, params=params)
+    if index.metric_type == faiss.METRIC_L2:
+        # Between unit vectors squared L2 is 2 - 2 cos: put L2 shards on the inner-product scale.
+        distances = 1 - distances / 2
+    return [(row[row >= 0].tolist(), scores[row >= 0].tolist()) for row, scores in zip(indices, distances)]
+
+
+def _shard_hits(loaded: LoadedIndex, selection, available: int, vectors, queries, corpora, mode: str, k: int):
+    """First stage on one shard: ``(ids, scores)`` of its best ``k`` chunks per query, best first.
+
+    In hybrid mode each query gets a dense and a lexical list, fused only
+    after every shard's lists are merged, as one index would rank them.
+    """
+    k = min(k, available)
+    allowed = selection.lexical_rows if selection is not None else None
+    if mode == "dense":
+        return _dense_hits(loaded.index, vectors, k, selection)
+    lexical = [loaded.lexical.search(query, k, allowed, corpus) for query, corpus in zip(queries, corpora)]
+    if mode == "lexical":
+        return lexical
+    return list(zip(_dense_hits(loaded.index, vectors, k, selection), lexical))
+
+
+def _get_search_pool():
+    global _search_pool
+
+    if _search_pool is None:
+        with _search_pool_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(max(1, SEARCH_THREADS), thread_name_prefix="shard-search")
+    return _search_pool
+
+
+def _merge(per_shard, k: int):
+    """Heap-merge per-shard ``(ids, scores)`` lists into the best ``k`` ``(shard, id)`` pairs.
+
+    Each list is already sorted, so this reads only as far as it keeps. A
+    chunk indexed in more than one collection is kept once.
+    """
+    streams = [
+        [(score, shard, int(doc_id)) for doc_id, score in zip(ids, scores)]
+        for shard, (ids, scores) in enumerate(per_shard)
+    ]
+    merged = []
+    seen = set()
+    for _, shard, doc_id in heapq.merge(*streams, key=lambda hit: -hit[0]):
+        if doc_id not in seen:
+            seen.add(doc_id)
+            merged.append((shard, doc_id))
+            if len(merged) == k:
+                break
+    return merged
+
+
+def _fuse(dense, lexical, k: int):
+    """Reciprocal rank fusion of merged ``(shard, id)`` rankings; ids are unique across shards."""
+    shard_of = {doc_id: shard for shard, doc_id in dense + lexical}
+    ids, _ = fused_scores([[doc_id for _, doc_id in dense], [doc_id for _, doc_id in lexical]], k)
+    return [(shard_of[doc_id], doc_id) for doc_id in ids]
+
+
+def _fetch(shards, hits):
+    """Docs of ``(shard, id)`` hits, grouped into one lookup per shard; missing ones are dropped."""
+    by_shard = {}
+    for shard, doc_id in hits:
+        by_shard.setdefault(shard, []).append(doc_id)
+
+    found = {}
+    for shard, doc_ids in by_shard.items():
+        found.update(((shard, doc_id), doc) for doc_id, doc in zip(doc_ids, _lookup_many(shards[shard].docs, doc_ids)))
+    return [(shard, doc_id, found[shard, doc_id]) for shard, doc_id in hits if found[shard, doc_id] is not None]
+
+
+def _stored_vectors(shards, hits):
+    """Stored FAISS vectors of ``(shard, id, doc)`` hits, in order."""
+    by_shard = {}
+    for position, (shard, doc_id, _) in enumerate(hits):
+        by_shard.setdefault(shard, []).append((position, doc_id))
+
+    vectors = np.empty((len(hits), shards[0].index.d), dtype="float32")
+    for shard, entries in by_shard.items():
+        positions, doc_ids = zip(*entries)
+        vectors[list(positions)] = shards[shard].index.reconstruct_batch(np.asarray(doc_ids, dtype="int64"))
+    return vectors
+
+
+def _corpora(shards, queries):
+    """Per query, BM25 statistics over all ``shards`` when there are several; None where each shard's own are right."""
+    if len(shards) == 1 or any(loaded.lexical is None for loaded in shards):
+        return [None] * len(queries)
+    lexicals = [loaded.lexical for loaded in shards]
+    return [CorpusStats(lexicals, query) for query in queries]
+
+
+def _search_many(shards, vectors, k: int, queries, mode: str = "dense", rerank: bool = False, filter_key=None):
+    """Search every query at once over ``shards``; returns one ``(ids, docs)`` pair per query.
+
+    Shards are searched in parallel on the search pool, and their best hits
+    merged by score. With ``rerank`` the first stage fetches
+    ``RERANK_CANDIDATES`` and the reranker keeps the best ``k`` of them.
+    ``filter_key`` (see ``_filter_key``) restricts every retriever to the
+    matching chunks during the search.
+    """
+    selections = [_selection(loaded, filter_key) for loaded in shards]
+    counts = [
+        loaded.index.ntotal if selection is None else len(selection.ids)
+        for loaded, selection in zip(shards, selections)
+    ]
+    available = sum(counts)
+    if filter_key is not None:
+        record_size("filtered_chunks", available)
+    if available == 0:
+        return [([], []) for _ in queries]
+
+    final_k = max(1, min(int(k), available))
+    top_k = max(final_k, min(RERANK_CANDIDATES, available)) if rerank else final_k
+    searched = [
+        (loaded, selection, count) for loaded, selection, count in zip(shards, selections, counts) if count
+    ]
+    # Statistics of every shard, including ones the filter leaves empty, as one unsharded index would use.
+    corpora = _corpora(shards, queries) if mode != "dense" or rerank else [None] * len(queries)
+
+    shard_k = max(top_k, min(HYBRID_CANDIDATES, available)) if mode == "hybrid" else top_k
+
+    def search(entry):
+        return _shard_hits(*entry, vectors, queries, corpora, mode, shard_k)
+
+    with span("search"):
+        if len(searched) == 1:
+            per_shard = [search(searched[0])]
+        else:
+            per_shard = list(_get_search_pool().map(search, searched))
+        if mode == "hybrid":
+            merged = [
+                _fuse(
+                    _merge([hits[position][0] for hits in per_shard], shard_k),
+                    _merge([hits[position][1] for hits in per_shard], shard_k),
+                    top_k,
+                )
+                for position in range(len(queries))
+            ]
+        else:
+            merged = [_merge([hits[position] for hits in per_shard], top_k) for position in range(len(queries))]
+
+    searched = [loaded for loaded, _, _ in searched]
+    with span("fetch"):
+        found = [_fetch(searched, hits) for hits in merged]
+
+    if rerank:
+        with span("rerank"):
+            for position, (hits, vector, query, corpus) in enumerate(zip(found, vectors, queries, corpora)):
+                if corpus is not None:
+                    idf = corpus.idf
+                else:
+                    idf = searched[0].lexical.idf if searched[0].lexical is not None else None
+                docs = [doc for _, _, doc in hits]
+                kept = rerank_vectors(_stored_vectors(searched, hits), vector, query, docs, final_k, idf=idf)
+                found[position] = [hits[i] for i in kept]
+
+    results = []
+    for hits in found:
+        record_size("k", final_k)
+        record_size("chunks", len(hits))
+        results.append(([doc_id for _, doc_id, _ in hits], [doc for _, _, doc in hits]))
+    return results
+
+
+def _search(shards, vector, k: int, query: str = "", mode: str = "dense", rerank: bool = False, filter_key=None):
+    return _search_many(shards, [vector], k, [query], mode, rerank, filter_key)[0]
+
+
+def _validate(query: str):
     if not query or not query.strip():
         raise ValueError("Query cannot be empty.")
 
-    index, docs = load_index()
 
-    if index.ntotal == 0 or not docs:
-        raise IndexNotReadyError("Index is empty. Ingest PDFs and rebuild the index.")
+def _query_vector(query: str):
+    key = query_cache.query_key(EMBED_MODEL, query)
+    vector = query_cache.query_vectors.get(key)
+    if vector is None:
+        with span("embed"):
+            vector = embed(query)
+        query_cache.query_vectors.put(key, vector)
+    return vector
+
+
+async def _embed_batch(model: str, queries):
+    return await aembed_many(queries, model=model)
+
+
+async def _search_batch(key, items):
+    shards, k, mode, rerank, filter_key = key
+    vectors = [vector for vector, _ in items]
+    queries = [query for _, query in items]
+    return await asyncio.to_thread(_search_many, list(shards), vectors, k, queries, mode, rerank, filter_key)
+
+
+# Concurrent async queries share one embedding request and one search per shard.
+embed_batcher = MicroBatcher("embed", _embed_batch)
+search_batcher = MicroBatcher("search", _search_batch)
+
+
+async def _aquery_vector(query: str):
+    key = query_cache.query_key(EMBED_MODEL, query)
+    vector = query_cache.query_vectors.get(key)
+    if vector is None:
+        with span("embed"):
+            vector = await embed_batcher.submit(EMBED_MODEL, query)
+        query_cache.query_vectors.put(key, vector)
+    return vector
+
+
+def _cached_query_vectors(queries):
+    keys = [query_cache.query_key(EMBED_MODEL, query) for query in queries]
+    vectors = [query_cache.query_vectors.get(key) for key in keys]
+    missing = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+    return keys, vectors, missing
+
+
+def _fill_query_vectors(queries, keys, vectors, missing, embedded):
+    fresh = dict(zip(missing, embedded))
+    for position, (query, key) in enumerate(zip(queries, keys)):
+        if vectors[position] is None:
+            vectors[position] = fresh[query]
+            query_cache.query_vectors.put(key, vectors[position])
+    return vectors
+
+
+def _query_vectors(queries):
+    keys, vectors, missing = _cached_query_vectors(queries)
+    with span("embed"):
+        embedded = embed_many(missing) if missing else []
+    return _fill_query_vectors(queries, keys, vectors, missing, embedded)
+
+
+async def _aquery_vectors(queries):
+    keys, vectors, missing = _cached_query_vectors(queries)
+    with span("embed"):
+        embedded = await aembed_many(missing) if missing else []
+    return _fill_query_vectors(queries, keys, vectors, missing, embedded)
+
+
+def retrieve_with_ids(query: str, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    """Like ``retrieve`` but returns ``(chunk ids, docs)``."""
+    _validate(query)
+    filter_key = _filter_key(filters)
+    shards = _ready_shards(collections)
+    mode = _resolve_mode(mode, shards)
+    rerank = DEFAULT_RERANK if rerank is None else rerank
+    vector = _query_vector(query) if mode != "lexical" or rerank else None
+    return _search(shards, vector, k, query=query, mode=mode, rerank=rerank, filter_key=filter_key)
+
+
+def retrieve(query: str, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    """Return the ``k`` best chunks for ``query``.
+
+    ``mode`` is ``dense`` (FAISS), ``lexical`` (BM25) or ``hybrid`` (both,
+    merged with reciprocal rank fusion); it defaults to ``RETRIEVAL_MODE``.
+    With ``rerank`` (default ``RERANK``) a wider candidate set is fetched and
+    re-scored on CPU, and only the best ``k`` are returned.
+
+    ``filters`` limits the search to matching chunks: ``source`` (file path or
+    name), ``type`` (``text``/``table``/``image``; either may be a list) and an
+    inclusive ``page_min``/``page_max`` range, e.g. ``{"source": "report.pdf",
+    "type": "table"}``.
+
+    ``collections`` names the collection, or list of collections, to search
+    (default: the default collection); all their shards are searched at once
+    and the best ``k`` chunks across them returned.
+    """
+    return retrieve_with_ids(query, k, mode=mode, rerank=rerank, filters=filters, collections=collections)[1]
+
+
+async def aretrieve_with_ids(query: str, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    """Async ``retrieve_with_ids``: the embedding is awaited and FAISS work runs in a worker thread.
+
+    Queries arriving together are micro-batched (see ``batcher``): their
+    embeddings go to Ollama in one request, and those with the same shards,
+    ``k``, mode, reranking and filters are searched with one call per shard.
+    """
+    _validate(query)
+    filter_key = _filter_key(filters)
+    shards = await asyncio.to_thread(_ready_shards, collections)
+    mode = _resolve_mode(mode, shards)
+    rerank = DEFAULT_RERANK if rerank is None else rerank
+    vector = await _aquery_vector(query) if mode != "lexical" or rerank else None
+    doc_ids, docs = await search_batcher.submit((tuple(shards), k, mode, rerank, filter_key), (vector, query))
+    # A batch's trace only keeps the sizes of its last query.
+    add_to_trace(sizes={"k": k, "chunks": len(doc_ids)})
+    return doc_ids, docs
+
+
+async def aretrieve(query: str, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    return (await aretrieve_with_ids(query, k, mode=mode, rerank=rerank, filters=filters, collections=collections))[1]
+
+
+def retrieve_many_with_ids(queries, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    """Retrieve for many queries at once: embeddings go out in batches and FAISS is searched once per shard.
+
+    Returns one ``(chunk ids, docs)`` pair per query, in input order;
+    ``filters`` and ``collections`` apply to every query.
+    """
+    queries = list(queries)
+    for query in queries:
+        _validate(query)
+    filter_key = _filter_key(filters)
+    if not queries:
+        return []
+
+    shards = _ready_shards(collections)
+    mode = _resolve_mode(mode, shards)
+    rerank = DEFAULT_RERANK if rerank is None else rerank
+    vectors = _query_vectors(queries) if mode != "lexical" or rerank else [None] * len(queries)
+    return _search_many(shards, vectors, k, queries, mode, rerank, filter_key)
+
 
-    top_k = max(1, min(int(k), index.ntotal))
-    query_vector = np.array([embed(query)], dtype="float32")
-    _, indices = index.search(query_vector, top_k)
+async def aretrieve_many_with_ids(queries, k: int = 5, mode=None, rerank=None, filters=None, collections=None):
+    """Async ``retrieve_many_with_ids``."""
+    queries = list(queries)
+    for query in queries:
+        _validate(query)
+    filter_key = _filter_key(filters)
+    if not queries:
+        return []
 
-    return [docs[i] for i in indices[0] if 0 <= i < len(docs)]
+    shards = await asyncio.to_thread(_ready_shards, collections)
+    mode = _resolve_mode(mode, shards)
+    rerank = DEFAULT_RERANK if rerank is None else rerank
+    vectors = await _aquery_vectors(queries) if mode != "lexical" or rerank else [None] * len(queries)
+    return await asyncio.to_thread(_search_many, shards, vectors, k, queries, mode, rerank, filter_key)
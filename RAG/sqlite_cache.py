@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# SQLite caps the number of bound parameters per statement.
+SQL_BATCH = 500
+# Eviction trims to this share of max_entries, so the row count is not re-read on every insert at the cap.
+EVICT_TO = 0.95
+
+
+class SQLiteCache:
+    """Rows of one SQLite table with a ``last_used`` column, evicted least recently used past ``max_entries``.
+
+    Subclasses set ``TABLE``, ``COLUMNS`` (name to SQL type, in row order) and
+    ``KEY`` (the primary key columns, in order). Lookups go through the last key
+    column with the others fixed, e.g. many pages of one file hash.
+    """
+
+    TABLE = ""
+    COLUMNS = {}
+    KEY = ()
+    # Hits whose last_used update is held back; they are written with the next insert or at this many.
+    TOUCH_BATCH = 1
+
+    def __init__(self, path, max_entries: int):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        columns = ", ".join(f"{name} {kind}" for name, kind in self.COLUMNS.items())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} "
+            f"({columns}, last_used REAL NOT NULL, PRIMARY KEY ({', '.join(self.KEY)}))"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.TABLE}_last_used ON {self.TABLE} (last_used)")
+        self._conn.commit()
+        # Rows in the file as of the last count plus those added since; other processes sharing the
+        # file are caught up with when this passes max_entries.
+        (self._count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()
+        self._touched = {}
+
+    def _where_key(self) -> str:
+        return " AND ".join(f"{name} = ?" for name in self.KEY)
+
+    def _get_many(self, prefix, keys, columns):
+        """Return ``{key: (column, ...)}`` for the cached rows among ``keys`` under the leading key values ``prefix``.
+
+        Every key asked for counts as a hit or a miss, and found rows are marked used.
+        """
+        keys = list(keys)
+        found = {}
+        selected = ", ".join((self.KEY[-1], *columns))
+        leading = [f"{name} = ?" for name in self.KEY[:-1]]
+
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), SQL_BATCH):
+                batch = unique_keys[start:start + SQL_BATCH]
+                where = " AND ".join([*leading, f"{self.KEY[-1]} IN ({','.join('?' * len(batch))})"])
+                rows = self._conn.execute(
+                    f"SELECT {selected} FROM {self.TABLE} WHERE {where}",
+                    [*prefix, *batch],
+                ).fetchall()
+                found.update((row[0], row[1:]) for row in rows)
+
+            if found:
+                now = time.time()
+                self._touched.update(((*prefix, key), now) for key in found)
+                if len(self._touched) >= self.TOUCH_BATCH:
+                    self._flush_touched()
+                    self._conn.commit()
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return found
+
+    def _put_many(self, rows) -> int:
+        """Insert or refresh ``rows`` (values in ``COLUMNS`` order) and evict past the cap; returns how many are new."""
+        now = time.time()
+        rows = [(*row, now) for row in rows]
+        if not rows:
+            return 0
+
+        names = [*self.COLUMNS, "last_used"]
+        values = [name for name in names if name not in self.KEY]
+        positions = [names.index(name) for name in (*values, *self.KEY)]
+        with self._lock:
+            self._flush_touched()
+            added = self._conn.executemany(
+                f"INSERT OR IGNORE INTO {self.TABLE} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                rows,
+            ).rowcount
+            if added < len(rows):
+                # Some were cached already, e.g. stored by two callers at once: refresh them.
+                self._conn.executemany(
+                    f"UPDATE {self.TABLE} SET {', '.join(f'{name} = ?' for name in values)} WHERE {self._where_key()}",
+                    [[row[position] for position in positions] for row in rows],
+                )
+            self._count += added
+            self._evict()
+            self._conn.commit()
+        return added
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                f"UPDATE {self.TABLE} SET last_used = ? WHERE {self._where_key()}",
+                [(used, *key) for key, used in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _evict(self) -> int:
+        """Delete the least recently used rows down to ``EVICT_TO`` of the cap once past it; returns how many."""
+        if self._count <= self.max_entries:
+            return 0
+
+        (self._count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()
+        if self._count <= self.max_entries:
+            return 0
+        deleted = self._conn.execute(
+            f"DELETE FROM {self.TABLE} WHERE rowid IN (SELECT rowid FROM {self.TABLE} ORDER BY last_used LIMIT ?)",
+            (self._count - int(self.max_entries * EVICT_TO),),
+        ).rowcount
+        self._count -= deleted
+        self.evictions += deleted
+        return deleted
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()
+        return count
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class SharedCache:
+    """One cache per process, opened on first use; ``get`` returns None while ``enabled`` is false."""
+
+    def __init__(self, factory, enabled: bool):
+        self.factory = factory
+        self.enabled = enabled
+        self.instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self.enabled:
+            return None
+
+        if self.instance is None:
+            with self._lock:
+                if self.instance is None:
+                    self.instance = self.factory()
+
+        return self.instance
@@ -0,0 +1,22 @@
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def token_counts(text: str):
+    """``(words and punctuation, characters)`` of ``text``; both add up when texts are joined with whitespace."""
+    text = text or ""
+    return len(TOKEN_PATTERN.findall(text)), len(text)
+
+
+def estimate_from_counts(words: int, chars: int) -> int:
+    """``estimate_tokens`` of a text from its ``token_counts``."""
+    if not chars:
+        return 0
+    return max(words, math.ceil(chars / 4))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count: words and punctuation, or ~4 characters per token, whichever is larger."""
+    return estimate_from_counts(*token_counts(text))
@@ -0,0 +1,125 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Seconds, from a cached lookup to a long generation.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Counts and lengths: chunks, tokens, characters.
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+_histograms = []
+# Stage timings and sizes of the request being handled, when it asked for them.
+_trace = ContextVar("rag_trace", default=None)
+
+
+class Histogram:
+    """Prometheus-style histogram with an optional single label; thread-safe."""
+
+    def __init__(self, name: str, help_text: str, buckets, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}
+        self._lock = threading.Lock()
+        _histograms.append(self)
+
+    def observe(self, value: float, label_value: str = ""):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((label_value, list(counts), total) for label_value, (counts, total) in self._series.items())
+
+        for label_value, counts, total in series:
+            labels = f'{self.label}="{label_value}"' if self.label else ""
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+QUERY_STAGE_SECONDS = Histogram(
+    "rag_query_stage_seconds", "Time spent in each stage of answering a query.", LATENCY_BUCKETS, label="stage"
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "rag_ingest_stage_seconds", "Time spent in each stage of ingesting one PDF.", LATENCY_BUCKETS, label="stage"
+)
+QUERY_SIZES = Histogram(
+    "rag_query_size", "Sizes per query: chunks requested and returned, prompt length, tokens.", SIZE_BUCKETS, label="field"
+)
+INGEST_SIZES = Histogram("rag_ingest_size", "Sizes per ingested PDF: chunks and images.", SIZE_BUCKETS, label="field")
+
+
+def start_trace():
+    """Collect stage timings and sizes for the current request (and tasks and threads it starts)."""
+    trace = {"timings_ms": {}, "sizes": {}}
+    _trace.set(trace)
+    return trace
+
+
+def record(stage: str, seconds: float, histogram: Histogram = QUERY_STAGE_SECONDS):
+    histogram.observe(seconds, stage)
+    trace = _trace.get()
+    if trace is not None and histogram is QUERY_STAGE_SECONDS:
+        timings = trace["timings_ms"]
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 3)
+
+
+def record_size(field: str, value, histogram: Histogram = QUERY_SIZES):
+    if value is None:
+        return
+    histogram.observe(value, field)
+    trace = _trace.get()
+    if trace is not None and histogram is QUERY_SIZES:
+        trace["sizes"][field] = value
+
+
+def add_to_trace(timings_ms=None, sizes=None):
+    """Add stage timings and sizes measured in another context, such as a shared batch, to this request's trace only."""
+    trace = _trace.get()
+    if trace is None:
+        return
+    timings = trace["timings_ms"]
+    for stage, milliseconds in (timings_ms or {}).items():
+        timings[stage] = round(timings.get(stage, 0.0) + milliseconds, 3)
+    trace["sizes"].update(sizes or {})
+
+
+class span:
+    """``with span("search"):`` records the block's duration as ``stage``."""
+
+    __slots__ = ("stage", "histogram", "started")
+
+    def __init__(self, stage: str, histogram: Histogram = QUERY_STAGE_SECONDS):
+        self.stage = stage
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.stage, time.perf_counter() - self.started, self.histogram)
+        return False
+
+
+def render_metrics() -> str:
+    """All histograms in the Prometheus text exposition format."""
+    lines = []
+    for histogram in _histograms:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+from RAG.embeddings.ollama_embed import DEFAULT_MODEL as EMBED_MODEL
+from RAG.generation.llm import DEFAULT_MODEL as GEN_MODEL
+from RAG.ollama_client import post_json, with_keep_alive
+from RAG.retrieval.retriever import IndexNotReadyError, preload_index
+
+# Load the index and its document metadata at startup instead of on the first query.
+PRELOAD_INDEX = os.getenv("PRELOAD_INDEX", "1").lower() not in {"0", "false", "no", "off"}
+# Ping the embedding and generation models at startup so Ollama loads them before the first query.
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "1").lower() not in {"0", "false", "no", "off"}
+
+_status = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "seconds": None,
+    "index": None,
+    "models": {},
+}
+_lock = threading.Lock()
+
+
+def _set(**fields):
+    with _lock:
+        _status.update(fields)
+
+
+def _warm_model(path: str, payload: dict, model: str):
+    started = time.perf_counter()
+    try:
+        post_json(path, with_keep_alive(payload), timeout=300)
+    except Exception as exc:
+        # Queries still work; they pay for the model load themselves.
+        print(f"[WARN] Warm-up of model '{model}' failed: {exc}")
+        result = f"error: {exc}"
+    else:
+        result = f"loaded in {time.perf_counter() - started:.2f}s"
+
+    with _lock:
+        _status["models"] = {**_status["models"], model: result}
+
+
+def warm_up(preload: bool = PRELOAD_INDEX, models: bool = WARMUP_MODELS):
+    """Load the index and the Ollama models once; ``status()["ready"]`` turns true when done.
+
+    Failures are reported in the status and logged, never raised: a missing
+    index or an unreachable Ollama leaves the first query to try again.
+    """
+    started = time.perf_counter()
+    _set(ready=False, started_at=time.time(), finished_at=None, seconds=None, index=None, models={})
+
+    if preload:
+        try:
+            _set(index=preload_index())
+        except IndexNotReadyError as exc:
+            print(f"[WARN] Index not preloaded: {exc}")
+            _set(index=f"not ready: {exc}")
+        except Exception as exc:
+            print(f"[WARN] Index preload failed: {exc}")
+            _set(index=f"error: {exc}")
+
+    if models:
+        _warm_model("/api/embed", {"model": EMBED_MODEL, "input": ["warm up"]}, EMBED_MODEL)
+        # An empty prompt only loads the model.
+        _warm_model("/api/generate", {"model": GEN_MODEL, "prompt": "", "stream": False}, GEN_MODEL)
+
+    _set(ready=True, finished_at=time.time(), seconds=round(time.perf_counter() - started, 4))
+    return status()
+
+
+def status():
+    with _lock:
+        return {**_status, "models": dict(_status["models"])}
@@ -1,8 +1,26 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.routes.ingest import router as ingest_router
 from app.routes.query import router
+from RAG.indexing.jobs import start_workers
+from RAG.ollama_client import aclose_async_client
+from RAG.warmup import warm_up
 
-app = FastAPI(title="Multi Model RAG API")
 
-app.include_router(router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve /health right away; /ready reports when the index and models are loaded.
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    # Ingestion jobs queued through POST /ingest run on background threads of this process.
+    start_workers()
+    yield
+    await aclose_async_client()
+
 
+app = FastAPI(title="Multi Model RAG API", lifespan=lifespan)
+
+app.include_router(router)
+app.include_router(ingest_router)
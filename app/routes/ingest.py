@@ -0,0 +1,42 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from RAG.indexing.collection import DEFAULT_COLLECTION
+from RAG.indexing.jobs import job_status, recent_jobs, submit_job
+
+router = APIRouter()
+
+
+class IngestRequest(BaseModel):
+    collection: str = Field(default=DEFAULT_COLLECTION, description="Collection whose data/raw folder to ingest")
+    full: bool = Field(default=False, description="Rebuild the index instead of updating it")
+    shards: Optional[int] = Field(default=None, ge=1, description="Split the collection over this many indexes")
+
+
+@router.post("/ingest")
+async def ingest(payload: IngestRequest):
+    try:
+        job, coalesced = await asyncio.to_thread(submit_job, payload.collection, payload.full, payload.shards)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    job["progress"].pop("files")
+    return JSONResponse({**job, "coalesced": coalesced}, status_code=202)
+
+
+@router.get("/ingest")
+async def ingest_jobs(limit: int = 20):
+    return {"jobs": await asyncio.to_thread(recent_jobs, limit)}
+
+
+@router.get("/ingest/{job_id}")
+async def ingest_job(job_id: str):
+    job = await asyncio.to_thread(job_status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No ingestion job {job_id}.")
+    return job
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import List, Literal, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from RAG.augmentation.prompt_builder import build_prompt
-from RAG.generation.llm import generate
-from RAG.retrieval.retriever import IndexNotReadyError, retrieve
+from RAG.augmentation.prompt_builder import PROMPT_TEMPLATE_VERSION, build_prompt
+from RAG.embeddings.cache import get_cache
+from RAG.generation.batch import BATCH_CONCURRENCY, aanswer_many
+from RAG.generation.llm import DEFAULT_MODEL as GEN_MODEL, agenerate, agenerate_stream
+from RAG.indexing.collection import DEFAULT_COLLECTION
+from RAG.retrieval import query_cache
+from RAG.retrieval.retriever import (
+    IndexNotReadyError,
+    aretrieve_with_ids,
+    collections_status,
+    index_status,
+    load_index,
+)
+from RAG.tracing import render_metrics, span, start_trace
+from RAG.warmup import status as warmup_status
 
 router = APIRouter()
 
@@ -11,24 +28,199 @@ router = APIRouter()
 class QueryRequest(BaseModel):
     q: str = Field(..., min_length=1, description="User question")
     top_k: int = Field(default=5, ge=1, le=20, description="Number of chunks to retrieve")
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = Field(
+        default=None, description="Retrieval mode; defaults to the server's RETRIEVAL_MODE"
+    )
+    rerank: Optional[bool] = Field(
+        default=None, description="Re-score a wider candidate set and keep the best top_k; defaults to RERANK"
+    )
+    timings: bool = Field(default=False, description="Include per-stage timings and sizes in the response")
+    source: Optional[str] = Field(default=None, description="Only search chunks of this PDF (path or file name)")
+    type: Optional[Literal["text", "table", "image"]] = Field(default=None, description="Only search this chunk type")
+    page_min: Optional[int] = Field(default=None, ge=0, description="Only search pages from this one on")
+    page_max: Optional[int] = Field(default=None, ge=0, description="Only search pages up to this one")
+    collection: Optional[Union[str, List[str]]] = Field(
+        default=None, description="Collection, or list of collections, to search; defaults to the default collection"
+    )
+
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=10000, description="Questions to answer")
+    top_k: int = Field(default=5, ge=1, le=20, description="Number of chunks to retrieve per question")
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = Field(
+        default=None, description="Retrieval mode; defaults to the server's RETRIEVAL_MODE"
+    )
+    rerank: Optional[bool] = Field(
+        default=None, description="Re-score a wider candidate set and keep the best top_k; defaults to RERANK"
+    )
+    source: Optional[str] = Field(default=None, description="Only search chunks of this PDF (path or file name)")
+    type: Optional[Literal["text", "table", "image"]] = Field(default=None, description="Only search this chunk type")
+    page_min: Optional[int] = Field(default=None, ge=0, description="Only search pages from this one on")
+    page_max: Optional[int] = Field(default=None, ge=0, description="Only search pages up to this one")
+    collection: Optional[Union[str, List[str]]] = Field(
+        default=None, description="Collection, or list of collections, to search; defaults to the default collection"
+    )
+    concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, le=64, description="Answers generated at once")
+    include_sources: bool = Field(default=True, description="Return the retrieved chunks with each answer")
+
+
+def _filters(source=None, doc_type=None, page_min=None, page_max=None):
+    filters = {"source": source, "type": doc_type, "page_min": page_min, "page_max": page_max}
+    return {name: value for name, value in filters.items() if value is not None} or None
+
+
+def _payload_filters(payload):
+    return _filters(payload.source, payload.type, payload.page_min, payload.page_max)
+
+
+def _answer_key(question: str, top_k: int, doc_ids):
+    return query_cache.answer_key(question, top_k, doc_ids, GEN_MODEL, PROMPT_TEMPLATE_VERSION)
+
+
+async def _run_query(
+    question: str, top_k: int, mode=None, rerank=None, timings: bool = False, filters=None, collections=None
+):
+    trace = start_trace() if timings else None
+
+    with span("total"):
+        doc_ids, docs = await aretrieve_with_ids(
+            question, k=top_k, mode=mode, rerank=rerank, filters=filters, collections=collections
+        )
+        key = _answer_key(question, top_k, doc_ids)
+
+        answer = query_cache.answers.get(key)
+        if answer is None:
+            prompt = build_prompt(question, docs)
+            answer = await agenerate(prompt)
+            query_cache.answers.put(key, answer)
+
+    result = {"answer": answer, "sources": docs}
+    if trace is not None:
+        result["timings"] = trace
+    return result
+
+
+async def _stream_query(question: str, top_k: int, mode=None, rerank=None, filters=None, collections=None):
+    # Retrieval runs before the response starts so its errors still map to HTTP status codes.
+    doc_ids, docs = await aretrieve_with_ids(
+        question, k=top_k, mode=mode, rerank=rerank, filters=filters, collections=collections
+    )
+    key = _answer_key(question, top_k, doc_ids)
+    cached = query_cache.answers.get(key)
 
+    async def events():
+        yield json.dumps({"type": "sources", "sources": docs}) + "\n"
 
-def _run_query(question: str, top_k: int):
-    docs = retrieve(question, k=top_k)
-    prompt = build_prompt(question, docs)
-    answer = generate(prompt)
-    return {"answer": answer, "sources": docs}
+        if cached is not None:
+            yield json.dumps({"type": "token", "text": cached}) + "\n"
+            yield json.dumps({"type": "done"}) + "\n"
+            return
+
+        tokens = []
+        try:
+            async for token in agenerate_stream(build_prompt(question, docs)):
+                tokens.append(token)
+                yield json.dumps({"type": "token", "text": token}) + "\n"
+        except Exception as exc:
+            yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+            return
+
+        query_cache.answers.put(key, "".join(tokens).strip())
+        yield json.dumps({"type": "done"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def _stream_batch(payload: BatchQueryRequest):
+    # The first group is retrieved before the response starts so index errors still map to HTTP status codes.
+    results = await aanswer_many(
+        payload.questions,
+        top_k=payload.top_k,
+        mode=payload.mode,
+        rerank=payload.rerank,
+        filters=_payload_filters(payload),
+        collections=payload.collection,
+        concurrency=payload.concurrency,
+    )
+
+    async def events():
+        async for result in results:
+            if not payload.include_sources:
+                result.pop("sources", None)
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"type": "done", "count": len(payload.questions)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 
 @router.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@router.get("/ready")
+async def ready():
+    status = warmup_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    embedding_cache = get_cache()
+    return {
+        "query_vectors": query_cache.query_vectors.stats(),
+        "answers": query_cache.answers.stats(),
+        "embeddings": embedding_cache.stats() if embedding_cache is not None else None,
+    }
+
+
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/collections")
+async def collections():
+    return {"collections": await asyncio.to_thread(collections_status)}
+
+
+@router.get("/admin/index")
+async def admin_index(collection: str = DEFAULT_COLLECTION):
+    try:
+        return await asyncio.to_thread(index_status, collection)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@router.post("/admin/index/reload")
+async def admin_index_reload(collection: str = DEFAULT_COLLECTION):
+    try:
+        await asyncio.to_thread(load_index, True, collection)
+    except IndexNotReadyError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return index_status(collection)
+
+
 @router.get("/query")
-def ask_query(q: str, top_k: int = 5):
+async def ask_query(
+    q: str,
+    top_k: int = 5,
+    mode: Optional[str] = None,
+    rerank: Optional[bool] = None,
+    timings: bool = False,
+    source: Optional[str] = None,
+    type: Optional[str] = None,
+    page_min: Optional[int] = None,
+    page_max: Optional[int] = None,
+    collection: Optional[List[str]] = Query(default=None),
+):
     try:
-        return _run_query(q, top_k)
+        filters = _filters(source, type, page_min, page_max)
+        return await _run_query(q, top_k, mode, rerank, timings, filters, collection)
     except IndexNotReadyError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except ValueError as exc:
@@ -38,9 +230,17 @@ def ask_query(q: str, top_k: int = 5):
 
 
 @router.post("/query")
-def ask(payload: QueryRequest):
+async def ask(payload: QueryRequest):
     try:
-        return _run_query(payload.q, payload.top_k)
+        return await _run_query(
+            payload.q,
+            payload.top_k,
+            payload.mode,
+            payload.rerank,
+            payload.timings,
+            _payload_filters(payload),
+            payload.collection,
+        )
     except IndexNotReadyError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except ValueError as exc:
@@ -48,3 +248,28 @@ def ask(payload: QueryRequest):
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
+
+@router.post("/query/stream")
+async def ask_stream(payload: QueryRequest):
+    try:
+        return await _stream_query(
+            payload.q, payload.top_k, payload.mode, payload.rerank, _payload_filters(payload), payload.collection
+        )
+    except IndexNotReadyError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/query/batch")
+async def ask_batch(payload: BatchQueryRequest):
+    try:
+        return await _stream_batch(payload)
+    except IndexNotReadyError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
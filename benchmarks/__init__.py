@@ -0,0 +1 @@
+# Benchmark scripts run against a local fake Ollama server.
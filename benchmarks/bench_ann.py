@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from RAG.indexing.index_types import INDEX_TYPES, index_config, make_index
+
+
+def synthetic_corpus(count: int, dim: int, clusters: int, seed: int = 0):
+    """Gaussian blobs around random unit centres, roughly like topic-clustered text embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype("float32")
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centres[labels] + 0.35 * rng.standard_normal((count, dim)).astype("float32") / np.sqrt(dim)
+    return np.ascontiguousarray(vectors, dtype="float32")
+
+
+def recall_at_k(truth, found, k: int):
+    hits = sum(len(set(t[:k]) & set(f[:k])) for t, f in zip(truth, found))
+    return hits / (len(truth) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/QPS/memory of ANN index types vs the flat baseline.")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.count + args.queries, args.dim, args.clusters)
+    vectors, queries = corpus[: args.count], corpus[args.count:]
+    ids = np.arange(args.count, dtype="int64")
+
+    print(f"corpus={args.count} dim={args.dim} queries={args.queries} k={args.k}\n")
+    print(f"{'type':<10}{'build s':>10}{f'recall@{args.k}':>12}{'QPS':>12}{'bytes/vec':>12}")
+
+    truth = None
+    for index_type in ["flat", *[t for t in args.types if t != "flat"]]:
+        config = index_config(index_type)
+
+        started = time.perf_counter()
+        index = make_index(args.dim, config, vectors)
+        index.add_with_ids(vectors, ids)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, found = index.search(queries, args.k)
+        qps = len(queries) / (time.perf_counter() - started)
+
+        if truth is None:
+            truth = found
+        bytes_per_vector = faiss.serialize_index(index).nbytes / index.ntotal
+
+        print(
+            f"{index_type:<10}{build_seconds:>10.2f}{recall_at_k(truth, found, args.k):>12.3f}"
+            f"{qps:>12.0f}{bytes_per_vector:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+import httpx
+import uvicorn
+
+from app.main import app
+from benchmarks.common import fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.indexing.build_index import build_index
+
+
+def start_api():
+    # Clients share this process; starved of CPU they can take longer than uvicorn's default 5 s keep-alive to
+    # reuse a connection, which the server would close under them.
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", timeout_keep_alive=60)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.05)
+
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def run_clients(base_url: str, clients: int, requests_per_client: int, questions):
+    latencies = []
+
+    async def client_loop(client_id: int, http: httpx.AsyncClient):
+        for i in range(requests_per_client):
+            question = questions[(client_id * requests_per_client + i) % len(questions)]
+            started = time.perf_counter()
+            response = await http.post("/query", json={"q": question, "top_k": 5})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client_id, http) for client_id in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test POST /query against a stub Ollama.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=8, help="Requests per client.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub Ollama latency per call (s).")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    with FakeOllama(latency=args.latency, per_item=0.0, token_delay=args.token_delay) as ollama:
+        point_clients_at(ollama.base_url)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index_dir = Path(tmp)
+            build_index(fixture_docs(args.docs), save_path=index_dir)
+            use_index_dir(index_dir)
+
+            server, thread, base_url = start_api()
+            questions = [f"section {i} revenue margin" for i in range(500)]
+
+            print(f"{'clients':>8}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+            try:
+                for clients in args.clients:
+                    latencies, elapsed = asyncio.run(run_clients(base_url, clients, args.requests, questions))
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000
+                    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+                    print(f"{clients:>8}{len(latencies):>10}{p50:>10.1f}{p99:>10.1f}{len(latencies) / elapsed:>10.1f}")
+            finally:
+                server.should_exit = True
+                thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+from benchmarks.common import fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.indexing.build_index import build_index
+from RAG.ollama_client import aclose_async_client
+from RAG.retrieval import query_cache, retriever
+from RAG.retrieval.batcher import BATCH_MAX_SIZE, BATCH_WINDOW_MS
+
+
+def configure(window_ms: float, max_size: int):
+    for batcher in (retriever.embed_batcher, retriever.search_batcher):
+        batcher.window_ms = window_ms
+        batcher.max_size = max_size
+        batcher.batches = 0
+        batcher.items = 0
+
+
+async def run_clients(clients: int, queries_per_client: int, k: int, mode: str, offset: int):
+    """``clients`` concurrent loops of ``aretrieve_with_ids``; every question is new, so each one is embedded."""
+    latencies = []
+
+    async def client_loop(client_id: int):
+        for i in range(queries_per_client):
+            question = f"question {offset + client_id * queries_per_client + i} quarter revenue margin guidance"
+            started = time.perf_counter()
+            await retriever.aretrieve_with_ids(question, k, mode=mode)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client_loop(client_id) for client_id in range(clients)))
+    finally:
+        await aclose_async_client()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async query throughput by concurrency, with and without batching.")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--queries", type=int, default=1024, help="Queries per run, split over the clients.")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--mode", choices=retriever.RETRIEVAL_MODES, default="dense")
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated Ollama latency per request (s).")
+    parser.add_argument("--per-item", type=float, default=0.0005, help="Simulated latency per embedded text (s).")
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument("--max-size", type=int, default=max(2, BATCH_MAX_SIZE))
+    args = parser.parse_args()
+
+    with FakeOllama(latency=args.latency, per_item=args.per_item) as ollama, tempfile.TemporaryDirectory() as tmp:
+        point_clients_at(ollama.base_url)
+        ollama.latency = ollama.per_item = 0.0
+        build_index(fixture_docs(args.docs), save_path=Path(tmp))
+        ollama.latency, ollama.per_item = args.latency, args.per_item
+        use_index_dir(Path(tmp))
+        retriever.preload_index()
+
+        print(
+            f"docs={args.docs} mode={args.mode} k={args.k} ollama={args.latency * 1000:.0f}ms"
+            f"+{args.per_item * 1000:.1f}ms/text cpus={os.cpu_count()}\n"
+        )
+        print(
+            f"{'clients':>7}  {'batching':<16}{'q/s':>8}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'embed reqs':>12}{'embed batch':>13}{'search batch':>14}"
+        )
+        offset = 0
+        for clients in args.clients:
+            per_client = max(1, args.queries // clients)
+            for label, window_ms, max_size in (
+                ("off", args.window_ms, 1),
+                (f"{args.window_ms:g} ms / {args.max_size}", args.window_ms, args.max_size),
+            ):
+                configure(window_ms, max_size)
+                query_cache.query_vectors.clear()
+                ollama.reset_counters()
+                latencies, elapsed = asyncio.run(run_clients(clients, per_client, args.k, args.mode, offset))
+                offset += clients * per_client
+
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                embed_batch = retriever.embed_batcher.stats()["avg_batch"] if max_size > 1 else 1.0
+                search_batch = retriever.search_batcher.stats()["avg_batch"] if max_size > 1 else 1.0
+                print(
+                    f"{clients:>7}  {label:<16}{len(latencies) / elapsed:>8.0f}"
+                    f"{statistics.median(latencies) * 1000:>9.1f}{p99 * 1000:>9.1f}"
+                    f"{ollama.requests:>12}{embed_batch:>13.1f}{search_batch:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import fitz
+
+from benchmarks.common import WORDS
+from RAG.indexing.chunker import CHUNK_MAX_TOKENS, chunk_layout, chunk_text
+from RAG.indexing.pdf_loader import load_pdf
+from RAG.tokens import estimate_tokens
+
+
+def paragraph(rng: random.Random):
+    sentences = []
+    for _ in range(rng.randint(1, 6)):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def make_pdf(path: Path, pages: int, seed: int = 0):
+    """Pages of headed paragraphs of varying length, laid out as separate text blocks."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        y = 40
+        page.insert_text((40, y), f"Section {page_no + 1}", fontsize=12)
+        y += 24
+        while y < 740:
+            rect = fitz.Rect(40, y, 560, min(y + 160, 800))
+            left = page.insert_textbox(rect, paragraph(rng), fontsize=9)
+            y += rect.height - max(left, 0) + 12
+    doc.save(str(path))
+    doc.close()
+
+
+def cut_edges(chunks):
+    """Share of chunk edges inside a sentence: starting lowercase or ending on a bare word."""
+    cuts = 0
+    for doc in chunks:
+        text = doc["content"]
+        cuts += text[:1].isalnum() and text[:1].islower()
+        cuts += text[-1:].isalnum()
+    return cuts / (2 * len(chunks)) if chunks else 0.0
+
+
+def measure(label, chunk, pages, repeats: int):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        chunks = chunk(pages)
+    seconds = (time.perf_counter() - started) / repeats
+
+    tokens = [estimate_tokens(doc["content"]) for doc in chunks]
+    total = sum(tokens)
+    print(
+        f"{label:<8}{len(chunks):>8}{len(chunks) / seconds:>12.0f}{len(pages) / seconds:>10.0f}"
+        f"{total / len(chunks):>9.0f}{max(tokens):>9}{total:>10}{cut_edges(chunks):>11.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-window vs layout-aware chunking of the same PDF.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "report.pdf"
+        make_pdf(path, args.pages)
+
+        started = time.perf_counter()
+        plain = load_pdf(str(path))
+        plain_load = time.perf_counter() - started
+        started = time.perf_counter()
+        blocks = load_pdf(str(path), blocks=True)
+        blocks_load = time.perf_counter() - started
+
+    print(f"pages={args.pages} max_tokens={args.max_tokens}")
+    print(f"load: text {plain_load:.2f}s, blocks {blocks_load:.2f}s\n")
+    print(
+        f"{'chunker':<8}{'chunks':>8}{'chunks/s':>12}{'pages/s':>10}{'avg tok':>9}"
+        f"{'max tok':>9}{'tokens':>10}{'cut edges':>11}"
+    )
+    measure("fixed", chunk_text, plain, args.repeats)
+    measure("layout", lambda pages: chunk_layout(pages, args.max_tokens), blocks, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
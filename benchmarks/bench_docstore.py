@@ -0,0 +1,75 @@
+import argparse
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from RAG.indexing.doc_store import DocStore, write_doc_store
+
+
+def synthetic_docs(count: int, chars: int):
+    words = "revenue margin growth table figure quarter segment operating cash flow".split()
+    rng = random.Random(0)
+    docs = {}
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(chars // 7))
+        docs[rng.getrandbits(63)] = {
+            "content": text,
+            "page": i % 300,
+            "type": ("text", "table", "image")[i % 3],
+            "source": f"/app/data/raw/report_{i % 50}.pdf",
+        }
+    return docs
+
+
+def measure(label, load, lookup, doc_ids):
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = load()
+    load_ms = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for start in range(0, len(doc_ids), 5):
+        lookup(store, doc_ids[start:start + 5])
+    lookup_us = (time.perf_counter() - started) * 1e6 / (len(doc_ids) / 5)
+
+    print(f"{label:<12}{load_ms:>12.1f}{peak / 2**20:>14.1f}{lookup_us:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and heap use: meta.pkl vs document store.")
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--chars", type=int, default=800)
+    args = parser.parse_args()
+
+    docs = synthetic_docs(args.docs, args.chars)
+    doc_ids = random.Random(1).sample(list(docs), 5000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        with (tmp_dir / "meta.pkl").open("wb") as f:
+            pickle.dump(docs, f)
+        write_doc_store(tmp_dir / "docstore", docs)
+        del docs
+
+        def load_pickle():
+            with (tmp_dir / "meta.pkl").open("rb") as f:
+                return pickle.load(f)
+
+        print(f"docs={args.docs} avg chars={args.chars}\n")
+        print(f"{'store':<12}{'load ms':>12}{'heap MiB':>14}{'fetch k=5 us':>16}")
+        measure("meta.pkl", load_pickle, lambda store, ids: [store.get(i) for i in ids], doc_ids)
+        measure("docstore", lambda: DocStore(tmp_dir / "docstore"), DocStore.get_many, doc_ids)
+
+
+if __name__ == "__main__":
+    main()
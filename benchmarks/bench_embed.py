@@ -0,0 +1,69 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.embeddings import cache as embedding_cache
+from RAG.embeddings.cache import EmbeddingCache
+from RAG.embeddings.ollama_embed import embed, embed_many
+
+
+def make_chunks(count: int):
+    return [f"chunk {i} revenue margin table page {i % 97} section {i % 13}" for i in range(count)]
+
+
+def run(chunks, batch_size: int, concurrency: int, use_cache: bool = False):
+    started = time.perf_counter()
+    vectors = embed_many(chunks, batch_size=batch_size, concurrency=concurrency, use_cache=use_cache)
+    elapsed = time.perf_counter() - started
+    assert len(vectors) == len(chunks)
+    return len(chunks) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput against a fake Ollama server.")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated round trip per request (s).")
+    parser.add_argument("--per-item", type=float, default=0.001, help="Simulated model time per input (s).")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64, 128])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+
+    with FakeOllama(latency=args.latency, per_item=args.per_item) as server:
+        point_clients_at(server.base_url)
+
+        baseline_chunks = chunks[: min(len(chunks), 200)]
+        started = time.perf_counter()
+        for chunk in baseline_chunks:
+            embed(chunk, use_cache=False)
+        baseline = len(baseline_chunks) / (time.perf_counter() - started)
+        print(f"{'mode':<28}{'chunks/s':>12}{'speedup':>10}")
+        print(f"{'per-chunk embed()':<28}{baseline:>12.1f}{1.0:>10.1f}")
+
+        for concurrency in args.concurrency:
+            for batch_size in args.batch_sizes:
+                rate = run(chunks, batch_size, concurrency)
+                label = f"batch={batch_size} conc={concurrency}"
+                print(f"{label:<28}{rate:>12.1f}{rate / baseline:>10.1f}")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            embedding_cache._shared.instance = EmbeddingCache(Path(cache_dir) / "embeddings.sqlite")
+            run(chunks, 32, 4, use_cache=True)
+            server.reset_counters()
+            rate = run(chunks, 32, 4, use_cache=True)
+            label = "re-ingest (cached)"
+            print(f"{label:<28}{rate:>12.1f}{rate / baseline:>10.1f}  ({server.items} texts sent to Ollama)")
+            embedding_cache._shared.instance.close()
+            embedding_cache._shared.instance = None
+
+
+if __name__ == "__main__":
+    main()
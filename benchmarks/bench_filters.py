@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+from benchmarks.common import fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.embeddings.ollama_embed import embed_many
+from RAG.indexing.build_index import build_index
+from RAG.indexing.index_types import INDEX_TYPES
+from RAG.retrieval import retriever
+
+FILTERS = (
+    ("none", None),
+    ("type=table", {"type": "table"}),
+    ("one source", {"source": "report_7.pdf"}),
+    ("source+pages", {"source": "report_7.pdf", "page_min": 10, "page_max": 19}),
+)
+
+
+def matches(doc, filters):
+    if not filters:
+        return True
+    if "type" in filters and doc["type"] != filters["type"]:
+        return False
+    if "source" in filters and Path(doc["source"]).name != filters["source"]:
+        return False
+    page = doc.get("page")
+    if "page_min" in filters and (page is None or page < filters["page_min"]):
+        return False
+    if "page_max" in filters and (page is None or page > filters["page_max"]):
+        return False
+    return True
+
+
+def filtered(shards, vectors, k: int, filter_key):
+    # One query at a time, the way /query searches.
+    return [retriever._search(shards, vector, k, filter_key=filter_key)[1] for vector in vectors]
+
+
+def post_filtered(shards, vectors, k: int, filters, oversample: int):
+    """The old way: search everything for ``k * oversample`` and drop what does not match."""
+    return [
+        [doc for doc in retriever._search(shards, vector, k * oversample)[1] if matches(doc, filters)][:k]
+        for vector in vectors
+    ]
+
+
+def timed(run, repeats: int):
+    run()  # builds and caches the filter's selection
+    started = time.perf_counter()
+    for _ in range(repeats):
+        results = run()
+    return results, (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtered search inside FAISS vs post-filtering, per index type.")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--sources", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversample", type=int, default=10, help="Post-filter fetches k times this many.")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=["flat", "ivf_flat", "hnsw"])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    docs = fixture_docs(args.docs, sources=args.sources)
+    questions = [f"quarter {i} revenue margin guidance for region {i % 7}" for i in range(args.queries)]
+    matching = {label: sum(matches(doc, filters) for doc in docs) for label, filters in FILTERS}
+
+    with FakeOllama(latency=0.0, per_item=0.0) as ollama:
+        point_clients_at(ollama.base_url)
+        vectors = embed_many(questions)
+        print(f"docs={args.docs} sources={args.sources} queries={args.queries} k={args.k}\n")
+        print(
+            f"{'index':<10}{'filter':<14}{'matching':>10}{'ms/query':>10}{'filled':>8}{'post ms':>9}{'post filled':>13}"
+        )
+
+        for index_type in args.types:
+            with tempfile.TemporaryDirectory() as tmp:
+                build_index(docs, save_path=Path(tmp), index_type=index_type)
+                use_index_dir(Path(tmp))
+                shards = retriever._ready_shards()
+
+                for label, filters in FILTERS:
+                    key = retriever._filter_key(filters)
+                    results, seconds = timed(lambda: filtered(shards, vectors, args.k, key), args.repeats)
+                    if any(not matches(doc, filters) for found in results for doc in found):
+                        raise SystemExit(f"{index_type}/{label}: a result does not match the filter")
+                    filled = sum(len(found) for found in results) / (args.k * len(results))
+
+                    if filters:
+                        post, post_seconds = timed(
+                            lambda: post_filtered(shards, vectors, args.k, filters, args.oversample), args.repeats
+                        )
+                        post_filled = sum(len(found) for found in post) / (args.k * len(post))
+                        post_columns = f"{post_seconds * 1000 / len(vectors):>9.3f}{post_filled:>13.2f}"
+                    else:
+                        post_columns = f"{'-':>9}{'-':>13}"
+
+                    print(
+                        f"{index_type:<10}{label:<14}{matching[label]:>10}{seconds * 1000 / len(vectors):>10.3f}"
+                        f"{filled:>8.2f}{post_columns}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
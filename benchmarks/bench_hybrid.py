@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+from benchmarks.common import fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.embeddings.ollama_embed import embed_many
+from RAG.indexing.build_index import build_index
+from RAG.indexing.lexical import LexicalIndex, write_lexical_index
+from RAG.retrieval import retriever
+
+
+def corpus_with_part_numbers(count: int):
+    docs = fixture_docs(count)
+    for i, doc in enumerate(docs):
+        doc["content"] += f" part PN-{10000 + i} unit price {i % 97}.{i % 10}0 EUR"
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense vs BM25 vs hybrid retrieval on a fixture corpus.")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = corpus_with_part_numbers(args.docs)
+    targets = random.Random(0).sample(range(args.docs), args.queries)
+    questions = [f"what is the unit price of PN-{10000 + i}" for i in targets]
+
+    with FakeOllama(latency=0.0, per_item=0.0) as ollama, tempfile.TemporaryDirectory() as tmp:
+        point_clients_at(ollama.base_url)
+        index_dir = Path(tmp)
+        build_index(docs, save_path=index_dir)
+
+        started = time.perf_counter()
+        write_lexical_index(index_dir / "lexical_rebuild", dict(enumerate(docs)))
+        lexical_build = time.perf_counter() - started
+        LexicalIndex(index_dir / "lexical_rebuild")
+
+        use_index_dir(index_dir)
+        shards = retriever._ready_shards()
+        vectors = embed_many(questions)
+
+        print(f"docs={args.docs} queries={args.queries} k={args.k}")
+        print(f"lexical index build: {lexical_build:.2f}s\n")
+        print(f"{'mode':<10}{'hit@k':>8}{'ms/query':>10}")
+
+        for mode in retriever.RETRIEVAL_MODES:
+            hits = 0
+            started = time.perf_counter()
+            for target, question, vector in zip(targets, questions, vectors):
+                _, found = retriever._search(shards, vector, args.k, query=question, mode=mode)
+                hits += any(f"PN-{10000 + target} " in doc["content"] for doc in found)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / len(questions)
+            print(f"{mode:<10}{hits / len(questions):>8.3f}{elapsed_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+os.environ.setdefault("CAPTION_CACHE", "0")
+
+import fitz
+import numpy as np
+
+from benchmarks.common import WORDS
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.indexing.build_index import embed_source, file_digest
+from RAG.indexing.pipeline import iter_pipeline
+from RAG.multimodel.caption_pipeline import Captioner
+from scripts.ingest import process_pdf
+
+
+def noise_image(seed: int, size: int = 96):
+    samples = np.random.default_rng(seed).integers(0, 256, size * size * 3, dtype="uint8").tobytes()
+    return fitz.Pixmap(fitz.csRGB, size, size, samples, False)
+
+
+def make_pdfs(out_dir: Path, count: int, pages: int, images_per_page: int):
+    """PDFs whose pages carry distinct images plus the same logo on every page."""
+    logo = noise_image(seed=-1 % 2**32)
+    paths = []
+    for i in range(count):
+        doc = fitz.open()
+        for page_no in range(pages):
+            page = doc.new_page()
+            words = [WORDS[(i + page_no + n) % len(WORDS)] for n in range(400)]
+            page.insert_textbox(fitz.Rect(40, 40, 560, 600), " ".join(words), fontsize=9)
+            page.insert_image(fitz.Rect(500, 20, 560, 80), pixmap=logo)
+            for n in range(images_per_page):
+                pixmap = noise_image(seed=(i * pages + page_no) * images_per_page + n)
+                page.insert_image(fitz.Rect(40 + n * 80, 620, 110 + n * 80, 690), pixmap=pixmap)
+        path = out_dir / f"doc_{i:03d}.pdf"
+        doc.save(str(path))
+        doc.close()
+        paths.append(str(path))
+    return paths
+
+
+def sequential(pdf_files):
+    captioner = Captioner()
+    for pdf_path in pdf_files:
+        docs = process_pdf(pdf_path, captioner=captioner, caption_workers=1)
+        embed_source(pdf_path, file_digest(pdf_path), docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pipelined ingestion against a fake Ollama.")
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--images-per-page", type=int, default=2)
+    parser.add_argument("--caption-latency", type=float, default=0.05)
+    parser.add_argument("--parse-workers", type=int, default=4)
+    parser.add_argument("--caption-workers", type=int, default=4)
+    parser.add_argument("--embed-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with FakeOllama(latency=args.caption_latency, per_item=0.0005) as ollama, tempfile.TemporaryDirectory() as tmp:
+        point_clients_at(ollama.base_url)
+        pdf_files = make_pdfs(Path(tmp), args.pdfs, args.pages, args.images_per_page)
+        os.chdir(tmp)
+
+        started = time.perf_counter()
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            sequential(pdf_files)
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in iter_pipeline(
+            pdf_files,
+            parse_workers=args.parse_workers,
+            caption_workers=args.caption_workers,
+            embed_workers=args.embed_workers,
+        ):
+            pass
+        pipelined_seconds = time.perf_counter() - started
+
+    print(f"\n{'mode':<12}{'seconds':>10}{'PDFs/s':>10}")
+    print(f"{'sequential':<12}{sequential_seconds:>10.2f}{args.pdfs / sequential_seconds:>10.2f}")
+    print(f"{'pipelined':<12}{pipelined_seconds:>10.2f}{args.pdfs / pipelined_seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
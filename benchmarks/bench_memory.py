@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+os.environ.setdefault("CAPTION_CACHE", "0")
+
+import fitz
+
+from benchmarks.common import WORDS
+
+PAGES_PER_PDF = 100
+
+
+def make_corpus(out_dir: Path, pages: int):
+    """Text-only PDFs of ``PAGES_PER_PDF`` pages, about 2,500 characters per page."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for i in range((pages + PAGES_PER_PDF - 1) // PAGES_PER_PDF):
+        path = out_dir / f"archive_{i:04d}.pdf"
+        if path.exists():
+            continue
+        doc = fitz.open()
+        for page_no in range(min(PAGES_PER_PDF, pages - i * PAGES_PER_PDF)):
+            page = doc.new_page()
+            words = [WORDS[(i * 31 + page_no * 7 + n * n) % len(WORDS)] for n in range(380)]
+            page.insert_textbox(fitz.Rect(40, 40, 560, 800), f"archive {i} page {page_no} " + " ".join(words), fontsize=8)
+        doc.save(str(path))
+        doc.close()
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale / 2**20
+
+
+def worker(corpus_dir: Path, pdfs: int, index_type: str, dim: int):
+    from benchmarks.fake_ollama import FakeOllama, point_clients_at
+    from RAG.indexing.versions import version_dir
+    from scripts.ingest import ingest_all
+
+    with FakeOllama(latency=0.0, per_item=0.0, dim=dim) as ollama, tempfile.TemporaryDirectory() as tmp:
+        point_clients_at(ollama.base_url)
+        raw_dir = Path(tmp) / "raw"
+        raw_dir.mkdir()
+        for path in sorted(corpus_dir.glob("*.pdf"))[:pdfs]:
+            (raw_dir / path.name).symlink_to(path)
+
+        started = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            chunks = ingest_all(raw_dir, incremental=False, index_type=index_type, save_path=Path(tmp) / "index")
+        seconds = time.perf_counter() - started
+        index_mb = (version_dir(Path(tmp) / "index") / "index.bin").stat().st_size / 2**20
+
+    print(
+        json.dumps(
+            {
+                "chunks": chunks,
+                "seconds": seconds,
+                "index_mb": index_mb,
+                "peak_mb": peak_rss_mb(),
+                "worker_peak_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of a full ingest at growing corpus sizes.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[2500, 5000, 10000])
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--corpus-dir", type=Path, help="Reuse generated PDFs between runs.")
+    parser.add_argument("--worker", nargs=1, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.corpus_dir, args.worker[0], args.index_type, args.dim)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or Path(tmp) / "corpus"
+        make_corpus(corpus_dir, max(args.pages))
+
+        print(f"{'pages':>8}{'chunks':>9}{'seconds':>9}{'index MB':>10}{'peak MB':>9}{'worker MB':>11}")
+        for pages in args.pages:
+            # A fresh interpreter per size so each peak is measured from zero.
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    str((pages + PAGES_PER_PDF - 1) // PAGES_PER_PDF),
+                    "--corpus-dir",
+                    str(corpus_dir),
+                    "--index-type",
+                    args.index_type,
+                    "--dim",
+                    str(args.dim),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{pages:>8}{result['chunks']:>9}{result['seconds']:>9.1f}{result['index_mb']:>10.1f}"
+                f"{result['peak_mb']:>9.0f}{result['worker_peak_mb']:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pandas as pd
+
+from benchmarks.common import WORDS
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.augmentation.prompt_builder import build_prompt_with_stats
+from RAG.generation.llm import generate
+from RAG.indexing.chunker import split_text
+from RAG.multimodel.table_parser import table_to_text
+from RAG.tokens import estimate_tokens
+
+
+def unpacked_prompt(query, docs):
+    """The prompt as it was built before context packing: every chunk, whole."""
+    context = "\n\n".join([f"[{d['type']} | page {d['page']}]\n{d['content']}" for d in docs])
+    return f"""
+    You are a multimodal document analyst.
+
+    Use text, tables and image descriptions to answer.
+
+    Context:
+    {context}
+
+    Question:
+    {query}
+
+    Answer with page references.
+    """
+
+
+def retrieved_docs(top_k: int, seed: int = 0):
+    """Results the way retrieval tends to return them: neighbouring chunks of a few pages plus tables."""
+    rng = random.Random(seed)
+    docs = []
+    pages = 0
+
+    while len(docs) < top_k:
+        page_text = " ".join(rng.choice(WORDS) for _ in range(700))
+        chunks = split_text(page_text)
+        start = rng.randrange(max(1, len(chunks) - 3))
+        for chunk in chunks[start:start + 3]:
+            docs.append({"content": chunk, "page": pages, "type": "text", "source": "report.pdf"})
+        if pages % 2 == 0:
+            table = pd.DataFrame(
+                {
+                    "region": [rng.choice(WORDS) for _ in range(120)],
+                    "revenue": [rng.randrange(10**6) for _ in range(120)],
+                    "margin": [round(rng.random(), 3) for _ in range(120)],
+                }
+            )
+            docs.append({"content": table_to_text(table), "page": pages, "type": "table", "source": "report.pdf"})
+        pages += 1
+
+    rng.shuffle(docs)
+    return docs[:top_k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and generation latency with and without context packing.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument(
+        "--prefill-per-char", type=float, default=0.00005, help="Stub Ollama prefill seconds per prompt character."
+    )
+    args = parser.parse_args()
+
+    query = "How did revenue and margin develop per region?"
+
+    with FakeOllama(latency=0.01, prefill_per_char=args.prefill_per_char) as ollama:
+        point_clients_at(ollama.base_url)
+
+        print(f"{'top_k':>6}{'context':>10}{'tokens':>10}{'pack ms':>10}{'gen ms':>10}")
+        for top_k in args.top_k:
+            docs = retrieved_docs(top_k)
+
+            for label, build in (
+                ("before", lambda: unpacked_prompt(query, docs)),
+                ("after", lambda: build_prompt_with_stats(query, docs, args.budget)[0]),
+            ):
+                started = time.perf_counter()
+                prompt = build()
+                pack_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                generate(prompt)
+                gen_ms = (time.perf_counter() - started) * 1000
+
+                print(f"{top_k:>6}{label:>10}{estimate_tokens(prompt):>10}{pack_ms:>10.2f}{gen_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.bench_ann import recall_at_k, synthetic_corpus
+from RAG.indexing.index_types import apply_search_params, index_config, make_index, train_sample_size
+
+# (label, index type, params); the first is the float32 L2 flat index built before storage options existed.
+SCHEMES = (
+    ("flat f32 l2", "flat", {"storage": "float32", "metric": "l2"}),
+    ("flat f32", "flat", {"storage": "float32"}),
+    ("flat fp16", "flat", {"storage": "fp16"}),
+    ("flat int8", "flat", {"storage": "int8"}),
+    ("pca256 fp16", "flat", {"storage": "fp16", "reduce": "pca", "reduce_dim": 256}),
+    ("opq256 int8", "flat", {"storage": "int8", "reduce": "opq", "reduce_dim": 256}),
+    ("hnsw f32", "hnsw", {"storage": "float32"}),
+    ("hnsw int8", "hnsw", {"storage": "int8"}),
+    ("ivf_flat int8", "ivf_flat", {"storage": "int8"}),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size, load time, latency and recall of storage schemes vs float32 flat.")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.count + args.queries, args.dim, args.clusters)
+    # Ollama returns unit-length embeddings; the synthetic ones are made to match.
+    faiss.normalize_L2(corpus)
+    vectors, queries = corpus[: args.count], corpus[args.count:]
+    ids = np.arange(args.count, dtype="int64")
+
+    print(f"corpus={args.count} dim={args.dim} queries={args.queries} k={args.k}\n")
+    print(f"{'scheme':<15}{'build s':>9}{'MB on disk':>12}{'load s':>9}{'ms/query':>10}{f'recall@{args.k}':>11}")
+
+    truth = None
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        for label, index_type, params in SCHEMES:
+            config = index_config(index_type, params)
+
+            started = time.perf_counter()
+            index = make_index(args.dim, config, vectors[: train_sample_size(config)])
+            index.add_with_ids(vectors, ids)
+            build_seconds = time.perf_counter() - started
+
+            faiss.write_index(index, path)
+            size_mb = os.path.getsize(path) / 1e6
+            del index
+
+            started = time.perf_counter()
+            index = apply_search_params(faiss.read_index(path), config)
+            load_seconds = time.perf_counter() - started
+
+            found = np.empty((len(queries), args.k), dtype="int64")
+            started = time.perf_counter()
+            for position, query in enumerate(queries):
+                found[position] = index.search(query.reshape(1, -1), args.k)[1][0]
+            latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+            if truth is None:
+                truth = found
+            print(
+                f"{label:<15}{build_seconds:>9.2f}{size_mb:>12.1f}{load_seconds:>9.3f}{latency_ms:>10.3f}"
+                f"{recall_at_k(truth, found, args.k):>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+from benchmarks.common import WORDS, fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.augmentation.prompt_builder import build_prompt
+from RAG.generation.llm import generate
+from RAG.indexing.build_index import build_index
+from RAG.retrieval import retriever
+from RAG.tokens import estimate_tokens
+
+
+def corpus(count: int, facts: int, copies: int, seed: int = 0):
+    """Fixture chunks plus two facts per part: who supplies it and at what margin.
+
+    The supplier fact is repeated ``copies`` times with different trailing
+    words, the way the same paragraph recurs across report versions, so a
+    plain top-k fills up with copies of one fact.
+    """
+    rng = random.Random(seed)
+    docs = fixture_docs(count)
+    for i in range(facts):
+        for copy in range(copies):
+            filler = " ".join(rng.choice(WORDS) for _ in range(6))
+            docs.append(
+                {
+                    "content": f"North region supplier for part w{i}code is s{i}name. {filler}",
+                    "page": i % 50,
+                    "type": "text",
+                    "source": f"report_v{copy}.pdf",
+                }
+            )
+        filler = " ".join(rng.choice(WORDS) for _ in range(6))
+        docs.append(
+            {
+                "content": f"North region margin for part w{i}code is m{i}pct percent. {filler}",
+                "page": i % 50,
+                "type": "table",
+                "source": "margins.pdf",
+            }
+        )
+    return docs
+
+
+def question(i: int) -> str:
+    return f"Which supplier ships part w{i}code to the north region and at what margin?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size, latency and fact recall with and without reranking.")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--copies", type=int, default=8, help="Near-duplicate copies of each supplier fact.")
+    parser.add_argument("--candidates", type=int, default=retriever.RERANK_CANDIDATES)
+    parser.add_argument("--mode", choices=retriever.RETRIEVAL_MODES, default="dense", help="First-stage retriever.")
+    parser.add_argument(
+        "--prefill-per-char", type=float, default=0.00005, help="Stub Ollama prefill seconds per prompt character."
+    )
+    args = parser.parse_args()
+
+    docs = corpus(args.docs, args.queries, args.copies)
+    retriever.RERANK_CANDIDATES = args.candidates
+    runs = (("top-5", 5, False), ("top-20", 20, False), ("rerank 5", 5, True))
+
+    with FakeOllama(
+        latency=0.005, per_item=0.0, prefill_per_char=args.prefill_per_char
+    ) as ollama, tempfile.TemporaryDirectory() as tmp:
+        point_clients_at(ollama.base_url)
+        build_index(docs, save_path=Path(tmp))
+        use_index_dir(Path(tmp))
+        # Embed every question once so the runs compare retrieval and generation only.
+        retriever.retrieve_many_with_ids([question(i) for i in range(args.queries)], k=1)
+
+        print(f"docs={len(docs)} queries={args.queries} mode={args.mode} candidates={args.candidates}\n")
+        print(f"{'run':<12}{'recall':>8}{'prompt tok':>12}{'retrieve ms':>13}{'gen ms':>9}{'total ms':>10}")
+        for label, k, rerank in runs:
+            hits = 0
+            tokens = 0
+            retrieve_s = 0.0
+            generate_s = 0.0
+            for i in range(args.queries):
+                started = time.perf_counter()
+                found = retriever.retrieve(question(i), k=k, mode=args.mode, rerank=rerank)
+                prompt = build_prompt(question(i), found)
+                retrieve_s += time.perf_counter() - started
+
+                started = time.perf_counter()
+                generate(prompt)
+                generate_s += time.perf_counter() - started
+
+                context = " ".join(doc["content"] for doc in found)
+                hits += f"s{i}name" in context and f"m{i}pct" in context
+                tokens += estimate_tokens(prompt)
+
+            n = args.queries
+            print(
+                f"{label:<12}{hits / n:>8.3f}{tokens / n:>12.0f}{retrieve_s * 1000 / n:>13.2f}"
+                f"{generate_s * 1000 / n:>9.1f}{(retrieve_s + generate_s) * 1000 / n:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+from benchmarks.common import fixture_docs, use_index_dir
+from benchmarks.fake_ollama import FakeOllama, point_clients_at
+from RAG.embeddings.ollama_embed import embed_many
+from RAG.indexing.build_index import build_index
+from RAG.indexing.collection import shard_dir, shard_of
+from RAG.retrieval import retriever
+
+
+def build_shards(docs, root: Path, shards: int):
+    """Split ``docs`` by source file the way ``ingest.py --shards`` does and build one index per shard."""
+    groups = [[] for _ in range(shards)]
+    for doc in docs:
+        groups[shard_of(doc["source"], shards)].append(doc)
+    for shard, group in enumerate(groups):
+        if group:
+            build_index(group, save_path=shard_dir(root, shard) if shards > 1 else root)
+    return [len(group) for group in groups]
+
+
+def timed(shards, vectors, questions, k: int, mode: str, repeats: int):
+    # One query at a time, the way /query searches.
+    def run():
+        return [
+            retriever._search(shards, vector, k, query=question, mode=mode)[0]
+            for vector, question in zip(vectors, questions)
+        ]
+
+    results = run()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return results, (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query latency and result agreement as a collection is sharded.")
+    parser.add_argument("--docs", type=int, default=40000)
+    parser.add_argument("--sources", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=retriever.RETRIEVAL_MODES, default=["dense", "hybrid"])
+    parser.add_argument("--threads", type=int, default=retriever.SEARCH_THREADS, help="Shard search pool size.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    docs = fixture_docs(args.docs, sources=args.sources)
+    questions = [f"quarter {i} revenue margin guidance for region {i % 7}" for i in range(args.queries)]
+    baseline = {}
+
+    with FakeOllama(latency=0.0, per_item=0.0) as ollama:
+        point_clients_at(ollama.base_url)
+        vectors = embed_many(questions)
+        print(f"docs={args.docs} sources={args.sources} queries={args.queries} k={args.k} cpus={os.cpu_count()}\n")
+        print(f"{'shards':>6}  {'mode':<8}{'largest':>9}{'1 thread ms':>13}{f'{args.threads} threads ms':>15}{'same':>7}")
+
+        for shards in args.shards:
+            with tempfile.TemporaryDirectory() as tmp:
+                sizes = build_shards(docs, Path(tmp), shards)
+                use_index_dir(Path(tmp))
+                loaded = retriever._ready_shards()
+
+                for mode in args.modes:
+                    latencies = []
+                    for threads in (1, args.threads):
+                        retriever._search_pool = ThreadPoolExecutor(threads, thread_name_prefix="shard-search")
+                        results, seconds = timed(loaded, vectors, questions, args.k, mode, args.repeats)
+                        retriever._search_pool.shutdown()
+                        latencies.append(seconds * 1000 / len(vectors))
+
+                    # Share of queries whose top k match the first --shards run (unsharded by default) exactly.
+                    expected = baseline.setdefault(mode, results)
+                    same = sum(found == wanted for found, wanted in zip(results, expected)) / len(results)
+                    print(f"{shards:>6}  {mode:<8}{max(sizes):>9}{latencies[0]:>13.3f}{latencies[1]:>15.3f}{same:>7.2f}")
+        retriever._search_pool = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("EMBED_CACHE", "0")
+
+# Modules the query path should not need.
+HEAVY_MODULES = ("camelot", "cv2", "pandas", "fitz", "PIL")
+IMPORTS = ("RAG.retrieval.retriever", "app.main", "scripts.ingest")
+IMPORT_CODE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+print(",".join(name for name in {heavy!r} if name in sys.modules) or "-")
+"""
+# (label, PRELOAD_INDEX, WARMUP_MODELS)
+SCENARIOS = (
+    ("lazy", "0", "0"),
+    ("preload index", "1", "0"),
+    ("preload + warm-up", "1", "1"),
+)
+
+
+def import_seconds(module: str, repeats: int):
+    """Median wall time to import ``module`` in a fresh interpreter, and the heavy modules it pulled in."""
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_CODE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.splitlines()
+        # Some imports print warnings of their own first.
+        seconds, heavy = output[-2:]
+        timings.append(float(seconds))
+    return statistics.median(timings), heavy
+
+
+def first_queries(index_dir: str, model_load: float):
+    """Run in a fresh process: start the API, wait for /ready, then time the first two queries."""
+    started = time.perf_counter()
+    import httpx
+
+    from benchmarks.bench_api_load import start_api
+    from benchmarks.common import use_index_dir
+    from benchmarks.fake_ollama import FakeOllama, point_clients_at
+
+    import_time = time.perf_counter() - started
+
+    with FakeOllama(latency=0.02, per_item=0.0, model_load=model_load) as ollama:
+        point_clients_at(ollama.base_url)
+        use_index_dir(Path(index_dir))
+
+        started = time.perf_counter()
+        server, thread, base_url = start_api()
+        try:
+            with httpx.Client(base_url=base_url, timeout=300) as http:
+                while http.get("/ready").status_code != 200:
+                    time.sleep(0.01)
+                ready_seconds = time.perf_counter() - started
+
+                latencies = []
+                for question in ("section 1 revenue margin", "section 2 cash flow guidance"):
+                    started = time.perf_counter()
+                    http.post("/query", json={"q": question, "top_k": 5}).raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    print(json.dumps({"import": import_time, "ready": ready_seconds, "first": latencies[0], "second": latencies[1]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold first-query latency with and without warm-up.")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--model-load", type=float, default=2.0, help="Simulated model load on first use (s).")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per import timing.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_queries(args.child, args.model_load)
+        return
+
+    print(f"{'import':<26}{'seconds':>9}  heavy modules loaded")
+    for module in IMPORTS:
+        seconds, heavy = import_seconds(module, args.repeats)
+        print(f"{module:<26}{seconds:>9.3f}  {heavy}")
+
+    from benchmarks.common import fixture_docs
+    from benchmarks.fake_ollama import FakeOllama, point_clients_at
+    from RAG.indexing.build_index import build_index
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with FakeOllama(latency=0.0, per_item=0.0) as ollama:
+            point_clients_at(ollama.base_url)
+            build_index(fixture_docs(args.docs), save_path=Path(tmp))
+
+        print(f"\ndocs={args.docs} model load={args.model_load}s; each run is a fresh API process\n")
+        print(f"{'startup':<20}{'import s':>9}{'ready s':>9}{'1st query ms':>14}{'2nd query ms':>14}")
+        for label, preload, warmup in SCENARIOS:
+            env = {**os.environ, "PRELOAD_INDEX": preload, "WARMUP_MODELS": warmup}
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", tmp, "--model-load", str(args.model_load)],
+                cwd=ROOT_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{label:<20}{result['import']:>9.3f}{result['ready']:>9.3f}"
+                f"{result['first'] * 1000:>14.1f}{result['second'] * 1000:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
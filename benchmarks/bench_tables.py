@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import fitz
+
+from benchmarks.bench_chunker import paragraph
+from RAG.indexing import table_cache
+from RAG.indexing.table_extractor import _camelot, extract_tables_with_stats
+
+
+def draw_table(page, rng: random.Random, top: float, rows: int = 6, columns: int = 4):
+    left, width, height = 50, 120, 18
+    for row in range(rows + 1):
+        page.draw_line((left, top + row * height), (left + columns * width, top + row * height))
+    for column in range(columns + 1):
+        page.draw_line((left + column * width, top), (left + column * width, top + rows * height))
+    for row in range(rows):
+        for column in range(columns):
+            cell = f"{rng.choice(('rev', 'cost', 'margin'))} {rng.randint(1, 999)}"
+            page.insert_text((left + column * width + 4, top + row * height + 13), cell, fontsize=8)
+
+
+def make_pdf(path: Path, pages: int, table_every: int, seed: int = 0):
+    """Text pages; every ``table_every``-th page has a ruled table, and others carry non-table rules."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 40, 560, 300), paragraph(rng), fontsize=9)
+        if page_no % table_every == 0:
+            draw_table(page, rng, 320)
+        elif page_no % 3 == 0:
+            # Header rule and a page frame: lines, but no table.
+            page.draw_line((50, 35), (560, 35))
+            page.draw_rect(fitz.Rect(30, 20, 580, 820))
+        page.insert_textbox(fitz.Rect(50, 460, 560, 780), paragraph(rng), fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="camelot on every page vs screened, parallel and cached extraction.")
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--table-every", type=int, default=10, help="Put a ruled table on every n-th page.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "report.pdf"
+        make_pdf(path, args.pages, args.table_every)
+        table_cache._shared.instance = table_cache.TableCache(Path(tmp) / "tables.sqlite")
+
+        started = time.perf_counter()
+        baseline = _camelot().read_pdf(str(path), pages="all")
+        baseline_seconds = time.perf_counter() - started
+
+        print(f"pages={args.pages} table pages={len(range(0, args.pages, args.table_every))} cpus={os.cpu_count()}\n")
+        print(f"{'run':<22}{'screened':>9}{'parsed':>8}{'cached':>8}{'tables':>8}{'wall s':>9}{'speedup':>9}")
+        print(f"{'camelot, all pages':<22}{'-':>9}{args.pages:>8}{0:>8}{len(baseline):>8}{baseline_seconds:>9.2f}{1:>9.1f}x")
+
+        runs = (
+            ("screened, 1 worker", None, 1),
+            (f"screened, {args.workers} workers", None, args.workers),
+            ("screened, cold cache", "fixture-hash", args.workers),
+            ("screened, warm cache", "fixture-hash", args.workers),
+        )
+        for label, file_hash, workers in runs:
+            started = time.perf_counter()
+            tables, stats = extract_tables_with_stats(str(path), file_hash, workers=workers)
+            seconds = time.perf_counter() - started
+            print(
+                f"{label:<22}{stats['pages']:>9}{stats['parsed']:>8}{stats['cached']:>8}{len(tables):>8}"
+                f"{seconds:>9.2f}{baseline_seconds / seconds:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
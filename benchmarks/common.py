@@ -0,0 +1,28 @@
+import random
+
+from RAG.retrieval import retriever
+
+WORDS = (
+    "revenue margin growth table figure quarter segment operating cash flow capital expenditure "
+    "guidance forecast region product customer churn retention pricing inventory supplier"
+).split()
+
+
+def fixture_docs(count: int, words_per_doc: int = 60, sources: int = 10, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "content": f"section {i} " + " ".join(rng.choice(WORDS) for _ in range(words_per_doc)),
+            "page": i % 50,
+            "type": ("text", "table", "image")[i % 3],
+            "source": f"report_{i % sources}.pdf",
+        }
+        for i in range(count)
+    ]
+
+
+def use_index_dir(index_dir):
+    """Point the retriever at an index built under ``index_dir`` and drop what it had loaded."""
+    retriever.INDEX_DIR = index_dir
+    retriever._shards.clear()
+    retriever._collections.clear()
@@ -0,0 +1,178 @@
+"""A minimal in-process stand-in for the Ollama HTTP API used by the benchmarks.
+
+Embeddings are deterministic hashed bag-of-words vectors, so texts sharing
+words land close together and retrieval quality can be measured. Latency is
+simulated per request plus per input item, and generation can be slowed
+in proportion to prompt size to mimic prefill. ``model_load`` seconds are
+added to the first request for each model, as when Ollama loads it.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def fake_vector(text: str, dim: int = 768):
+    vector = np.zeros(dim, dtype="float32")
+
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        norm = 1.0
+
+    return (vector / norm).tolist()
+
+
+class FakeOllama:
+    """Serve /api/embed, /api/embeddings and /api/generate on a background thread."""
+
+    def __init__(
+        self,
+        latency=0.02,
+        per_item=0.001,
+        dim=768,
+        token_delay=0.0,
+        answer_tokens=32,
+        prefill_per_char=0.0,
+        model_load=0.0,
+    ):
+        self.latency = latency
+        self.per_item = per_item
+        self.dim = dim
+        self.token_delay = token_delay
+        self.answer_tokens = answer_tokens
+        self.prefill_per_char = prefill_per_char
+        self.model_load = model_load
+        self._loaded_models = set()
+        self.requests = 0
+        self.items = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, items):
+        with self._lock:
+            self.requests += 1
+            self.items += items
+
+    def _load_model(self, model):
+        with self._lock:
+            cold = model not in self._loaded_models
+            self._loaded_models.add(model)
+        if cold:
+            time.sleep(self.model_load)
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.items = 0
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, body, status=200):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fake._load_model(payload.get("model"))
+
+                if self.path == "/api/embed":
+                    inputs = payload.get("input", [])
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    fake._count(len(inputs))
+                    time.sleep(fake.latency + fake.per_item * len(inputs))
+                    self._send_json({"embeddings": [fake_vector(text, fake.dim) for text in inputs]})
+                elif self.path == "/api/embeddings":
+                    fake._count(1)
+                    time.sleep(fake.latency + fake.per_item)
+                    self._send_json({"embedding": fake_vector(payload.get("prompt", ""), fake.dim)})
+                elif self.path == "/api/generate":
+                    fake._count(1)
+                    self._generate(payload)
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def _generate(self, payload):
+                time.sleep(fake.latency + fake.prefill_per_char * len(payload.get("prompt", "")))
+                tokens = [f"token{i} " for i in range(fake.answer_tokens)]
+
+                if not payload.get("stream", True):
+                    time.sleep(fake.token_delay * len(tokens))
+                    self._send_json(
+                        {"response": "".join(tokens), "done": True, "eval_count": len(tokens)}
+                    )
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write_chunk(body):
+                    line = (json.dumps(body) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                    self.wfile.flush()
+
+                for token in tokens:
+                    time.sleep(fake.token_delay)
+                    write_chunk({"response": token, "done": False})
+                write_chunk({"response": "", "done": True, "eval_count": len(tokens)})
+                self.wfile.write(b"0\r\n\r\n")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def point_clients_at(base_url: str):
+    """Redirect the RAG Ollama clients to ``base_url`` after they were imported."""
+    from RAG import ollama_client
+
+    ollama_client.OLLAMA_BASE_URL = base_url.rstrip("/")
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from RAG.generation.batch import BATCH_CONCURRENCY, aanswer_many
+from RAG.ollama_client import aclose_async_client
+from RAG.retrieval.retriever import IndexNotReadyError, RETRIEVAL_MODES
+
+
+async def run(questions, top_k: int, mode, concurrency: int, out):
+    try:
+        results = await aanswer_many(questions, top_k=top_k, mode=mode, concurrency=concurrency)
+        async for result in results:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        await aclose_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a file of questions (one per line) as NDJSON.")
+    parser.add_argument("questions", type=Path, help="Text file with one question per line.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mode", choices=RETRIEVAL_MODES)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--output", type=Path, help="Write results here instead of stdout.")
+    args = parser.parse_args()
+
+    questions = [line.strip() for line in args.questions.read_text(encoding="utf-8").splitlines() if line.strip()]
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+
+    try:
+        asyncio.run(run(questions, args.top_k, args.mode, args.concurrency, out))
+    except IndexNotReadyError as exc:
+        print(f"\n[ERROR] {exc}", file=sys.stderr)
+        print("Run ingestion first: python scripts/ingest.py", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            out.close()
@@ -1,106 +1,299 @@
+import argparse
 import os
+import shutil
 import sys
 from pathlib import Path
 
-from tqdm import tqdm
-
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from RAG.indexing.build_index import build_index
-from RAG.indexing.chunker import chunk_text
-from RAG.indexing.image_extractor import extract_images
-from RAG.indexing.pdf_loader import load_pdf
-from RAG.indexing.table_extractor import extract_tables
-from RAG.multimodel.image_captioner import caption_image
-from RAG.multimodel.table_parser import table_to_text
-
-RAW_DATA_DIR = ROOT_DIR / "data" / "raw"
+from RAG.embeddings.cache import get_cache
+from RAG.indexing.build_index import load_manifest, plan_update, stream_update
+from RAG.indexing.collection import (
+    DEFAULT_COLLECTION,
+    collection_dir,
+    collection_name,
+    collection_raw_dir,
+    list_pdfs,
+    save_shard_count,
+    shard_count,
+    shard_dir,
+    shard_dirs,
+    shard_of,
+)
+from RAG.indexing.index_types import DEFAULT_INDEX_TYPE, INDEX_TYPES, METRICS, REDUCTIONS, STORAGE_TYPES
+from RAG.indexing.pipeline import (
+    DEFAULT_CAPTION_WORKERS,
+    DEFAULT_EMBED_WORKERS,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_PARSE_WORKERS,
+    image_doc,
+    iter_pipeline,
+    parse_pdf,
+    table_pages_summary,
+)
+from RAG.indexing.versions import current_version, remove_versions
+from RAG.multimodel.caption_pipeline import Captioner
 
 
-def process_pdf(pdf_path: str):
-    """Process a single PDF into multimodal chunks."""
-    all_docs = []
- 
+def process_pdf(pdf_path: str, captioner=None, caption_workers: int = DEFAULT_CAPTION_WORKERS):
+    """Process a single PDF into multimodal chunks, one stage after another."""
     print(f"\nProcessing: {pdf_path}")
 
-    pages = load_pdf(pdf_path)
-    text_chunks = chunk_text(pages)
-    print(f"  [OK] Extracted {len(text_chunks)} text chunks")
-    all_docs.extend(text_chunks)
-
-    try:
-        tables = extract_tables(pdf_path)
-        table_docs = []
-
-        for table in tables:
-            table_text = table_to_text(table["table"])
-            table_docs.append(
-                {
-                    "content": table_text,
-                    "type": "table",
-                    "page": table["page"],
-                    "source": table.get("source", pdf_path),
-                }
-            )
-
-        print(f"  [OK] Extracted {len(table_docs)} tables")
-        all_docs.extend(table_docs)
-
-    except Exception as exc:
-        print(f"  [WARN] Table extraction failed: {exc}")
-
-    try:
-        images = extract_images(pdf_path)
-        image_docs = []
-
-        for image in tqdm(images, desc="  Captioning images"):
-            image_path = image["image_path"]
-            caption = caption_image(image_path)
-
-            image_docs.append(
-                {
-                    "content": caption,
-                    "type": "image",
-                    "page": image["page"],
-                    "source": image.get("source", pdf_path),
-                    "image_path": image_path,
-                }
-            )
-
-        print(f"  [OK] Extracted {len(image_docs)} image captions")
-        all_docs.extend(image_docs)
-
-    except Exception as exc:
-        print(f"  [WARN] Image extraction failed: {exc}")
-
-    return all_docs
-
-
-def ingest_all(raw_data_dir=RAW_DATA_DIR):
-    """Process all PDFs in data/raw and build vector index."""
-    raw_dir = Path(raw_data_dir)
+    parsed = parse_pdf(pdf_path)
+    for warning in parsed["warnings"]:
+        print(f"  [WARN] {warning}")
+
+    print(f"  [OK] Extracted {len(parsed['text_docs'])} text chunks")
+    print(f"  [OK] Extracted {len(parsed['table_docs'])} tables")
+    if parsed["table_pages"] is not None:
+        print(f"  [OK] Tables: {table_pages_summary(parsed['table_pages'])}")
+
+    captioner = captioner or Captioner()
+    images = parsed["images"]
+    captions = captioner.caption_many([image["image_path"] for image in images], workers=caption_workers)
+
+    image_docs = []
+    for image, caption in zip(images, captions):
+        if isinstance(caption, Exception):
+            print(f"  [WARN] Captioning {image['image_path']} failed: {caption}")
+        elif caption is not None:
+            image_docs.append(image_doc(image, caption, pdf_path))
+    print(f"  [OK] Extracted {len(image_docs)} image captions")
+    print(f"  {captioner.report()}")
+
+    return parsed["text_docs"] + parsed["table_docs"] + image_docs
+
+
+def _ingest_files(
+    pdf_files,
+    save_path,
+    incremental: bool,
+    index_type,
+    index_params,
+    parse_workers: int,
+    caption_workers: int,
+    embed_workers: int,
+    max_in_flight: int,
+    progress=None,
+):
+    """Bring the index under ``save_path`` in line with ``pdf_files``; see ``ingest_all``."""
+    plan = None
+    if incremental:
+        plan = plan_update(pdf_files, save_path=save_path, index_type=index_type, index_params=index_params)
+
+    if plan is None:
+        to_process = pdf_files
+        removed = []
+    else:
+        changed_hashes, removed = plan
+        print(
+            f"{len(changed_hashes)} new or modified, {len(removed)} removed, "
+            f"{len(pdf_files) - len(changed_hashes)} unchanged."
+        )
+        if progress is not None:
+            for pdf_path in pdf_files:
+                if pdf_path not in changed_hashes:
+                    progress(pdf_path, "unchanged")
+            for pdf_path in removed:
+                progress(pdf_path, "removed")
+        if not changed_hashes and not removed:
+            print("Index is up to date.")
+            return None
+        to_process = list(changed_hashes)
+
+    files = iter_pipeline(
+        to_process,
+        parse_workers=parse_workers,
+        caption_workers=caption_workers,
+        embed_workers=embed_workers,
+        max_in_flight=max_in_flight,
+        progress=progress,
+    )
+
+    if plan is None:
+        print("\nBuilding FAISS index...")
+        indexed_count = stream_update(
+            files,
+            save_path=save_path,
+            rebuild=True,
+            index_type=index_type or DEFAULT_INDEX_TYPE,
+            index_params=index_params,
+        )
+        print(f"Index built successfully with {indexed_count} documents.")
+    else:
+        print("\nUpdating FAISS index...")
+        indexed_count = stream_update(files, removed, save_path=save_path)
+        print(f"Index updated successfully, now {indexed_count} documents.")
+    print(f"Published index version {current_version(save_path)}.")
+    return indexed_count
+
+
+def ingest_all(
+    raw_data_dir=None,
+    incremental: bool = True,
+    index_type=None,
+    index_params=None,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
+    caption_workers: int = DEFAULT_CAPTION_WORKERS,
+    embed_workers: int = DEFAULT_EMBED_WORKERS,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    save_path=None,
+    collection: str = DEFAULT_COLLECTION,
+    shards=None,
+    progress=None,
+):
+    """Process the PDFs of a collection and update its vector index.
+
+    The default collection reads ``data/raw`` and is stored in
+    ``vectorstore/faiss_index``; a named one reads ``data/raw/<name>`` and is
+    stored in ``vectorstore/collections/<name>``. With ``shards`` above 1 the
+    PDFs are split by file name over that many indexes, each with its own
+    document store; left out, the collection keeps its current shard count.
+    Changing the count rebuilds every shard.
+
+    With ``incremental`` only new or modified PDFs are processed and deleted
+    ones are dropped from the index; otherwise, or when an explicit
+    ``index_type`` (or storage, metric or reduction in ``index_params``)
+    differs from the existing index, the index is rebuilt from
+    all PDFs. PDFs go through the pipelined ingester with the given worker
+    counts per stage and are written to the index as each one finishes, so
+    memory stays bounded by ``max_in_flight`` files rather than the corpus.
+    ``progress`` receives per-file stage changes (see ``iter_pipeline``),
+    including ``unchanged`` and ``removed`` files of an incremental update.
+    Returns the number of indexed chunks, or None when nothing changed.
+    """
+    raw_dir = Path(raw_data_dir) if raw_data_dir is not None else collection_raw_dir(collection)
+    save_path = Path(save_path) if save_path is not None else collection_dir(collection)
+    if shards is not None and shards < 1:
+        raise ValueError("shards must be at least 1.")
     os.makedirs(raw_dir, exist_ok=True)
 
-    pdf_files = sorted(str(path) for path in raw_dir.glob("*.pdf"))
+    pdf_files = list_pdfs(raw_dir)
     print(f"Found {len(pdf_files)} PDF files in {raw_dir}")
 
     if not pdf_files:
         raise FileNotFoundError(f"No PDF files found in {raw_dir}")
 
-    all_documents = []
-    for pdf_path in pdf_files:
-        docs = process_pdf(pdf_path)
-        all_documents.extend(docs)
+    built = shard_count(save_path)
+    shards = shards or built or 1
+    resharded = built not in (0, shards)
+    if resharded:
+        print(f"Resharding from {built} to {shards} shard(s); rebuilding every shard.")
 
-    print(f"\nTotal documents prepared: {len(all_documents)}")
-    print("\nBuilding FAISS index...")
-    indexed_count = build_index(all_documents)
-    print(f"Index built successfully with {indexed_count} documents.")
+    if shards == 1:
+        targets = [(save_path, pdf_files)]
+    else:
+        targets = [
+            (shard_dir(save_path, shard), [path for path in pdf_files if shard_of(path, shards) == shard])
+            for shard in range(shards)
+        ]
 
-    return all_documents
+    total = 0
+    changed = False
+    for target, target_files in targets:
+        if shards > 1:
+            print(f"\nShard {target.name}: {len(target_files)} PDF files")
+        if not target_files:
+            if target.exists():
+                shutil.rmtree(target, ignore_errors=True)
+                changed = True
+            continue
+
+        indexed_count = _ingest_files(
+            target_files,
+            target,
+            incremental and not resharded,
+            index_type,
+            index_params,
+            parse_workers,
+            caption_workers,
+            embed_workers,
+            max_in_flight,
+            progress,
+        )
+        if indexed_count is None:
+            indexed_count = sum(len(entry["ids"]) for entry in load_manifest(target)["files"].values())
+        else:
+            changed = True
+        total += indexed_count
+
+    # Shards beyond the new count would still be searched; they were folded into the others.
+    for path in shard_dirs(save_path):
+        if path != save_path and (shards == 1 or path not in {target for target, _ in targets}):
+            shutil.rmtree(path, ignore_errors=True)
+    save_shard_count(save_path, shards)
+    if shards > 1:
+        # The unsharded index a reshard replaced is no longer searched; don't leave its versions behind.
+        remove_versions(save_path)
+
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions.")
+
+    return total if changed or resharded else None
 
 
 if __name__ == "__main__":
-    ingest_all()
+    parser = argparse.ArgumentParser(description="Ingest PDFs from data/raw into the FAISS index.")
+    parser.add_argument("--full", action="store_true", help="Rebuild the index instead of updating it.")
+    parser.add_argument(
+        "--collection",
+        type=collection_name,
+        default=DEFAULT_COLLECTION,
+        help="Collection to build from data/raw/<name> (default: data/raw itself).",
+    )
+    parser.add_argument("--shards", type=int, help="Split the collection over this many indexes (default: keep).")
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        help=f"Index type (default: keep the existing one, else {DEFAULT_INDEX_TYPE}).",
+    )
+    parser.add_argument("--nlist", type=int, help="IVF: number of coarse clusters.")
+    parser.add_argument("--nprobe", type=int, help="IVF: clusters visited per query.")
+    parser.add_argument("--m", type=int, help="HNSW: graph neighbours per node.")
+    parser.add_argument("--ef-search", type=int, help="HNSW: search beam width.")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ and OPQ: sub-quantizers per vector.")
+    parser.add_argument("--storage", choices=STORAGE_TYPES, help="Bytes per dimension: float32, fp16 or int8.")
+    parser.add_argument("--metric", choices=METRICS, help="cosine normalizes vectors; l2 keeps them as embedded.")
+    parser.add_argument("--reduce", choices=REDUCTIONS, help="Project vectors down before storing them.")
+    parser.add_argument("--reduce-dim", type=int, help="Dimensions kept by --reduce.")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS, help="Processes parsing PDFs.")
+    parser.add_argument("--caption-workers", type=int, default=DEFAULT_CAPTION_WORKERS, help="Threads captioning images.")
+    parser.add_argument("--embed-workers", type=int, default=DEFAULT_EMBED_WORKERS, help="Threads embedding files.")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help="Files held between parsing and indexing at once.",
+    )
+    args = parser.parse_args()
+
+    params = {
+        name: value
+        for name, value in {
+            "nlist": args.nlist,
+            "nprobe": args.nprobe,
+            "m": args.m,
+            "ef_search": args.ef_search,
+            "pq_m": args.pq_m,
+            "storage": args.storage,
+            "metric": args.metric,
+            "reduce": args.reduce,
+            "reduce_dim": args.reduce_dim,
+        }.items()
+        if value is not None
+    }
+    ingest_all(
+        incremental=not args.full,
+        collection=args.collection,
+        shards=args.shards,
+        index_type=args.index_type,
+        index_params=params,
+        parse_workers=args.parse_workers,
+        caption_workers=args.caption_workers,
+        embed_workers=args.embed_workers,
+        max_in_flight=args.max_in_flight,
+    )
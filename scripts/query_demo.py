@@ -5,7 +5,7 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from RAG.augmentation.prompt_builder import build_prompt
+from RAG.augmentation.prompt_builder import build_prompt_with_stats
 from RAG.generation.llm import generate
 from RAG.retrieval.retriever import IndexNotReadyError, retrieve
 
@@ -33,7 +33,11 @@ def run_query(query: str, top_k: int = 5):
     docs = retrieve(query, k=top_k)
     pretty_print_sources(docs)
 
-    prompt = build_prompt(query, docs)
+    prompt, stats = build_prompt_with_stats(query, docs)
+    print(
+        f"Context: {stats['tokens']}/{stats['budget']} tokens from {stats['chunks']} chunks "
+        f"({stats['blocks']} blocks, {stats['blocks_dropped']} dropped)"
+    )
     print("\nGenerating answer with Llama3...\n")
 
     answer = generate(prompt)
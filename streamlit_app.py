@@ -1,21 +1,39 @@
+import threading
 from pathlib import Path
 
 import streamlit as st
 
 from RAG.augmentation.prompt_builder import build_prompt
-from RAG.generation.llm import generate
+from RAG.generation.llm import generate_stream
+from RAG.indexing.jobs import ACTIVE_STAGES, job_status, start_workers, submit_job
 from RAG.retrieval.retriever import IndexNotReadyError, index_exists, load_index, retrieve
-from scripts.ingest import ingest_all
+from RAG.warmup import status as warmup_status, warm_up
 
 BASE_DIR = Path(__file__).resolve().parent
 RAW_DIR = BASE_DIR / "data" / "raw"
 
 
+@st.cache_resource
+def start_warm_up():
+    # Once per server process, in the background so the first page renders right away.
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def start_ingest_workers():
+    # Jobs run on background threads of the server process, so they outlive page reloads.
+    start_workers()
+
+
 def init_state():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "top_k" not in st.session_state:
         st.session_state.top_k = 5
+    if "ingest_job" not in st.session_state:
+        st.session_state.ingest_job = None
 
 
 def save_uploaded_pdfs(uploaded_files):
@@ -54,16 +72,36 @@ def render_sources(sources):
             st.divider()
 
 
+@st.fragment(run_every=1.0)
+def render_ingest_job():
+    job = job_status(st.session_state.ingest_job) if st.session_state.ingest_job else None
+    if job is None:
+        return
+
+    progress = job["progress"]
+    total = len(progress["files"])
+    active = sum(progress["counts"].get(stage, 0) for stage in ACTIVE_STAGES)
+    counts = ", ".join(f"{count} {stage}" for stage, count in progress["counts"].items())
+    st.progress((total - active) / total if total else 1.0, text=f"Ingestion {job['status']}: {counts}")
+    if job["status"] == "running":
+        st.caption(f"{progress['files_per_second']:.2f} PDFs/s, {progress['chunks_per_second']:.1f} chunks/s")
+    elif job["status"] == "done":
+        st.success("Ingestion completed." if job["result"]["chunks"] is not None else "Index is up to date.")
+    elif job["status"] == "failed":
+        st.error(job["error"])
+
+
 def run_query(question: str, top_k: int):
     docs = retrieve(question, k=top_k)
     prompt = build_prompt(question, docs)
-    answer = generate(prompt)
-    return answer, docs
+    return generate_stream(prompt), docs
 
 
 def main():
     st.set_page_config(page_title="Multi Model RAG Chat", page_icon=":speech_balloon:", layout="wide")
     init_state()
+    start_warm_up()
+    start_ingest_workers()
 
     st.title("Multi Model RAG Chat")
     st.caption("Upload PDFs, ingest, then chat with your documents.")
@@ -71,6 +109,7 @@ def main():
     with st.sidebar:
         st.subheader("System")
         st.write(f"Index ready: {'Yes' if index_exists() else 'No'}")
+        st.write(f"Warm-up done: {'Yes' if warmup_status()['ready'] else 'No'}")
         st.session_state.top_k = st.slider("Top K Chunks", min_value=1, max_value=10, value=st.session_state.top_k)
 
         col1, col2 = st.columns(2)
@@ -104,12 +143,11 @@ def main():
 
         if st.button("Run Ingestion", use_container_width=True):
             try:
-                with st.spinner("Ingesting documents..."):
-                    ingest_all(RAW_DIR)
-                    load_index(force_reload=True)
-                st.success("Ingestion completed.")
+                job, _ = submit_job()
+                st.session_state.ingest_job = job["id"]
             except Exception as exc:
                 st.error(str(exc))
+        render_ingest_job()
 
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -128,8 +166,8 @@ def main():
     with st.chat_message("assistant"):
         try:
             with st.spinner("Thinking..."):
-                answer, sources = run_query(question, st.session_state.top_k)
-            st.markdown(answer)
+                tokens, sources = run_query(question, st.session_state.top_k)
+            answer = st.write_stream(tokens)
             render_sources(sources)
             st.session_state.messages.append(
                 {
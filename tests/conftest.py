@@ -0,0 +1,69 @@
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Read when the RAG modules are imported: tests never touch the caches under vectorstore/.
+for name in ("EMBED_CACHE", "TABLE_CACHE", "CAPTION_CACHE"):
+    os.environ[name] = "0"
+
+from RAG.indexing import build_index, collection  # noqa: E402
+from RAG.retrieval import query_cache, retriever  # noqa: E402
+
+DIM = 16
+
+
+def fake_vector(text: str):
+    """Unit vector seeded by ``text``, so the same text always embeds the same way."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(DIM).astype("float32")
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_docs(source: str, count: int = 5, tag: str = "chunk", doc_type: str = "text"):
+    return [
+        {"content": f"{tag} {position} of {Path(source).name}", "source": source, "page": position, "type": doc_type}
+        for position in range(count)
+    ]
+
+
+@pytest.fixture
+def fake_embed(monkeypatch):
+    """Embed with ``fake_vector`` instead of Ollama; returns the texts embedded so far."""
+    embedded = []
+
+    def embed_many(texts, batch_size=None, concurrency=None):
+        embedded.extend(texts)
+        return [fake_vector(text) for text in texts]
+
+    monkeypatch.setattr(build_index, "embed_many", embed_many)
+    monkeypatch.setattr(retriever, "embed", fake_vector)
+    monkeypatch.setattr(retriever, "embed_many", lambda texts, **kwargs: [fake_vector(text) for text in texts])
+
+    async def aembed_many(texts, **kwargs):
+        return [fake_vector(text) for text in texts]
+
+    monkeypatch.setattr(retriever, "aembed_many", aembed_many)
+    return embedded
+
+
+@pytest.fixture
+def index_root(tmp_path, monkeypatch):
+    """Empty index and collection folders that the retriever reads, with nothing loaded."""
+    root = tmp_path / "faiss_index"
+    monkeypatch.setattr(retriever, "INDEX_DIR", root)
+    monkeypatch.setattr(collection, "COLLECTIONS_DIR", tmp_path / "collections")
+    monkeypatch.setattr(collection, "RAW_DATA_DIR", tmp_path / "raw")
+    retriever._shards.clear()
+    retriever._collections.clear()
+    query_cache.query_vectors.clear()
+    yield root
+    retriever._shards.clear()
+    retriever._collections.clear()
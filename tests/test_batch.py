@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.query import router
+from RAG.generation import batch
+from RAG.generation.batch import aanswer_many
+from RAG.indexing.build_index import update_index
+from RAG.retrieval import query_cache
+from tests.conftest import make_docs
+
+QUESTIONS = [f"question {number} about chunk {number % 5}" for number in range(12)]
+
+
+class StubLLM:
+    """``agenerate`` stand-in: answers slower for earlier questions and fails on "fail"."""
+
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+        self.calls = 0
+
+    async def __call__(self, prompt, model=None):
+        question = prompt.split("Question:")[1].split("Answer with")[0].strip()
+        self.calls += 1
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            # Earlier questions take longer, so they finish after later ones.
+            number = int(question.split()[1]) if question.split()[1].isdigit() else 0
+            await asyncio.sleep(0.002 * (12 - number))
+            if "fail" in question:
+                raise ConnectionError("model crashed")
+            return f"answer to {question}"
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def llm(index_root, fake_embed, monkeypatch):
+    update_index({"report.pdf": ("h1", make_docs("report.pdf"))}, save_path=index_root, rebuild=True)
+    stub = StubLLM()
+    monkeypatch.setattr(batch, "agenerate", stub)
+    query_cache.answers.clear()
+    yield stub
+    query_cache.answers.clear()
+
+
+def answer_all(questions, **kwargs):
+    async def main():
+        results = await aanswer_many(questions, rerank=False, **kwargs)
+        return [result async for result in results]
+
+    return asyncio.run(main())
+
+
+def test_every_result_carries_the_position_of_its_question(llm):
+    results = answer_all(QUESTIONS, concurrency=4, search_size=5)
+
+    # Results stream as answers finish; ``index`` puts them back in input order.
+    assert [result["index"] for result in results] != list(range(len(QUESTIONS)))
+    ordered = sorted(results, key=lambda result: result["index"])
+    assert [result["index"] for result in ordered] == list(range(len(QUESTIONS)))
+    assert [result["question"] for result in ordered] == QUESTIONS
+    assert all(result["answer"] == f"answer to {result['question']}" for result in ordered)
+    assert all(result["sources"] for result in ordered)
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_no_more_than_concurrency_answers_are_generated_at_once(llm, concurrency):
+    answer_all(QUESTIONS, concurrency=concurrency, search_size=4)
+
+    assert llm.calls == len(QUESTIONS)
+    assert llm.most_running == concurrency
+
+
+def test_a_failing_question_does_not_fail_the_batch(llm):
+    questions = ["question 1 first", "question 2 please fail", "  ", "question 3 last"]
+
+    results = {result["index"]: result for result in answer_all(questions, concurrency=2)}
+
+    assert sorted(results) == [0, 1, 2, 3]
+    assert [results[position]["type"] for position in range(4)] == ["result", "error", "error", "result"]
+    assert results[1]["detail"] == "model crashed"
+    assert results[2]["detail"] == "Query cannot be empty."
+    assert results[3]["answer"] == "answer to question 3 last"
+
+
+def test_bad_batch_settings_are_rejected(llm):
+    with pytest.raises(ValueError, match="concurrency"):
+        answer_all(QUESTIONS, concurrency=0)
+    with pytest.raises(ValueError, match="search_size"):
+        answer_all(QUESTIONS, search_size=0)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_batch_endpoint_streams_one_line_per_question(llm, client):
+    questions = ["question 4 first", "question 5 please fail", "question 6 last"]
+
+    response = client.post("/query/batch", json={"questions": questions, "include_sources": False, "rerank": False})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1] == {"type": "done", "count": 3}
+    by_index = {line["index"]: line for line in lines[:-1]}
+    assert [by_index[position]["question"] for position in range(3)] == questions
+    assert by_index[1]["type"] == "error"
+    assert all("sources" not in line for line in lines)
+
+
+def test_batch_endpoint_reports_a_missing_index(index_root, client):
+    response = client.post("/query/batch", json={"questions": ["anything"]})
+
+    assert response.status_code == 400
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from RAG.retrieval.batcher import MicroBatcher
+from RAG.tracing import start_trace
+
+
+class FakeEmbed:
+    """Embed a batch of texts as their lengths, recording the batch sizes it was called with."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, key, items):
+        self.batches.append(len(items))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError(f"{key} is unreachable")
+        return [f"{key}:{len(item)}" for item in items]
+
+
+def submit_all(batcher, calls):
+    async def main():
+        return await asyncio.gather(*(batcher.submit(key, item) for key, item in calls), return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_a_full_batch_goes_out_without_waiting_for_the_window():
+    embed = FakeEmbed()
+    batcher = MicroBatcher("embed", embed, window_ms=60_000, max_size=4)
+
+    results = submit_all(batcher, [("model", "x" * length) for length in range(1, 9)])
+
+    assert embed.batches == [4, 4]
+    assert results == [f"model:{length}" for length in range(1, 9)]
+    assert batcher.stats()["avg_batch"] == 4.0
+
+
+def test_a_partial_batch_goes_out_when_the_window_closes():
+    embed = FakeEmbed()
+    batcher = MicroBatcher("embed", embed, window_ms=5, max_size=32)
+
+    async def main():
+        first = await asyncio.gather(*(batcher.submit("model", "x" * length) for length in (3, 1, 2)))
+        second = await batcher.submit("model", "later")
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert embed.batches == [3, 1]
+    assert first == ["model:3", "model:1", "model:2"]
+    assert second == "model:5"
+
+
+def test_each_key_gets_its_own_batch():
+    embed = FakeEmbed()
+    batcher = MicroBatcher("embed", embed, window_ms=5, max_size=32)
+
+    results = submit_all(batcher, [("a", "xx"), ("b", "xxx"), ("a", "x"), ("b", "x")])
+
+    assert sorted(embed.batches) == [2, 2]
+    assert results == ["a:2", "b:3", "a:1", "b:1"]
+
+
+def test_a_failed_batch_raises_in_every_caller():
+    embed = FakeEmbed(fail=True)
+    batcher = MicroBatcher("embed", embed, window_ms=5, max_size=32)
+
+    results = submit_all(batcher, [("model", "x")] * 3)
+
+    assert embed.batches == [3]
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert len({id(result) for result in results}) == 1
+
+
+def test_batch_size_one_calls_through_directly():
+    embed = FakeEmbed()
+    batcher = MicroBatcher("embed", embed, window_ms=60_000, max_size=1)
+
+    results = submit_all(batcher, [("model", "x"), ("model", "xx")])
+
+    assert embed.batches == [1, 1]
+    assert results == ["model:1", "model:2"]
+    assert batcher.stats()["batches"] == 0
+
+
+def test_every_caller_sees_the_batch_size_in_its_own_trace():
+    batcher = MicroBatcher("embed", FakeEmbed(), window_ms=5, max_size=32)
+
+    async def call(item):
+        trace = start_trace()
+        await batcher.submit("model", item)
+        return trace
+
+    async def main():
+        return await asyncio.gather(call("a"), call("b"))
+
+    traces = asyncio.run(main())
+
+    assert [trace["sizes"]["embed_batch"] for trace in traces] == [2, 2]
+    assert traces[0] is not traces[1]
+
+
+@pytest.mark.parametrize("window_ms", [0, 5])
+def test_results_go_back_to_their_callers_in_any_order(window_ms):
+    embed = FakeEmbed()
+    batcher = MicroBatcher("embed", embed, window_ms=window_ms, max_size=3)
+    lengths = [7, 2, 9, 4, 1, 6, 3]
+
+    results = submit_all(batcher, [("model", "x" * length) for length in lengths])
+
+    assert results == [f"model:{length}" for length in lengths]
+    assert sum(embed.batches) == len(lengths)
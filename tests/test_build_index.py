@@ -0,0 +1,143 @@
+import faiss
+import pytest
+
+from RAG.indexing.build_index import INDEX_FILE, chunk_id, load_manifest, update_index
+from RAG.indexing.doc_store import DOCSTORE_DIR, DocStore
+from RAG.indexing.lexical import LEXICAL_DIR, LexicalIndex
+from RAG.indexing.versions import current_version, version_dir
+from tests.conftest import make_docs
+
+INDEX_TYPES = ["flat", "hnsw"]
+
+
+def indexed(root):
+    """FAISS ids, stored docs by id and BM25 ids of the current version under ``root``."""
+    path = version_dir(root)
+    index = faiss.read_index(str(path / INDEX_FILE))
+    ids = set(faiss.vector_to_array(index.id_map).tolist())
+    assert len(ids) == index.ntotal
+    docs = DocStore(path / DOCSTORE_DIR).to_dict()
+    lexical = set(LexicalIndex(path / LEXICAL_DIR).ids.tolist())
+    return ids, docs, lexical
+
+
+def assert_consistent(root):
+    ids, docs, lexical = indexed(root)
+    assert ids == set(docs) == lexical
+    manifest_ids = [doc_id for entry in load_manifest(root)["files"].values() for doc_id in entry["ids"]]
+    assert sorted(manifest_ids) == sorted(ids)
+    return ids, docs
+
+
+def sources(docs):
+    counts = {}
+    for doc in docs.values():
+        counts[doc["source"]] = counts.get(doc["source"], 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_add_change_and_remove_touch_only_those_files(tmp_path, fake_embed, index_type):
+    update_index(
+        {"a.pdf": ("h1", make_docs("a.pdf")), "b.pdf": ("h2", make_docs("b.pdf"))},
+        save_path=tmp_path,
+        rebuild=True,
+        index_type=index_type,
+    )
+    before, _ = assert_consistent(tmp_path)
+    fake_embed.clear()
+
+    update_index({"c.pdf": ("h3", make_docs("c.pdf", 2))}, save_path=tmp_path)
+    ids, docs = assert_consistent(tmp_path)
+    assert sources(docs) == {"a.pdf": 5, "b.pdf": 5, "c.pdf": 2}
+    assert before < ids
+    # Only the new file was embedded.
+    assert len(fake_embed) == 2
+
+    update_index({"b.pdf": ("h4", make_docs("b.pdf", 3, tag="revised"))}, save_path=tmp_path)
+    ids, docs = assert_consistent(tmp_path)
+    assert sources(docs) == {"a.pdf": 5, "b.pdf": 3, "c.pdf": 2}
+    assert all(doc["content"].startswith("revised") for doc in docs.values() if doc["source"] == "b.pdf")
+
+    update_index({}, removed=["a.pdf"], save_path=tmp_path)
+    _, docs = assert_consistent(tmp_path)
+    assert sources(docs) == {"b.pdf": 3, "c.pdf": 2}
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_rename_keeps_the_file_searchable(tmp_path, fake_embed, index_type):
+    update_index(
+        {"a.pdf": ("h1", make_docs("a.pdf")), "b.pdf": ("h2", make_docs("b.pdf"))},
+        save_path=tmp_path,
+        rebuild=True,
+        index_type=index_type,
+    )
+
+    # Same content under a new path.
+    update_index({"renamed.pdf": ("h1", make_docs("renamed.pdf"))}, removed=["a.pdf"], save_path=tmp_path)
+
+    ids, docs = assert_consistent(tmp_path)
+    assert len(ids) == 10
+    assert sources(docs) == {"b.pdf": 5, "renamed.pdf": 5}
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_identical_files_at_two_paths_are_indexed_separately(tmp_path, fake_embed, index_type):
+    update_index(
+        {"a.pdf": ("same", make_docs("a.pdf", tag="copy")), "b.pdf": ("h2", make_docs("b.pdf"))},
+        save_path=tmp_path,
+        rebuild=True,
+        index_type=index_type,
+    )
+    update_index({"copy.pdf": ("same", make_docs("copy.pdf", tag="copy"))}, save_path=tmp_path)
+    ids, docs = assert_consistent(tmp_path)
+    assert len(ids) == 15
+    assert sources(docs) == {"a.pdf": 5, "b.pdf": 5, "copy.pdf": 5}
+
+    # Removing one copy leaves the other.
+    update_index({}, removed=["copy.pdf"], save_path=tmp_path)
+    ids, docs = assert_consistent(tmp_path)
+    assert len(ids) == 10
+    assert sources(docs) == {"a.pdf": 5, "b.pdf": 5}
+
+
+def test_unchanged_file_streamed_again_keeps_its_vectors(tmp_path, fake_embed):
+    update_index({"a.pdf": ("h1", make_docs("a.pdf"))}, save_path=tmp_path, rebuild=True)
+    before, _ = assert_consistent(tmp_path)
+
+    update_index({"a.pdf": ("h1", make_docs("a.pdf"))}, save_path=tmp_path)
+
+    ids, _ = assert_consistent(tmp_path)
+    assert ids == before
+
+
+def test_chunk_ids_depend_on_path_hash_and_position():
+    assert chunk_id("a.pdf", "h", 0) == chunk_id("a.pdf", "h", 0)
+    assert len({chunk_id("a.pdf", "h", 0), chunk_id("b.pdf", "h", 0), chunk_id("a.pdf", "g", 0)}) == 3
+    assert len({chunk_id("a.pdf", "h", position) for position in range(100)}) == 100
+    assert 0 <= chunk_id("a.pdf", "h", 0) < 2**63
+
+
+def test_failed_update_raises_the_cause_and_keeps_the_current_version(tmp_path, fake_embed, monkeypatch):
+    update_index({"a.pdf": ("h1", make_docs("a.pdf"))}, save_path=tmp_path, rebuild=True)
+    published = current_version(tmp_path)
+
+    def unreachable(texts, batch_size=None, concurrency=None):
+        raise ConnectionError("Ollama is unreachable")
+
+    monkeypatch.setattr("RAG.indexing.build_index.embed_many", unreachable)
+    with pytest.raises(ConnectionError, match="unreachable"):
+        update_index({"b.pdf": ("h2", make_docs("b.pdf"))}, save_path=tmp_path)
+
+    assert current_version(tmp_path) == published
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == [published]
+    _, docs = assert_consistent(tmp_path)
+    assert sources(docs) == {"a.pdf": 5}
+
+
+def test_build_with_nothing_embedded_leaves_no_version(tmp_path, fake_embed):
+    with pytest.raises(ValueError, match="No embeddings"):
+        update_index({"a.pdf": ("h1", [{"content": "   ", "source": "a.pdf"}])}, save_path=tmp_path, rebuild=True)
+
+    assert current_version(tmp_path) is None
+    assert not [path for path in tmp_path.iterdir() if path.is_dir()]
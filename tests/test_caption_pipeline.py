@@ -0,0 +1,122 @@
+import io
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from RAG.multimodel import caption_pipeline
+from RAG.multimodel.caption_cache import CaptionCache
+from RAG.multimodel.caption_pipeline import CAPTION_MAX_SIDE, Captioner, inspect_image, prepare_image
+
+
+def chart(width: int = 240, height: int = 180, seed: int = 0) -> Image.Image:
+    """A bar chart-like picture: bars of random heights over a gradient."""
+    rng = np.random.default_rng(seed)
+    pixels = np.tile(np.linspace(120, 250, width, dtype="uint8"), (height, 1))
+    bar = width // 12
+    for left in range(bar, width - bar, 2 * bar):
+        pixels[height - int(rng.integers(height // 5, height - 10)):, left:left + bar] = rng.integers(0, 90)
+    return Image.fromarray(pixels).convert("RGB")
+
+
+def save(image: Image.Image, path, image_format: str = "PNG", **options):
+    image.save(path, format=image_format, **options)
+    return str(path)
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """Caption with a stub instead of the vision model; returns the image bytes sent so far."""
+    calls = []
+    lock = threading.Lock()
+
+    def caption_image_bytes(image, model=None, prompt=None):
+        with lock:
+            calls.append(image)
+            return f"caption {len(calls)}"
+
+    monkeypatch.setattr(caption_pipeline, "caption_image_bytes", caption_image_bytes)
+    return calls
+
+
+def test_identical_and_near_identical_images_share_one_caption(tmp_path, model_calls):
+    original = chart()
+    paths = [
+        save(original, tmp_path / "page1.png"),
+        save(original, tmp_path / "page2.png"),
+        # Re-encoded and slightly resized: a different file with the same picture.
+        save(original.resize((228, 171)), tmp_path / "page3.jpg", "JPEG", quality=80),
+        save(chart(seed=7), tmp_path / "other.png"),
+    ]
+    captioner = Captioner()
+
+    captions = captioner.caption_many(paths, workers=4)
+
+    assert len(model_calls) == 2
+    assert captions[0] == captions[1] == captions[2] != captions[3]
+    assert captioner.counts["duplicates"] == 2 and captioner.counts["captioned"] == 2
+
+
+def test_tiny_and_blank_images_are_skipped(tmp_path, model_calls):
+    paths = [
+        save(chart(20, 20), tmp_path / "icon.png"),
+        save(Image.new("RGB", (300, 200), "white"), tmp_path / "blank.png"),
+    ]
+    captioner = Captioner()
+
+    assert captioner.caption_many(paths, workers=2) == [None, None]
+    assert model_calls == []
+    assert captioner.counts["skipped"] == 2
+    assert inspect_image(Path(paths[0]).read_bytes())["skip"].startswith("smaller than")
+    assert inspect_image(Path(paths[1]).read_bytes())["skip"] == "low entropy"
+
+
+def test_large_images_are_scaled_down_before_upload(tmp_path, model_calls):
+    path = save(chart(2400, 1200), tmp_path / "poster.png")
+
+    Captioner().caption(path)
+
+    sent = Image.open(io.BytesIO(model_calls[0]))
+    assert max(sent.size) == CAPTION_MAX_SIDE
+    assert sent.size == (CAPTION_MAX_SIDE, CAPTION_MAX_SIDE // 2)
+    assert sent.format == "JPEG"
+
+
+def test_small_and_undecodable_images_are_sent_as_they_are():
+    data = io.BytesIO()
+    chart().save(data, format="PNG")
+    info = inspect_image(data.getvalue())
+    assert prepare_image(data.getvalue(), info["pixmap"]) == data.getvalue()
+
+    garbage = b"not an image"
+    info = inspect_image(garbage)
+    assert info["skip"] is None and info["pixmap"] is None
+    assert prepare_image(garbage, None) == garbage
+
+
+def test_captions_are_reused_across_ingests_through_the_cache(tmp_path, model_calls):
+    cache = CaptionCache(tmp_path / "captions.sqlite")
+    original = chart()
+    first = Captioner(cache=cache).caption(save(original, tmp_path / "a.png"))
+
+    # New captioners, as in later ingests: the same image, then a re-encoded copy.
+    same, copy = Captioner(cache=cache), Captioner(cache=cache)
+    assert same.caption(save(original, tmp_path / "b.png")) == first
+    assert copy.caption(save(original, tmp_path / "c.jpg", "JPEG", quality=70)) == first
+
+    assert len(model_calls) == 1
+    assert same.counts["cached"] == copy.counts["cached"] == 1
+    cache.close()
+
+
+def test_dhash_tolerates_re_encoding_but_not_other_images():
+    def phash(image, image_format="PNG", **options):
+        data = io.BytesIO()
+        image.save(data, format=image_format, **options)
+        return inspect_image(data.getvalue())["phash"]
+
+    original = phash(chart())
+    assert (original ^ phash(chart(), "JPEG", quality=60)).bit_count() <= caption_pipeline.CAPTION_PHASH_DISTANCE
+    assert (original ^ phash(chart(seed=3))).bit_count() > caption_pipeline.CAPTION_PHASH_DISTANCE
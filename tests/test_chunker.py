@@ -0,0 +1,100 @@
+import pytest
+
+from RAG.indexing.chunker import CHUNK_MAX_TOKENS, chunk_layout, chunk_pages, split_blocks
+from RAG.tokens import estimate_tokens
+
+BOX_A = (50, 40, 560, 80)
+BOX_B = (50, 90, 560, 130)
+BOX_C = (50, 140, 560, 180)
+
+
+def sentence(number: int, words: int = 8) -> str:
+    return f"Sentence {number} " + " ".join(f"word{number}x{position}" for position in range(words)) + "."
+
+
+def test_short_paragraphs_are_packed_together():
+    blocks = [("First paragraph.", BOX_A), ("Second para-\ngraph,\n  wrapped.", BOX_B), ("   \n", BOX_C)]
+
+    chunks = split_blocks(blocks, max_tokens=50)
+
+    assert chunks == [
+        ("First paragraph.\nSecond paragraph, wrapped.", [list(map(float, BOX_A)), list(map(float, BOX_B))]),
+    ]
+
+
+def test_a_paragraph_that_does_not_fit_starts_a_new_chunk():
+    first = " ".join(sentence(number) for number in range(2))
+    second = " ".join(sentence(number) for number in range(2, 4))
+    limit = estimate_tokens(first) + 5
+
+    chunks = split_blocks([(first, BOX_A), (second, BOX_B)], max_tokens=limit)
+
+    assert [text for text, _ in chunks] == [first, second]
+    assert [boxes for _, boxes in chunks] == [[list(map(float, BOX_A))], [list(map(float, BOX_B))]]
+
+
+def test_long_paragraphs_split_between_sentences():
+    paragraph = " ".join(sentence(number) for number in range(6))
+    limit = estimate_tokens(sentence(0)) * 2 + 2
+
+    chunks = split_blocks([(paragraph, BOX_A)], max_tokens=limit)
+
+    assert [text for text, _ in chunks] == [
+        f"{sentence(0)} {sentence(1)}",
+        f"{sentence(2)} {sentence(3)}",
+        f"{sentence(4)} {sentence(5)}",
+    ]
+    # Every piece of the paragraph points back at its block.
+    assert all(boxes == [list(map(float, BOX_A))] for _, boxes in chunks)
+
+
+def test_a_sentence_too_long_on_its_own_splits_between_words():
+    long_sentence = sentence(0, words=200)
+
+    chunks = split_blocks([(long_sentence, BOX_A)], max_tokens=40)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(text) <= 40 for text, _ in chunks)
+    assert " ".join(text for text, _ in chunks) == long_sentence
+
+
+@pytest.mark.parametrize("max_tokens", [30, 64])
+def test_chunks_never_exceed_the_limit(max_tokens):
+    # Long words, where the estimate counts characters and the joining spaces matter.
+    blocks = [(" ".join(sentence(number, words) for number in range(words)), BOX_A) for words in (1, 3, 12, 40)]
+
+    chunks = split_blocks(blocks, max_tokens=max_tokens)
+
+    assert all(estimate_tokens(text) <= max_tokens for text, _ in chunks)
+    assert max(estimate_tokens(text) for text, _ in chunks) >= max_tokens - 2
+
+
+def test_layout_mode_chunks_up_to_chunk_max_tokens():
+    text = " ".join(sentence(number) for number in range(400))
+
+    chunks = chunk_pages([{"page": 2, "source": "a.pdf", "blocks": [(text, BOX_A)]}], mode="layout")
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk["content"]) <= CHUNK_MAX_TOKENS for chunk in chunks)
+    assert {(chunk["page"], chunk["source"], chunk["type"]) for chunk in chunks} == {(2, "a.pdf", "text")}
+
+
+def test_layout_chunks_carry_rounded_boxes_and_stay_on_their_page():
+    pages = [
+        {"page": 0, "source": "a.pdf", "blocks": [("Intro.", (50.04, 40.26, 560.0, 80.0))]},
+        {"page": 1, "source": "a.pdf", "blocks": [("Body.", BOX_B)]},
+    ]
+
+    chunks = chunk_layout(pages, max_tokens=100)
+
+    assert [(chunk["page"], chunk["content"], chunk["bboxes"]) for chunk in chunks] == [
+        (0, "Intro.", [[50.0, 40.3, 560.0, 80.0]]),
+        (1, "Body.", [list(map(float, BOX_B))]),
+    ]
+
+
+def test_bad_limits_and_modes_are_rejected():
+    with pytest.raises(ValueError, match="max_tokens"):
+        split_blocks([("text", BOX_A)], max_tokens=0)
+    with pytest.raises(ValueError, match="chunk mode"):
+        chunk_pages([], mode="semantic")
@@ -0,0 +1,132 @@
+import pytest
+
+from RAG.indexing import collection
+from RAG.indexing.build_index import embed_source, file_digest, update_index
+from RAG.indexing.collection import collection_dir, save_shard_count, shard_count, shard_dir, shard_dirs, shard_of
+from RAG.indexing.versions import current_version
+from RAG.retrieval import retriever
+from scripts import ingest
+from tests.conftest import make_docs
+
+
+def fake_pipeline(pdf_files, **kwargs):
+    """``iter_pipeline`` without parsing: three chunks per file, with term counts that differ per chunk."""
+    for path in pdf_files:
+        number = int(path[-6:-4])
+        file_hash = file_digest(path)
+        docs = make_docs(path, 3)
+        for position, doc in enumerate(docs):
+            doc["content"] = "revenue " * (number + 1) + "margin " * (position + 1) + f"guidance {number}"
+        yield path, file_hash, embed_source(path, file_hash, docs)
+
+
+@pytest.fixture
+def pdfs(index_root, fake_embed, monkeypatch):
+    """Write ``count`` stand-in PDFs for collection ``name``; returns their paths."""
+    monkeypatch.setattr(ingest, "iter_pipeline", fake_pipeline)
+
+    def write(name: str, count: int):
+        raw_dir = collection.collection_raw_dir(name)
+        raw_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for number in range(count):
+            path = raw_dir / f"doc{number:02d}.pdf"
+            path.write_bytes(f"stand-in pdf {number}".encode("utf-8"))
+            paths.append(str(path))
+        return paths
+
+    return write
+
+
+def test_shard_count_survives_empty_shards(pdfs, capsys):
+    pdfs("small", 2)
+    root = collection_dir("small")
+
+    assert ingest.ingest_all(collection="small", shards=4) == 6
+    # Two PDFs fill at most two of the four shards.
+    assert len(shard_dirs(root)) <= 2
+    assert shard_count(root) == 4
+
+    capsys.readouterr()
+    assert ingest.ingest_all(collection="small") is None
+    assert ingest.ingest_all(collection="small", shards=4) is None
+    assert "Resharding" not in capsys.readouterr().out
+    assert shard_count(root) == 4
+
+
+def test_changing_the_shard_count_rebuilds_every_shard(pdfs, capsys):
+    paths = pdfs("docs", 6)
+    root = collection_dir("docs")
+    ingest.ingest_all(collection="docs", shards=3)
+
+    assert ingest.ingest_all(collection="docs", shards=2) == 18
+    assert "Resharding from 3 to 2" in capsys.readouterr().out
+    assert shard_count(root) == 2
+    assert {path.name for path in shard_dirs(root)} <= {"shard_00", "shard_01"}
+    for path in paths:
+        owner = shard_dir(root, shard_of(path, 2))
+        assert path in ingest.load_manifest(owner)["files"]
+
+    assert ingest.ingest_all(collection="docs", shards=1) == 18
+    assert shard_count(root) == 1
+    assert shard_dirs(root) == [root]
+
+
+def test_shard_count_of_collections_built_before_it_was_recorded(tmp_path, fake_embed):
+    assert shard_count(tmp_path) == 0
+
+    update_index({"a.pdf": ("h1", make_docs("a.pdf"))}, save_path=tmp_path, rebuild=True)
+    assert shard_count(tmp_path) == 1
+
+    sharded = tmp_path / "sharded"
+    for shard in (0, 1):
+        source = f"{shard}.pdf"
+        update_index({source: ("h", make_docs(source))}, save_path=shard_dir(sharded, shard), rebuild=True)
+    assert shard_count(sharded) == 2
+
+    save_shard_count(sharded, 5)
+    assert shard_count(sharded) == 5
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid"])
+def test_sharded_search_matches_one_index(pdfs, mode):
+    for name, shards in (("whole", 1), ("split", 3)):
+        pdfs(name, 9)
+        ingest.ingest_all(collection=name, shards=shards)
+    assert len(shard_dirs(collection_dir("split"))) > 1
+
+    for query in ("revenue guidance 3", "margin", "revenue margin"):
+        whole = retriever.retrieve(query, 5, mode=mode, rerank=False, collections="whole")
+        split = retriever.retrieve(query, 5, mode=mode, rerank=False, collections="split")
+        # The collections hold the same chunks under different folders.
+        assert [(doc["content"], doc["page"]) for doc in split] == [(doc["content"], doc["page"]) for doc in whole]
+
+
+def test_sharding_an_unsharded_collection_removes_its_root_index(pdfs):
+    paths = pdfs("docs", 6)
+    root = collection_dir("docs")
+    ingest.ingest_all(collection="docs")
+    assert current_version(root) is not None
+
+    assert ingest.ingest_all(collection="docs", shards=2) == 18
+
+    # Only the shards, their count and nothing the retriever could still read as an index.
+    assert current_version(root) is None
+    assert sorted(path.name for path in root.iterdir()) == ["collection.json", "shard_00", "shard_01"]
+    assert len(retriever.retrieve("revenue margin", 18, mode="dense", rerank=False, collections="docs")) == 18
+    assert {doc["source"] for doc in retriever.retrieve("guidance", 18, rerank=False, collections="docs")} == set(paths)
+
+
+def test_load_index_returns_one_pair_unless_the_collection_is_sharded(pdfs):
+    for name, shards in (("whole", 1), ("split", 3)):
+        pdfs(name, 9)
+        ingest.ingest_all(collection=name, shards=shards)
+
+    index, docs = retriever.load_index(collection="whole")
+    assert index.ntotal == len(docs) == 27
+    assert retriever.load_shards(collection="whole") == [(index, docs)]
+
+    split = retriever.load_index(force_reload=True, collection="split")
+    assert split == retriever.load_shards(collection="split")
+    assert len(split) == len(shard_dirs(collection_dir("split"))) > 1
+    assert sum(index.ntotal for index, _ in split) == 27
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from RAG import sqlite_cache
+from RAG.embeddings.cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_entries=100)
+    yield cache
+    cache.close()
+
+
+def test_vectors_are_keyed_by_model_and_normalized_text(cache):
+    cache.put_many("model-a", ["revenue  grew\n"], [[1.0, 2.0]])
+
+    found = cache.get_many("model-a", ["revenue grew", " revenue grew ", "revenue fell"])
+    assert found == [[1.0, 2.0], [1.0, 2.0], None]
+    assert cache.get_many("model-b", ["revenue grew"]) == [None]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_empty_vectors_are_not_stored(cache):
+    cache.put_many("model", ["a", "b"], [[], [0.5]])
+
+    assert cache.get_many("model", ["a", "b"]) == [None, [0.5]]
+
+
+def test_float16_rows_stay_readable_after_switching_dtype(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    half = EmbeddingCache(path, dtype="float16")
+    half.put_many("model", ["a"], [[0.1, 0.2]])
+    half.close()
+
+    full = EmbeddingCache(path, dtype="float32")
+    full.put_many("model", ["b"], [[0.1, 0.2]])
+    a, b = full.get_many("model", ["a", "b"])
+    np.testing.assert_allclose(a, [0.1, 0.2], rtol=1e-3)
+    assert b == np.float32([0.1, 0.2]).tolist()
+    full.close()
+
+    with pytest.raises(ValueError, match="dtype"):
+        EmbeddingCache(path, dtype="int8")
+
+
+def test_least_recently_used_vectors_are_evicted_to_95_percent(tmp_path, monkeypatch):
+    times = iter(range(1, 1000))
+    monkeypatch.setattr(sqlite_cache.time, "time", lambda: next(times))
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_entries=40)
+    texts = [f"chunk {number}" for number in range(40)]
+    for text in texts:
+        cache.put_many("model", [text], [[1.0]])
+    cache.get_many("model", texts[:10])
+
+    cache.put_many("model", ["chunk 40"], [[1.0]])
+
+    assert len(cache) == cache._count == 38
+    assert cache.evictions == 3
+    kept = cache.get_many("model", [*texts, "chunk 40"])
+    assert [number for number, vector in enumerate(kept) if vector is None] == [10, 11, 12]
+    cache.close()
+
+
+def test_hits_touch_rows_in_batches(cache, monkeypatch):
+    monkeypatch.setattr(EmbeddingCache, "TOUCH_BATCH", 4)
+    cache.put_many("model", [f"chunk {number}" for number in range(6)], [[1.0]] * 6)
+    writes = []
+    cache._conn.set_trace_callback(lambda query: writes.append(query) if query.startswith("UPDATE") else None)
+
+    cache.get_many("model", ["chunk 0", "chunk 1", "chunk 2"])
+    assert writes == []
+    cache.get_many("model", ["chunk 3"])
+    assert len(writes) == 4
+
+
+def test_row_count_covers_rows_already_on_disk(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    first = EmbeddingCache(path)
+    first.put_many("model", ["a", "b", "a"], [[1.0], [2.0], [1.0]])
+    first.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened._count == len(reopened) == 2
+    reopened.put_many("model", ["b", "c"], [[2.0], [3.0]])
+    assert reopened._count == 3
+    reopened.close()
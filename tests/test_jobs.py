@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from RAG.indexing import collection, jobs
+from RAG.indexing.jobs import JobStore
+
+
+@pytest.fixture
+def store(index_root, tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    yield store
+    store.close()
+
+
+def add_pdf(name: str, file_name: str = "a.pdf", content: str = "stand-in pdf"):
+    raw_dir = collection.collection_raw_dir(name)
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    (raw_dir / file_name).write_text(content, encoding="utf-8")
+
+
+def test_submitting_the_same_files_again_returns_the_queued_job(store):
+    add_pdf("docs")
+
+    first, coalesced = store.submit("docs")
+    assert not coalesced
+    again, coalesced = store.submit("docs")
+    assert coalesced and again["id"] == first["id"]
+    assert again["submissions"] == 2
+
+    # A queued job has read nothing yet, so it takes over a changed file set too.
+    add_pdf("docs", "b.pdf")
+    changed, coalesced = store.submit("docs")
+    assert coalesced and changed["id"] == first["id"]
+    assert len(changed["progress"]["files"]) == 2
+
+
+def test_different_options_or_collections_get_their_own_job(store):
+    add_pdf("docs")
+    add_pdf("other")
+
+    ids = {
+        store.submit("docs")[0]["id"],
+        store.submit("docs", full=True)[0]["id"],
+        store.submit("docs", shards=2)[0]["id"],
+        store.submit("other")[0]["id"],
+    }
+
+    assert len(ids) == 4
+
+
+def test_a_running_job_is_returned_only_while_its_files_are_unchanged(store):
+    add_pdf("docs")
+    running, _ = store.submit("docs")
+    assert store.claim("worker")["id"] == running["id"]
+
+    again, coalesced = store.submit("docs")
+    assert coalesced and again["id"] == running["id"]
+
+    add_pdf("docs", "b.pdf")
+    queued, coalesced = store.submit("docs")
+    assert not coalesced and queued["id"] != running["id"]
+    assert queued["status"] == "queued"
+
+
+def test_claim_never_runs_two_jobs_of_one_collection(store):
+    add_pdf("docs")
+    add_pdf("other")
+    first, _ = store.submit("docs")
+    store.claim("worker-1")
+    add_pdf("docs", "b.pdf")
+    second, _ = store.submit("docs")
+    other, _ = store.submit("other")
+
+    assert store.claim("worker-2")["id"] == other["id"]
+    assert store.claim("worker-3") is None
+
+    store.finish(first["id"], "done", first["progress"])
+    assert store.claim("worker-3")["id"] == second["id"]
+
+
+def test_jobs_of_a_dead_process_are_queued_again(store, monkeypatch):
+    add_pdf("docs")
+    job, _ = store.submit("docs")
+    store.claim(f"{jobs.socket.gethostname()}:12345:ingest-0")
+    monkeypatch.setattr(jobs, "_pid_alive", lambda pid: pid != 12345)
+
+    assert store.requeue_orphans() == 1
+    assert store.get(job["id"])["status"] == "queued"
+
+
+def test_submit_rejects_bad_requests(store):
+    with pytest.raises(ValueError, match="No PDF files"):
+        store.submit("empty")
+    with pytest.raises(ValueError, match="shards"):
+        store.submit("docs", shards=0)
+    with pytest.raises(ValueError, match="Invalid collection name"):
+        store.submit("../docs")
+
+
+def test_every_submission_wakes_a_worker(store, monkeypatch):
+    # Idle workers would otherwise only look again after a minute.
+    monkeypatch.setattr(jobs, "POLL_SECONDS", 60)
+    monkeypatch.setattr(jobs, "_wake", threading.Semaphore(0))
+    started = {}
+
+    def run_job(store, job):
+        started[job["collection"]] = time.monotonic()
+        store.finish(job["id"], "done", job["progress"])
+
+    monkeypatch.setattr(jobs, "run_job", run_job)
+    for number in range(2):
+        threading.Thread(target=jobs._work, args=(store,), name=f"test-ingest-{number}", daemon=True).start()
+    # Let both workers find the queue empty and go to sleep.
+    time.sleep(0.2)
+
+    submitted = time.monotonic()
+    for name in ("docs", "other"):
+        add_pdf(name)
+        store.submit(name)
+
+    deadline = time.monotonic() + 5
+    while len(started) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(started) == ["docs", "other"]
+    assert max(started.values()) - submitted < 5
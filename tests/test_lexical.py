@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+import pytest
+
+from RAG.indexing.lexical import (
+    BM25_B,
+    BM25_K1,
+    RRF_K,
+    CorpusStats,
+    LexicalIndex,
+    reciprocal_rank_fusion,
+    tokenize,
+    write_lexical_index,
+)
+from RAG.retrieval.retriever import _fuse
+
+CORPUS = {
+    10: "Revenue grew in Europe and revenue grew in Asia.",
+    20: "Operating margin improved as hosting costs fell.",
+    30: "Ticket AB-1234 tracks the margin restatement.",
+    40: "Europe hosting capacity doubled.",
+}
+
+
+@pytest.fixture
+def lexical(tmp_path):
+    write_lexical_index(tmp_path / "lexical", {doc_id: {"content": text} for doc_id, text in CORPUS.items()})
+    return LexicalIndex(tmp_path / "lexical")
+
+
+def bm25(term: str, doc_id: int) -> float:
+    """BM25 of one query term in one doc of ``CORPUS``, computed from the formula."""
+    docs = {key: tokenize(text) for key, text in CORPUS.items()}
+    df = sum(term in tokens for tokens in docs.values())
+    idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+    tf = docs[doc_id].count(term)
+    avg_length = sum(len(tokens) for tokens in docs.values()) / len(docs)
+    return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(docs[doc_id]) / avg_length))
+
+
+def test_identifiers_are_indexed_whole_and_by_part():
+    assert tokenize("See AB-1234, v2.1!") == ["see", "ab-1234", "ab", "1234", "v2.1", "v2", "1"]
+
+
+def test_postings_read_back_from_disk(lexical):
+    assert sorted(lexical.ids.tolist()) == sorted(CORPUS)
+    assert lexical.lengths.tolist() == [len(tokenize(text)) for text in CORPUS.values()]
+    for term in ("revenue", "margin", "europe", "ab-1234"):
+        term_id = lexical.vocab[term]
+        rows = lexical.postings_rows[lexical.offsets[term_id]:lexical.offsets[term_id + 1]]
+        tfs = lexical.postings_tf[lexical.offsets[term_id]:lexical.offsets[term_id + 1]]
+        expected = {doc_id: tokenize(text).count(term) for doc_id, text in CORPUS.items() if term in tokenize(text)}
+        assert dict(zip(lexical.ids[rows].tolist(), tfs.tolist())) == expected
+
+
+@pytest.mark.parametrize(
+    "query, best",
+    [("revenue", 10), ("hosting margin", 20), ("AB-1234", 30), ("europe capacity", 40)],
+)
+def test_best_match_for_a_query(lexical, query, best):
+    ids, _ = lexical.search(query, 1)
+
+    assert ids.tolist() == [best]
+
+
+def test_scores_follow_the_bm25_formula(lexical):
+    ids, scores = lexical.search("margin hosting", 10)
+
+    expected = {doc_id: bm25("margin", doc_id) + bm25("hosting", doc_id) for doc_id in CORPUS}
+    expected = {doc_id: score for doc_id, score in expected.items() if score}
+    assert ids.tolist() == sorted(expected, key=expected.get, reverse=True)
+    np.testing.assert_allclose(scores, [expected[doc_id] for doc_id in ids.tolist()], rtol=1e-5)
+
+
+def test_unknown_terms_and_disallowed_rows_score_nothing(lexical):
+    assert lexical.search("dividend", 5)[0].tolist() == []
+
+    allowed = lexical.row_mask(np.array([20, 40]))
+    ids, _ = lexical.search("europe margin", 5, allowed=allowed)
+    assert sorted(ids.tolist()) == [20, 40]
+
+
+def test_indexes_searched_together_score_like_one(tmp_path, lexical):
+    halves = []
+    for name, doc_ids in (("a", (10, 20)), ("b", (30, 40))):
+        write_lexical_index(tmp_path / name, {doc_id: {"content": CORPUS[doc_id]} for doc_id in doc_ids})
+        halves.append(LexicalIndex(tmp_path / name))
+    corpus = CorpusStats(halves, "europe margin")
+
+    scores = {}
+    for half in halves:
+        ids, found = half.search("europe margin", 5, corpus=corpus)
+        scores.update(zip(ids.tolist(), found.tolist()))
+
+    ids, found = lexical.search("europe margin", 5)
+    assert scores == pytest.approx(dict(zip(ids.tolist(), found.tolist())))
+
+
+def test_rrf_matches_the_hand_computed_ranks():
+    dense = [(0, 1), (0, 2), (1, 3)]
+    lexical = [(1, 3), (0, 4), (0, 1)]
+    # 1: 1/61 + 1/63, 3: 1/63 + 1/61, 2: 1/62, 4: 1/62; ties keep first-seen order.
+    scores = {1: 1 / 61 + 1 / 63, 2: 1 / 62, 3: 1 / 63 + 1 / 61, 4: 1 / 62}
+    assert RRF_K == 60
+
+    fused = _fuse(dense, lexical, 4)
+
+    assert fused == [(0, 1), (1, 3), (0, 2), (0, 4)]
+    assert [scores[doc_id] for _, doc_id in fused] == sorted(scores.values(), reverse=True)
+    assert _fuse(dense, lexical, 2) == [(0, 1), (1, 3)]
+    # 7: 1/63 + 1/61 edges out 6: 1/62 + 1/62.
+    assert reciprocal_rank_fusion([[5, 6, 7], [7, 6]], 3) == [7, 6, 5]
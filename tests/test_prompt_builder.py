@@ -0,0 +1,108 @@
+from RAG.augmentation import prompt_builder
+from RAG.augmentation.prompt_builder import _merge_pieces, _overlap, _truncate_table, pack_context
+from RAG.tokens import estimate_tokens
+
+PARAGRAPH = (
+    "Revenue grew twelve percent in the third quarter, driven by subscriptions in Europe. "
+    "Operating margin improved to eighteen percent as hosting costs fell. "
+    "Guidance for the full year was raised, with capital spending held flat. "
+)
+
+
+def doc(content, page=1, source="report.pdf", doc_type="text"):
+    return {"content": content, "page": page, "source": source, "type": doc_type}
+
+
+def table(rows: int) -> str:
+    lines = ["| item | q1 | q2 |", "| --- | --- | --- |"]
+    lines += [f"| line {row} | {row * 10} | {row * 11} |" for row in range(rows)]
+    return "\n".join(lines)
+
+
+def test_overlap_finds_the_shared_suffix_and_prefix():
+    shared = "gamma delta epsilon zeta"
+    assert _overlap(f"alpha beta {shared}", f"{shared} eta theta") == len(shared)
+    assert _overlap("alpha beta gamma delta epsilon", "theta iota kappa lambda mu") == 0
+    # Shorter matches than MIN_OVERLAP_CHARS are coincidence.
+    assert _overlap("the report ends here", "here it begins again and goes on") == 0
+
+
+def test_overlapping_chunks_of_a_page_are_stitched_once():
+    first, second = PARAGRAPH[:150], PARAGRAPH[110:]
+
+    text, dropped = _merge_pieces([second, first])
+
+    assert text == PARAGRAPH
+    assert dropped == 40
+
+    context, stats = pack_context([doc(first), doc(second), doc(PARAGRAPH[20:90])])
+    assert context == f"[text | page 1]\n{PARAGRAPH}"
+    assert stats["merged"] == 2
+    assert context.count("Operating margin") == 1
+
+
+def test_unrelated_chunks_of_a_page_are_both_kept():
+    text, dropped = _merge_pieces(["first paragraph on the page", "a different paragraph below it"])
+
+    assert text == "first paragraph on the page\na different paragraph below it"
+    assert dropped == 0
+
+
+def test_context_stays_within_the_budget():
+    docs = [doc(f"page {page}. " + PARAGRAPH * 3, page=page) for page in range(20)]
+
+    for budget in (100, 400, 1000):
+        context, stats = pack_context(docs, budget)
+        assert stats["tokens"] <= budget
+        assert estimate_tokens(context) <= budget
+        assert stats["blocks"] + stats["blocks_dropped"] == 20
+
+
+def test_a_block_that_does_not_fit_is_cut_or_skipped():
+    big = doc(PARAGRAPH * 20, page=2)
+
+    context, stats = pack_context([doc(PARAGRAPH), big], budget=300)
+    assert stats["blocks_truncated"] == 1
+    assert context.endswith(" ...")
+
+    _, stats = pack_context([doc(PARAGRAPH), big], budget=estimate_tokens(PARAGRAPH) + 20)
+    assert stats["blocks_dropped"] == 1
+
+
+def test_large_tables_keep_their_header_and_the_rows_that_fit(monkeypatch):
+    content = table(200)
+
+    truncated, cut = _truncate_table(content, 120)
+
+    assert cut
+    lines = truncated.splitlines()
+    assert lines[:2] == content.splitlines()[:2]
+    assert lines[2:-1] == content.splitlines()[2:len(lines) - 1]
+    assert lines[-1] == f"... ({200 - (len(lines) - 3)} more rows)"
+    assert estimate_tokens("\n".join(lines[:-1])) <= 120
+    assert _truncate_table(table(3), 120) == (table(3), False)
+
+    monkeypatch.setattr(prompt_builder, "TABLE_MAX_TOKENS", 120)
+    context, stats = pack_context([doc(content, doc_type="table")])
+    assert stats["tables_truncated"] == 1
+    assert context.startswith("[table | page 1]\n| item | q1 | q2 |\n| --- | --- | --- |\n")
+
+
+def test_blocks_keep_their_labels_and_sources_are_not_merged():
+    docs = [
+        doc("Summary of the year in one line.", page=3),
+        doc("Summary of the year in one line.", page=3, source="other.pdf"),
+        doc("A bar chart of revenue by region.", page=5, doc_type="image"),
+        doc(table(2), page=3, doc_type="table"),
+    ]
+
+    context, stats = pack_context(docs)
+
+    blocks = context.split("\n\n")
+    assert [block.splitlines()[0] for block in blocks] == [
+        "[text | page 3]",
+        "[text | page 3]",
+        "[image | page 5]",
+        "[table | page 3]",
+    ]
+    assert stats["blocks"] == 4 and stats["merged"] == 0
@@ -0,0 +1,60 @@
+import numpy as np
+
+from RAG.retrieval.reranker import mmr, rerank_vectors, term_overlap
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype="float32")
+    return vector / np.linalg.norm(vector)
+
+
+# Candidates 0 and 1 say nearly the same thing; 2 and 3 cover other ground.
+VECTORS = np.stack([unit(1, 0, 0), unit(1, 0.02, 0), unit(0.6, 0.8, 0), unit(0, 0.3, 1)])
+RELEVANCE = np.array([0.9, 0.89, 0.8, 0.4], dtype="float32")
+
+
+def test_mmr_drops_a_near_duplicate_for_other_evidence():
+    assert mmr(RELEVANCE, VECTORS, 2, diversity_lambda=0.7) == [0, 2]
+
+
+def test_mmr_with_lambda_one_keeps_the_relevance_order():
+    assert mmr(RELEVANCE, VECTORS, 2, diversity_lambda=1.0) == [0, 1]
+    assert mmr(RELEVANCE, VECTORS, 4, diversity_lambda=1.0) == [0, 1, 2, 3]
+    shuffled = np.array([0.4, 0.9, 0.8, 0.89], dtype="float32")
+    assert mmr(shuffled, VECTORS, 4, diversity_lambda=1.0) == [1, 3, 2, 0]
+
+
+def test_mmr_returns_at_most_the_candidates_it_has():
+    assert sorted(mmr(RELEVANCE, VECTORS, 10, diversity_lambda=0.5)) == [0, 1, 2, 3]
+    assert mmr(RELEVANCE[:0], VECTORS[:0], 3) == []
+
+
+def test_term_overlap_is_the_share_of_query_terms_found():
+    contents = ["Revenue grew in Europe.", "Europe only.", "Nothing relevant.", "Ticket AB-12 reopened."]
+
+    scores = term_overlap("revenue europe", contents)
+    np.testing.assert_allclose(scores, [1.0, 0.5, 0.0, 0.0])
+
+    # A matched identifier counts for its parts too.
+    np.testing.assert_allclose(term_overlap("ab-12 ab", contents)[3], 1.0)
+    np.testing.assert_allclose(term_overlap("ab", contents)[3], 1.0)
+
+
+def test_term_overlap_weights_terms_by_idf():
+    def idf(terms):
+        return {term: {"revenue": 3.0, "europe": 1.0}[term] for term in terms}
+
+    scores = term_overlap("revenue europe", ["revenue", "europe"], idf)
+
+    np.testing.assert_allclose(scores, [0.75, 0.25])
+
+
+def test_rerank_blends_similarity_with_term_overlap():
+    vectors = [unit(1, 0.1, 0), unit(1, 0, 0)]
+    docs = [{"content": "hosting costs fell"}, {"content": "unrelated text"}]
+
+    def order(lexical_weight):
+        return rerank_vectors(vectors, unit(1, 0, 0), "hosting costs", docs, 2, None, lexical_weight, 1.0)
+
+    assert order(0.0) == [1, 0]
+    assert order(0.3) == [0, 1]
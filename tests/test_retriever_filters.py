@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from RAG.indexing import build_index
+from RAG.indexing.build_index import update_index
+from RAG.retrieval import retriever
+from tests.conftest import fake_vector, make_docs
+
+
+def build(root, index_type="flat"):
+    update_index(
+        {
+            "/data/raw/report.pdf": ("h1", make_docs("/data/raw/report.pdf", 6)),
+            "/data/raw/tables.pdf": ("h2", make_docs("/data/raw/tables.pdf", 4, tag="table", doc_type="table")),
+            "/data/raw/photos.pdf": ("h3", make_docs("/data/raw/photos.pdf", 3, tag="image", doc_type="image")),
+        },
+        save_path=root,
+        rebuild=True,
+        index_type=index_type,
+    )
+
+
+def search(filters, mode="dense", k=50):
+    return retriever.retrieve("chunk 2 of report.pdf", k, mode=mode, rerank=False, filters=filters)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+@pytest.mark.parametrize("mode", ["dense", "hybrid"])
+def test_filters_return_every_matching_chunk_and_nothing_else(index_root, fake_embed, index_type, mode):
+    build(index_root, index_type)
+
+    docs = search({"type": "table"}, mode)
+    assert len(docs) == 4
+    assert {doc["type"] for doc in docs} == {"table"}
+
+    # A file name matches the stored path.
+    docs = search({"source": "report.pdf", "page_min": 2, "page_max": 4}, mode)
+    assert sorted(doc["page"] for doc in docs) == [2, 3, 4]
+    assert {doc["source"] for doc in docs} == {"/data/raw/report.pdf"}
+
+    docs = search({"type": ["table", "image"], "page_max": 0}, mode)
+    assert sorted((doc["type"], doc["page"]) for doc in docs) == [("image", 0), ("table", 0)]
+
+
+def test_lexical_search_honours_filters(index_root, fake_embed):
+    build(index_root)
+
+    docs = retriever.retrieve("chunk", 50, mode="lexical", rerank=False, filters={"source": "/data/raw/report.pdf"})
+
+    assert len(docs) == 6
+    assert {doc["source"] for doc in docs} == {"/data/raw/report.pdf"}
+
+
+def test_filter_without_matches_returns_nothing(index_root, fake_embed):
+    build(index_root)
+
+    assert search({"source": "missing.pdf"}) == []
+    assert search({"type": "image", "page_min": 10}) == []
+
+
+def test_filtered_top_k_is_the_best_of_the_matching_chunks(index_root, fake_embed):
+    build(index_root)
+
+    unfiltered = search(None)
+    best_text = [doc for doc in unfiltered if doc["type"] == "text"][:2]
+
+    assert search({"type": "text"}, k=2) == best_text
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"author": "x"},
+        {"page_min": -1},
+        {"page_max": True},
+        {"page_min": "1"},
+        {"page_min": 3, "page_max": 2},
+        {"source": ""},
+        {"type": ["text", 3]},
+    ],
+)
+def test_invalid_filters_are_rejected(index_root, fake_embed, filters):
+    build(index_root)
+
+    with pytest.raises(ValueError):
+        search(filters)
+
+
+def test_filter_key_ignores_order_duplicates_and_empty_filters():
+    assert retriever._filter_key(None) is None
+    assert retriever._filter_key({}) is None
+    assert retriever._filter_key({"source": None, "type": None}) is None
+    assert retriever._filter_key({"type": ["table", "text", "table"]}) == retriever._filter_key(
+        {"type": ["text", "table"]}
+    )
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat"])
+@pytest.mark.parametrize("reduce", ["none", "pca"])
+def test_exact_filtered_search_scores_like_the_index(index_root, fake_embed, monkeypatch, index_type, reduce):
+    # Embeddings that are not unit length, which only a cosine index normalizes.
+    scaled = lambda text: (3 * np.asarray(fake_vector(text))).tolist()  # noqa: E731
+    monkeypatch.setattr(build_index, "embed_many", lambda texts, **kwargs: [scaled(text) for text in texts])
+    update_index(
+        {"/data/raw/report.pdf": ("h1", make_docs("/data/raw/report.pdf", 40))},
+        save_path=index_root,
+        rebuild=True,
+        index_type=index_type,
+        index_params={"metric": "cosine", "reduce": reduce, "reduce_dim": 8},
+    )
+    loaded = retriever._loaded_shards(retriever.DEFAULT_COLLECTION)[0]
+    query = [scaled("chunk 2 of report.pdf")]
+
+    selection = retriever._selection(loaded, retriever._filter_key({"page_max": 9}))
+    assert selection.exact is not None
+    filtered_ids, filtered_scores = retriever._dense_hits(loaded.index, query, 10, selection)[0]
+
+    assert sorted(filtered_ids) == sorted(selection.ids.tolist())
+    assert all(-1 <= score <= 1 + 1e-5 for score in filtered_scores)
+    # Every chunk of the filter scores as the unfiltered search scored it.
+    ids, scores = retriever._dense_hits(loaded.index, query, 40)[0]
+    unfiltered = dict(zip(ids, scores))
+    assert filtered_scores == pytest.approx([unfiltered[doc_id] for doc_id in filtered_ids], abs=1e-5)
@@ -0,0 +1,138 @@
+import pytest
+
+from RAG import sqlite_cache
+from RAG.sqlite_cache import SharedCache, SQLiteCache
+
+
+class Notes(SQLiteCache):
+    TABLE = "notes"
+    COLUMNS = {"book": "TEXT NOT NULL", "page": "INTEGER NOT NULL", "text": "TEXT NOT NULL"}
+    KEY = ("book", "page")
+
+    def get_many(self, book, pages):
+        return {page: text for page, (text,) in self._get_many((book,), pages, ("text",)).items()}
+
+    def put_many(self, book, texts):
+        return self._put_many((book, page, text) for page, text in texts.items())
+
+
+def last_used(cache, book, page):
+    return cache._conn.execute("SELECT last_used FROM notes WHERE book = ? AND page = ?", (book, page)).fetchone()[0]
+
+
+@pytest.fixture
+def notes(tmp_path):
+    cache = Notes(tmp_path / "notes.sqlite", max_entries=100)
+    yield cache
+    cache.close()
+
+
+def test_rows_are_keyed_by_every_key_column(notes):
+    assert notes.put_many("a", {1: "one", 2: "two"}) == 2
+    notes.put_many("b", {1: "other"})
+
+    assert notes.get_many("a", [1, 2, 3]) == {1: "one", 2: "two"}
+    assert notes.get_many("b", [1, 2]) == {1: "other"}
+    assert notes.stats()["hits"] == 3 and notes.stats()["misses"] == 2
+
+
+def test_storing_a_row_again_replaces_it_without_counting_it_twice(notes):
+    notes.put_many("a", {1: "one", 2: "two"})
+
+    assert notes.put_many("a", {2: "second", 3: "three"}) == 1
+
+    assert notes.get_many("a", [1, 2, 3]) == {1: "one", 2: "second", 3: "three"}
+    assert notes._count == len(notes) == 3
+
+
+def test_lookups_cover_more_keys_than_one_statement_binds(notes):
+    pages = range(sqlite_cache.SQL_BATCH * 2 + 7)
+    notes.max_entries = 10_000
+    notes.put_many("a", {page: str(page) for page in pages})
+
+    assert len(notes.get_many("a", pages)) == len(pages)
+
+
+def test_eviction_drops_the_least_recently_used_down_to_the_trim_level(tmp_path, monkeypatch):
+    times = iter(range(1, 1000))
+    monkeypatch.setattr(sqlite_cache.time, "time", lambda: next(times))
+    cache = Notes(tmp_path / "notes.sqlite", max_entries=20)
+    for page in range(20):
+        cache.put_many("a", {page: str(page)})
+    # Read the oldest rows again so the next ones are least recently used.
+    cache.get_many("a", range(5))
+
+    cache.put_many("a", {20: "20"})
+
+    assert len(cache) == cache._count == int(20 * sqlite_cache.EVICT_TO)
+    assert cache.evictions == 2
+    assert set(cache.get_many("a", range(21))) == set(range(5)) | set(range(7, 21))
+    cache.close()
+
+
+def test_row_count_is_kept_in_memory_until_the_cap(notes):
+    notes.put_many("a", {page: str(page) for page in range(10)})
+    queries = []
+    notes._conn.set_trace_callback(queries.append)
+
+    notes.put_many("a", {page: str(page) for page in range(10, 20)})
+
+    assert notes._count == 20
+    assert not [query for query in queries if "COUNT(*)" in query]
+
+
+def test_rows_added_by_another_process_are_counted_before_evicting(tmp_path):
+    path = tmp_path / "notes.sqlite"
+    first = Notes(path, max_entries=20)
+    second = Notes(path, max_entries=20)
+    first.put_many("a", {page: str(page) for page in range(15)})
+    second.put_many("b", {page: str(page) for page in range(15)})
+    assert first._count == 15
+
+    first.put_many("a", {page: str(page) for page in range(15, 21)})
+
+    assert len(first) == 19
+    first.close()
+    second.close()
+
+
+def test_touches_are_written_in_batches_and_on_close(tmp_path, monkeypatch):
+    times = iter(range(1, 1000))
+    monkeypatch.setattr(sqlite_cache.time, "time", lambda: next(times))
+    monkeypatch.setattr(Notes, "TOUCH_BATCH", 3)
+    path = tmp_path / "notes.sqlite"
+    cache = Notes(path, max_entries=100)
+    cache.put_many("a", {page: str(page) for page in range(5)})
+    stored = last_used(cache, "a", 0)
+
+    cache.get_many("a", [0, 1])
+    assert last_used(cache, "a", 0) == stored
+    cache.get_many("a", [2])
+    assert last_used(cache, "a", 0) > stored
+
+    cache.get_many("a", [4])
+    cache.close()
+    reopened = Notes(path, max_entries=100)
+    assert last_used(reopened, "a", 4) > stored
+    reopened.close()
+
+
+def test_cap_must_be_positive(tmp_path):
+    with pytest.raises(ValueError, match="max_entries"):
+        Notes(tmp_path / "notes.sqlite", max_entries=0)
+
+
+def test_shared_cache_opens_once_and_not_at_all_while_disabled(tmp_path):
+    opened = []
+
+    def factory():
+        opened.append(Notes(tmp_path / "notes.sqlite", max_entries=10))
+        return opened[-1]
+
+    shared = SharedCache(factory, enabled=True)
+    assert shared.get() is shared.get() is opened[0]
+    assert len(opened) == 1
+    opened[0].close()
+
+    assert SharedCache(factory, enabled=False).get() is None
+    assert len(opened) == 1
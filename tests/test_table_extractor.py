@@ -0,0 +1,90 @@
+import fitz
+import pandas as pd
+import pytest
+
+from RAG.indexing import table_extractor
+from RAG.indexing.table_cache import TableCache
+from RAG.indexing.table_extractor import extract_tables_with_stats, screen_pages
+
+
+def draw_table(page, top: float = 320, rows: int = 4, columns: int = 3):
+    left, width, height = 50, 120, 18
+    for row in range(rows + 1):
+        page.draw_line((left, top + row * height), (left + columns * width, top + row * height))
+    for column in range(columns + 1):
+        page.draw_line((left + column * width, top), (left + column * width, top + rows * height))
+    for row in range(rows):
+        for column in range(columns):
+            page.insert_text((left + column * width + 4, top + row * height + 13), f"r{row}c{column}", fontsize=8)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    """Four pages: text, a ruled table, a header rule and page frame, and a second table."""
+    path = tmp_path / "report.pdf"
+    doc = fitz.open()
+    for page_no in range(4):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 40, 560, 300), f"Quarterly notes, page {page_no}.", fontsize=9)
+        if page_no in (1, 3):
+            draw_table(page)
+        elif page_no == 2:
+            page.draw_line((50, 35), (560, 35))
+            page.draw_rect(fitz.Rect(30, 20, 580, 820))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TableCache(tmp_path / "tables.sqlite")
+    monkeypatch.setattr(table_extractor, "get_table_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def test_screening_keeps_only_pages_with_a_ruled_table(pdf):
+    assert screen_pages(pdf) == ([1, 3], 4)
+
+
+def test_cached_tables_come_back_as_dataframes(cache):
+    table = pd.DataFrame([["rev", "10"], ["cost", "4"]], columns=["item", "amount"])
+
+    cache.put_many("hash", {0: [table], 1: []})
+
+    found = cache.get_many("hash", [0, 1, 2])
+    assert sorted(found) == [0, 1]
+    assert found[1] == []
+    pd.testing.assert_frame_equal(found[0][0], table)
+    assert cache.get_many("other", [0]) == {}
+
+
+def test_second_extraction_of_a_file_parses_nothing(pdf, cache, monkeypatch):
+    parsed = []
+
+    def parse_pages(pdf_path, pages, workers):
+        parsed.append(list(pages))
+        return {page: [pd.DataFrame([[f"cell {page}"]])] for page in pages}
+
+    monkeypatch.setattr(table_extractor, "_parse_pages", parse_pages)
+
+    tables, stats = extract_tables_with_stats(pdf, file_hash="hash", workers=1)
+    assert parsed == [[1, 3]]
+    assert stats == {"pages": 4, "candidates": 2, "cached": 0, "parsed": 2}
+    assert [table["page"] for table in tables] == [1, 3]
+
+    again, stats = extract_tables_with_stats(pdf, file_hash="hash", workers=1)
+    assert parsed == [[1, 3]]
+    assert stats == {"pages": 4, "candidates": 2, "cached": 2, "parsed": 0}
+    assert [table["table"].iloc[0, 0] for table in again] == ["cell 1", "cell 3"]
+
+
+def test_unscreened_extraction_hands_every_page_to_camelot(pdf, monkeypatch):
+    parsed = []
+    monkeypatch.setattr(table_extractor, "_parse_pages", lambda path, pages, workers: parsed.extend(pages) or {})
+
+    _, stats = extract_tables_with_stats(pdf, screen=False)
+
+    assert parsed == [0, 1, 2, 3]
+    assert stats["candidates"] == 4